@@ -0,0 +1,28 @@
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from core.testing import buyer_client, create_buyer, create_order, create_supplier
+
+
+class BuyerProfileQueryTests(TestCase):
+    def test_query_count_does_not_grow_with_orders(self):
+        buyer = create_buyer()
+        ingredients = list(create_supplier("Mill").ingredients.all())
+        client = buyer_client(buyer)
+        for expected_orders in (0, 10):
+            while buyer.orders.count() < expected_orders:
+                create_order(buyer, ingredients)
+            # Only the order count; the profile comes with the authenticated user.
+            with self.assertNumQueries(1):
+                response = client.get("/api/buyers/me/")
+            self.assertEqual(response.json()["total_orders"], expected_orders)
+
+    def test_token_request_reuses_the_cached_buyer(self):
+        buyer = create_buyer()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=buyer.user).key}")
+        # The first request caches the token with its user and buyer.
+        client.get("/api/buyers/me/")
+        with self.assertNumQueries(1):
+            response = client.get("/api/buyers/me/")
+        self.assertEqual(response.json()["username"], buyer.user.username)
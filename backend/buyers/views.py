@@ -1,10 +1,17 @@
-from rest_framework.generics import RetrieveAPIView
-from .models import Buyer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from core.async_views import AsyncRetrieveAPIView, gather_reads
+from orders.models import Order
 from .serializers import BuyerProfileSerializer
 
 
-class BuyerProfileView(RetrieveAPIView):
+class BuyerProfileView(AsyncRetrieveAPIView):
     serializer_class = BuyerProfileSerializer
 
-    def get_object(self) -> Buyer:
-        return self.request.user.buyer_profile
+    async def get(self, request: Request, *args, **kwargs) -> Response:
+        # CachedTokenAuthentication preloads the profile, so usually only the
+        # count queries; other authentication loads it alongside.
+        orders = Order.objects.filter(buyer__user_id=request.user.pk)
+        buyer, total_orders = await gather_reads(lambda: request.user.buyer_profile, orders.count)
+        buyer.total_orders = total_orders
+        return Response(self.get_serializer(buyer).data)
@@ -4,3 +4,25 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self) -> None:
+        from django.contrib.auth.models import User
+        from django.db.models.signals import post_delete, post_save
+        from rest_framework.authtoken.models import Token
+        from buyers.models import Buyer
+        from ingredients.models import Ingredient, IngredientGroup
+        from suppliers.models import Supplier
+        from .authentication import evict_buyer, evict_token, evict_user
+        from .cache import bump_catalogue_version
+        from .sync import record_tombstone
+
+        for model in (Supplier, Ingredient, IngredientGroup):
+            post_save.connect(bump_catalogue_version, sender=model, dispatch_uid=f"catalogue-save-{model.__name__}")
+            post_delete.connect(bump_catalogue_version, sender=model, dispatch_uid=f"catalogue-delete-{model.__name__}")
+        for model in (Supplier, Ingredient):
+            post_delete.connect(record_tombstone, sender=model, dispatch_uid=f"tombstone-{model.__name__}")
+
+        post_delete.connect(evict_token, sender=Token, dispatch_uid="token-cache-token-delete")
+        for model, receiver in ((User, evict_user), (Buyer, evict_buyer)):
+            post_save.connect(receiver, sender=model, dispatch_uid=f"token-cache-save-{model.__name__}")
+            post_delete.connect(receiver, sender=model, dispatch_uid=f"token-cache-delete-{model.__name__}")
@@ -0,0 +1,122 @@
+"""Async DRF views for the read-heavy endpoints.
+
+Under ASGI a sync view holds a thread for the whole request. An
+``AsyncAPIView`` handler is a coroutine instead. ORM work goes through
+Django's async ORM (``aget``, ``acount``, ``async for``), and DRF's sync
+helpers such as ``get_object`` and pagination through ``sync_to_async``.
+
+Both run on the request's sync thread, so its connection and
+``ProfilingMiddleware``'s query counting apply as in a sync view. In
+Django 5.1 that thread runs one query at a time, so awaiting independent
+queries with ``asyncio.gather`` alone would not overlap them.
+``gather_reads`` runs all but the first on worker threads, each with its
+own connection, so they do.
+
+Under WSGI the same views still work. Django runs each one in a short-lived
+event loop, which adds a little overhead.
+"""
+import asyncio
+from collections.abc import Callable
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connections
+from rest_framework.generics import GenericAPIView
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .profiling import current_profile, track_queries
+
+
+def _run_here(reads: tuple[Callable[[], Any], ...]) -> list | None:
+    # Other connections can't see this one's uncommitted writes, so reads
+    # inside a transaction (a test case's, say) all stay on it.
+    if any(connection.in_atomic_block for connection in connections.all(initialized_only=True)):
+        return [read() for read in reads]
+    return None
+
+
+def _on_own_connection(read: Callable[[], Any]) -> Callable[[], Any]:
+    def run():
+        # Queries on this thread count towards a profiled request too.
+        if current_profile() is not None:
+            track_queries()
+        try:
+            return read()
+        finally:
+            # Worker threads outlive requests, so run the end-of-request
+            # connection housekeeping after every read.
+            close_old_connections()
+
+    return run
+
+
+async def gather_reads(*reads: Callable[[], Any]) -> list:
+    """Run independent blocking reads at the same time and return their results.
+
+    The first runs on the request's sync thread. Each of the others runs on
+    a worker thread with that thread's own connection, subject to the usual
+    ``CONN_MAX_AGE``/pool handling. Querysets are lazy, so pass callables
+    that evaluate them, e.g. ``lambda: list(queryset)``. A read must not
+    depend on another's result, and each must check ownership itself.
+    """
+    results = await sync_to_async(_run_here)(reads)
+    if results is not None:
+        return results
+    first, *others = reads
+    return list(await asyncio.gather(
+        sync_to_async(first)(),
+        *(sync_to_async(_on_own_connection(read), thread_sensitive=False)() for read in others),
+    ))
+
+
+class AsyncAPIView(APIView):
+    """``APIView`` whose handlers may be coroutines.
+
+    Sync handlers, such as writes that rely on ``transaction.atomic``,
+    still work. They run on the request's sync thread, as they would in a
+    sync view.
+    """
+
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Mirrors APIView.dispatch.
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            # Authentication queries the database on a token cache miss.
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            if asyncio.iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncGenericAPIView(AsyncAPIView, GenericAPIView):
+    pass
+
+
+class AsyncListAPIView(AsyncGenericAPIView):
+    async def get(self, request: Request, *args, **kwargs) -> Response:
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await sync_to_async(self.paginate_queryset)(queryset)
+        if page is None:
+            return Response(self.get_serializer([row async for row in queryset], many=True).data)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+
+class AsyncRetrieveAPIView(AsyncGenericAPIView):
+    async def get(self, request: Request, *args, **kwargs) -> Response:
+        return Response(self.get_serializer(await sync_to_async(self.get_object)()).data)
@@ -0,0 +1,118 @@
+"""Token authentication with a per-process cache of token → (user, buyer).
+
+DRF's ``TokenAuthentication`` joins token and user on every request, and
+most views then load ``request.user.buyer_profile`` separately. Here one
+query loads all three, the result is kept in a bounded LRU with a TTL, and
+the buyer comes back already cached on the user, so a warm request makes
+neither query. Signal receivers evict entries when a token is deleted or
+a user or buyer changes. Those signals only reach the process that made the
+change, so other workers see it once the TTL (default 60 s) runs out.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class _Entry(NamedTuple):
+    token: Token
+    expires: float
+
+
+class _TokenCache:
+    """Thread-safe LRU of token key → ``Token`` (with user and buyer loaded)."""
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Token | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry.token
+
+    def set(self, key: str, token: Token) -> None:
+        config = settings.TOKEN_AUTH_CACHE
+        with self._lock:
+            self._entries[key] = _Entry(token, time.monotonic() + config["TTL_SECONDS"])
+            self._entries.move_to_end(key)
+            while len(self._entries) > config["MAX_ENTRIES"]:
+                self._entries.popitem(last=False)
+
+    def evict(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def evict_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry.token.user_id == user_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = _TokenCache()
+
+
+def _copy(token: Token) -> Token:
+    """Fresh instances per request, so views can't leak state through the cache."""
+    user = copy.copy(token.user)
+    # None for users without a buyer (e.g. staff): the select_related miss is
+    # cached too, so accessing buyer_profile raises without a query.
+    buyer = User.buyer_profile.related.get_cached_value(token.user)
+    if buyer is not None:
+        buyer = copy.copy(buyer)
+        buyer.user = user
+    User.buyer_profile.related.set_cached_value(user, buyer)
+    token = copy.copy(token)
+    token.user = user
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` that serves repeat tokens from ``token_cache``.
+
+    ``request.user.buyer_profile`` is populated up front (or cached as
+    missing), so views read it without a query.
+    """
+
+    def authenticate_credentials(self, key: str):
+        token = token_cache.get(key)
+        if token is None:
+            try:
+                token = Token.objects.select_related("user__buyer_profile").get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+            token_cache.set(key, token)
+        token = _copy(token)
+        return (token.user, token)
+
+
+def evict_token(sender, instance: Token, **kwargs) -> None:
+    token_cache.evict(instance.key)
+
+
+def evict_user(sender, instance: User, **kwargs) -> None:
+    token_cache.evict_user(instance.pk)
+
+
+def evict_buyer(sender, instance, **kwargs) -> None:
+    token_cache.evict_user(instance.user_id)
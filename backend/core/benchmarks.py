@@ -0,0 +1,491 @@
+"""API benchmark cases and runner behind the ``bench`` management command.
+
+Each case drives one route through the Django test client with real token
+authentication and records p50/p95 latency, the worst-case SQL query count
+and peak Python memory (tracemalloc) across its iterations.
+``run_concurrent_writes`` measures write throughput with several writers at once,
+and ``run_server_load`` compares read throughput under uvicorn and WSGI.
+"""
+import asyncio
+import math
+import socket
+import statistics
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from buyers.models import Buyer
+from core.profiling import RequestProfile, activate, deactivate, track_queries
+from core.synthetic import USERNAME_PREFIX
+from ingredients.models import Ingredient
+from orders.models import Order, OrderItem, OrderStatus
+from products.models import Product
+
+# Headroom applied when budgets are regenerated from a run. Query counts are
+# deterministic so their budget is exact; timings need room for machine noise.
+# Latency is budgeted on the median: with 20 iterations p95 is the second
+# slowest request, which one scheduler hiccup can double.
+LATENCY_HEADROOM = 3.0
+LATENCY_FLOOR_MS = 25
+MEMORY_HEADROOM = 1.5
+
+
+@dataclass
+class Fixture:
+    """Ids of representative rows that cases build their requests from."""
+
+    buyer: Buyer
+    token: str
+    supplier_id: int
+    ingredient_ids: list[int]
+    order_id: int
+    product_id: int
+
+    @classmethod
+    def load(cls) -> "Fixture":
+        # Synthetic data is deterministic, so the first buyer is the same on every run.
+        buyer = (
+            Buyer.objects.filter(user__username__startswith=USERNAME_PREFIX)
+            .order_by("pk")
+            .first()
+        )
+        token, _ = Token.objects.get_or_create(user=buyer.user)
+        ingredient = Ingredient.objects.order_by("pk").first()
+        return cls(
+            buyer=buyer,
+            token=token.key,
+            supplier_id=ingredient.supplier_id,
+            ingredient_ids=list(
+                Ingredient.objects.filter(supplier_id=ingredient.supplier_id).values_list("pk", flat=True)[:20]
+            ),
+            order_id=Order.objects.filter(buyer=buyer).order_by("pk").values_list("pk", flat=True).first(),
+            product_id=Product.objects.filter(buyer=buyer).order_by("pk").values_list("pk", flat=True).first(),
+        )
+
+    def pending_order(self) -> int:
+        order = Order.objects.create(buyer=self.buyer)
+        OrderItem.objects.create(order=order, ingredient_id=self.ingredient_ids[0], quantity=1, unit_price="1.00")
+        return order.pk
+
+    def pending_orders(self, count: int = 200) -> list[int]:
+        orders = Order.objects.bulk_create([Order(buyer=self.buyer) for _ in range(count)])
+        return [order.pk for order in orders]
+
+    def scratch_product(self) -> int:
+        return Product.objects.create(buyer=self.buyer, name="Benchmark scratch").pk
+
+
+@dataclass
+class Case:
+    name: str
+    method: str
+    path: Callable[..., str]
+    body: Callable[..., dict] | None = None
+    status: int = 200
+    # Runs untimed before each iteration; its return value is passed to path/body.
+    setup: Callable[[Fixture], object] | None = None
+
+
+def _const(path: str) -> Callable[..., str]:
+    return lambda fixture, _=None: path
+
+
+CASES: list[Case] = [
+    Case("buyers-me", "get", _const("/api/buyers/me/")),
+    Case("suppliers-list", "get", _const("/api/suppliers/")),
+    Case("supplier-detail", "get", lambda f, _=None: f"/api/suppliers/{f.supplier_id}/"),
+    Case("supplier-ingredients", "get", lambda f, _=None: f"/api/suppliers/{f.supplier_id}/ingredients/"),
+    Case("ingredients-list", "get", _const("/api/ingredients/")),
+    Case("ingredients-list-large", "get", _const("/api/ingredients/?page_size=500")),
+    Case("ingredients-search", "get", _const("/api/ingredients/?search=oat&max_price=50")),
+    Case("ingredients-changes", "get", _const("/api/ingredients/changes/?page_size=200")),
+    Case(
+        "ingredient-prices",
+        "get",
+        lambda f, _=None: "/api/ingredients/prices/?at=2025-01-01T00:00:00Z&"
+        + "&".join(f"ingredient={pk}" for pk in f.ingredient_ids),
+    ),
+    Case(
+        "ingredient-price-history",
+        "get",
+        lambda f, _=None: "/api/ingredients/prices/history/?date_from=2024-07-01&"
+        + "&".join(f"ingredient={pk}" for pk in f.ingredient_ids),
+    ),
+    Case("orders-list", "get", _const("/api/orders/")),
+    Case("orders-changes", "get", _const("/api/orders/changes/?page_size=200")),
+    Case(
+        "orders-create",
+        "post",
+        _const("/api/orders/"),
+        body=lambda f, _=None: {"items": [{"ingredient_id": pk, "quantity": 5} for pk in f.ingredient_ids]},
+        status=201,
+    ),
+    Case("order-detail", "get", lambda f, _=None: f"/api/orders/{f.order_id}/"),
+    Case(
+        "order-transition",
+        "post",
+        lambda f, pk: f"/api/orders/{pk}/transition/",
+        body=lambda f, _=None: {"status": OrderStatus.CONFIRMED},
+        setup=Fixture.pending_order,
+    ),
+    Case(
+        "orders-batch-transition",
+        "post",
+        _const("/api/orders/transitions/"),
+        body=lambda f, ids: {"transitions": [{"order_id": pk, "status": OrderStatus.CONFIRMED} for pk in ids]},
+        setup=Fixture.pending_orders,
+    ),
+    Case(
+        "orders-plan-dry-run",
+        "post",
+        _const("/api/orders/plan/"),
+        body=lambda f, _=None: {"products": [{"product_id": f.product_id, "quantity": "100"}], "dry_run": True},
+    ),
+    Case(
+        "orders-plan-optimized",
+        "post",
+        _const("/api/orders/plan/"),
+        body=lambda f, _=None: {
+            "products": [{"product_id": f.product_id, "quantity": "100"}],
+            "dry_run": True,
+            "optimize": True,
+        },
+    ),
+    Case("orders-export", "get", _const("/api/orders/export/?output=csv")),
+    Case("orders-export-ndjson", "get", _const("/api/orders/export/?output=ndjson")),
+    Case("order-events", "get", lambda f, _=None: f"/api/orders/{f.order_id}/events/"),
+    Case("orders-lead-times", "get", _const("/api/orders/lead-times/?from_status=CONFIRMED&to_status=DELIVERED")),
+    Case("orders-spend", "get", _const("/api/orders/spend/?group_by=supplier&group_by=month")),
+    Case("products-list", "get", _const("/api/products/")),
+    Case("products-changes", "get", _const("/api/products/changes/?page_size=200")),
+    Case(
+        "products-create",
+        "post",
+        _const("/api/products/"),
+        body=lambda f, _=None: {
+            "name": "Benchmark product",
+            "ingredients": [{"ingredient_id": pk, "quantity": "0.250"} for pk in f.ingredient_ids[:6]],
+        },
+        status=201,
+    ),
+    Case("product-detail", "get", lambda f, _=None: f"/api/products/{f.product_id}/"),
+    Case(
+        "product-update",
+        "patch",
+        lambda f, pk: f"/api/products/{pk}/",
+        body=lambda f, _=None: {"ingredients": [{"ingredient_id": pk, "quantity": "0.500"} for pk in f.ingredient_ids[:6]]},
+        setup=Fixture.scratch_product,
+    ),
+    Case(
+        "product-delete",
+        "delete",
+        lambda f, pk: f"/api/products/{pk}/",
+        status=204,
+        setup=Fixture.scratch_product,
+    ),
+    Case("product-costs", "get", _const("/api/products/costs/?batch_size=100")),
+    Case("product-cost", "get", lambda f, _=None: f"/api/products/{f.product_id}/cost/?batch_size=100"),
+    Case("product-sourcing", "get", _const("/api/products/sourcing/?batch_size=100")),
+]
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def _request(case: Case, fixture: Fixture, client: Client):
+    state = case.setup(fixture) if case.setup else None
+    kwargs = {"HTTP_AUTHORIZATION": f"Token {fixture.token}"}
+    if case.body is not None:
+        kwargs.update(data=case.body(fixture, state), content_type="application/json")
+    path = case.path(fixture, state)
+
+    def send():
+        response = getattr(client, case.method)(path, **kwargs)
+        if response.streaming:
+            b"".join(response.streaming_content)
+        if response.status_code != case.status:
+            raise AssertionError(f"{case.name}: expected HTTP {case.status}, got {response.status_code}")
+        return response
+
+    return send
+
+
+def run_case(case: Case, fixture: Fixture, client: Client, iterations: int) -> dict:
+    """Time ``iterations`` requests, then repeat one under tracemalloc.
+
+    Memory is traced in a separate request because tracemalloc slows
+    allocation-heavy code enough to distort the latency figures.
+    """
+    timings: list[float] = []
+    queries = 0
+    for _ in range(iterations):
+        send = _request(case, fixture, client)
+        # Counted like ProfilingMiddleware does, on every alias, so reads
+        # routed to a replica are counted too.
+        profile = RequestProfile()
+        token = activate(profile)
+        try:
+            track_queries()
+            started = time.perf_counter()
+            send()
+            timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            deactivate(token)
+        queries = max(queries, profile.queries)
+
+    send = _request(case, fixture, client)
+    tracemalloc.start()
+    try:
+        send()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(_percentile(timings, 0.95), 3),
+        "queries": queries,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run_concurrent_writes(fixture: Fixture, writers: int, iterations: int) -> dict:
+    """Create and confirm orders from ``writers`` threads at once.
+
+    Each thread has its own client and database connection, so requests
+    contend on the database's write locks the way concurrent workers do.
+    Failed requests are counted by error rather than aborting the run.
+    """
+    body = {"items": [{"ingredient_id": pk, "quantity": 1} for pk in fixture.ingredient_ids[:5]]}
+    headers = {"HTTP_AUTHORIZATION": f"Token {fixture.token}", "content_type": "application/json"}
+    start = threading.Barrier(writers + 1)
+    lock = threading.Lock()
+    timings: list[float] = []
+    errors: Counter[str] = Counter()
+
+    def send(client: Client, path: str, data: dict, expected: int):
+        started = time.perf_counter()
+        try:
+            response = client.post(path, data, **headers)
+            error = None if response.status_code == expected else f"HTTP {response.status_code}"
+        except Exception as exc:
+            response, error = None, f"{type(exc).__name__}: {exc}"
+        with lock:
+            timings.append((time.perf_counter() - started) * 1000)
+            if error:
+                errors[error] += 1
+        return None if error else response
+
+    def writer():
+        client = Client()
+        start.wait()
+        try:
+            for _ in range(iterations):
+                created = send(client, "/api/orders/", body, 201)
+                if created is not None:
+                    path = f"/api/orders/{created.json()['id']}/transition/"
+                    send(client, path, {"status": OrderStatus.CONFIRMED}, 200)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "writers": writers,
+        "requests": len(timings),
+        "errors": dict(errors),
+        "requests_per_s": round(len(timings) / elapsed, 1),
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(_percentile(timings, 0.95), 3),
+    }
+
+
+def server_paths(fixture: Fixture) -> list[str]:
+    """The async read endpoints, requested round-robin by ``run_server_load``."""
+    return [
+        "/api/buyers/me/",
+        "/api/suppliers/",
+        f"/api/suppliers/{fixture.supplier_id}/",
+        f"/api/suppliers/{fixture.supplier_id}/ingredients/",
+        "/api/ingredients/",
+        f"/api/orders/{fixture.order_id}/",
+        f"/api/products/{fixture.product_id}/",
+    ]
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class _PooledWSGIServer(WSGIServer):
+    """``wsgiref`` server that handles connections on a fixed thread pool,
+    the way a threaded WSGI worker (e.g. gunicorn ``gthread``) does."""
+
+    def __init__(self, *args, threads: int, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address) -> None:
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown()
+
+
+@contextmanager
+def serve_wsgi(threads: int) -> Iterator[int]:
+    """Serve the WSGI application on a free local port; yields the port."""
+    server = make_server(
+        "127.0.0.1",
+        0,
+        get_wsgi_application(),
+        server_class=partial(_PooledWSGIServer, threads=threads),
+        handler_class=_QuietHandler,
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server.server_port
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+@contextmanager
+def serve_asgi() -> Iterator[int]:
+    """Serve the ASGI application with uvicorn on a free local port; yields the port."""
+    import uvicorn
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(
+        uvicorn.Config(get_asgi_application(), interface="asgi3", lifespan="off", access_log=False, log_level="warning")
+    )
+    # Signal handlers are only installed from the main thread, so none are here.
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    try:
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError("uvicorn failed to start")
+            time.sleep(0.01)
+        yield sock.getsockname()[1]
+    finally:
+        server.should_exit = True
+        thread.join()
+        sock.close()
+
+
+async def _load(port: int, paths: list[str], token: str, clients: int, requests: int) -> dict:
+    timings: list[float] = []
+    errors: Counter[str] = Counter()
+    numbers = iter(range(requests))
+
+    async def client() -> None:
+        # One connection per request, so both servers do the same work.
+        for number in numbers:
+            path = paths[number % len(paths)]
+            started = time.perf_counter()
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(
+                    f"GET {path} HTTP/1.1\r\nHost: localhost\r\nAuthorization: Token {token}\r\n"
+                    "Connection: close\r\n\r\n".encode("ascii")
+                )
+                status_line = await reader.readline()
+                await reader.read()
+                writer.close()
+                status = status_line.split()[1].decode("ascii") if status_line else "no response"
+                error = None if status == "200" else f"HTTP {status}"
+            except OSError as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            timings.append((time.perf_counter() - started) * 1000)
+            if error:
+                errors[error] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    return {
+        "clients": clients,
+        "requests": len(timings),
+        "errors": dict(errors),
+        "requests_per_s": round(len(timings) / elapsed, 1),
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(_percentile(timings, 0.95), 3),
+    }
+
+
+def run_server_load(fixture: Fixture, clients: int, requests: int) -> dict[str, dict]:
+    """Drive the async read endpoints over HTTP under uvicorn and under WSGI.
+
+    ``clients`` concurrent connections issue ``requests`` GETs in total
+    against each server in turn, and the WSGI server gets one thread per
+    client. Servers and load generator share this process, so compare the
+    two results with each other rather than with production numbers.
+    """
+    paths = server_paths(fixture)
+    results = {}
+    for name, serve in (("asgi", serve_asgi), ("wsgi", partial(serve_wsgi, threads=clients))):
+        with serve() as port:
+            # One warm-up pass fills the catalogue and token caches.
+            asyncio.run(_load(port, paths, fixture.token, 1, len(paths)))
+            results[name] = asyncio.run(_load(port, paths, fixture.token, clients, requests))
+    return results
+
+
+def budget_for(result: dict) -> dict:
+    return {
+        "queries": result["queries"],
+        "p50_ms": max(LATENCY_FLOOR_MS, math.ceil(result["p50_ms"] * LATENCY_HEADROOM)),
+        "peak_kb": math.ceil(result["peak_kb"] * MEMORY_HEADROOM),
+    }
+
+
+def compare(results: dict[str, dict], budgets: dict[str, dict]) -> list[str]:
+    """Return one message per metric that exceeds its committed budget."""
+    failures = []
+    for name, result in results.items():
+        budget = budgets.get(name)
+        if budget is None:
+            continue
+        if "queries" in budget and result["queries"] > budget["queries"]:
+            failures.append(f"{name}: {result['queries']} queries > budget {budget['queries']}")
+        if "p50_ms" in budget and result["p50_ms"] > budget["p50_ms"]:
+            failures.append(f"{name}: p50 {result['p50_ms']} ms > budget {budget['p50_ms']} ms")
+        if "peak_kb" in budget and result["peak_kb"] > budget["peak_kb"]:
+            failures.append(f"{name}: peak {result['peak_kb']} KB > budget {budget['peak_kb']} KB")
+    return failures
@@ -0,0 +1,130 @@
+import time
+from contextlib import nullcontext
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from .routers import primary_reads
+
+CATALOGUE_CACHE = "catalogue"
+VERSION_KEY = "catalogue:version"
+CHANGED_AT_KEY = "catalogue:changed_at"
+
+
+def get_cache_version(key: str, alias: str = "default") -> int:
+    """Current value of a version counter used to namespace cache keys."""
+    cache = caches[alias]
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a wiped cache never re-issues an old version.
+        cache.add(key, time.time_ns() // 1000)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(key: str, alias: str = "default") -> None:
+    """Move a version counter on, orphaning every entry keyed by the old value."""
+    cache = caches[alias]
+    try:
+        cache.incr(key)
+    except ValueError:
+        get_cache_version(key, alias)
+
+
+def get_catalogue_version() -> int:
+    return get_cache_version(VERSION_KEY, CATALOGUE_CACHE)
+
+
+def bump_catalogue_version(**kwargs) -> None:
+    """Invalidate every cached catalogue response.
+
+    Connected to ``Supplier``/``Ingredient`` save and delete signals. Code
+    that writes catalogue rows with ``bulk_create``/``bulk_update``/``update``
+    must call it explicitly since those bypass signals.
+    """
+    bump_cache_version(VERSION_KEY, CATALOGUE_CACHE)
+    caches[CATALOGUE_CACHE].set(CHANGED_AT_KEY, time.time(), None)
+
+
+def catalogue_changed_within(seconds: float) -> bool:
+    changed_at = caches[CATALOGUE_CACHE].get(CHANGED_AT_KEY)
+    return changed_at is not None and time.time() - changed_at < seconds
+
+
+def to_plain(value: Any) -> Any:
+    """Strip DRF's ReturnDict/ReturnList wrappers so the data pickles cheaply."""
+    if isinstance(value, dict):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_plain(item) for item in value]
+    return value
+
+
+class CatalogueCacheMixin:
+    """Serve GETs from a cache keyed by the catalogue version.
+
+    The version doubles as the ETag, so a matching ``If-None-Match`` is
+    answered with 304 from a single cache lookup, and any other hit is a
+    dict lookup plus rendering. Must precede the generic view in the MRO.
+    """
+
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        etag, key, response = self._cached(request)
+        if response is None:
+            with self._filling():
+                response = super().get(request, *args, **kwargs)
+            response = self._store(key, etag, response)
+        return response
+
+    def _cached(self, request: Request) -> tuple[str, str, Response | None]:
+        """The ETag, the cache key and, if the cache can answer, the response."""
+        version = get_catalogue_version()
+        etag = f'"catalogue-{version}"'
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return etag, "", self._with_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+        key = f"catalogue:{version}:{request.get_full_path()}"
+        data = caches[CATALOGUE_CACHE].get(key)
+        return etag, key, None if data is None else self._with_validators(Response(data), etag)
+
+    def _filling(self):
+        # A lagging replica would cache pre-change rows under the new
+        # version until the next change, so fill from the primary while
+        # a change may still be replicating.
+        recent = catalogue_changed_within(settings.REPLICA_ROUTING["STICKY_SECONDS"])
+        return primary_reads() if recent else nullcontext()
+
+    def _store(self, key: str, etag: str, response: Response) -> Response:
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        data = to_plain(response.data)
+        caches[CATALOGUE_CACHE].set(key, data)
+        return self._with_validators(Response(data), etag)
+
+    def _with_validators(self, response: Response, etag: str) -> Response:
+        response["ETag"] = etag
+        # Per-user auth still applies, so only the client may reuse it.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class AsyncCatalogueCacheMixin(CatalogueCacheMixin):
+    """``CatalogueCacheMixin`` for views built on ``core.async_views``.
+
+    The catalogue cache is in-process or on local disk (see
+    ``CACHE_BACKENDS``), so it is read inline rather than through
+    a thread hop.
+    """
+
+    async def get(self, request: Request, *args, **kwargs) -> Response:
+        etag, key, response = self._cached(request)
+        if response is None:
+            with self._filling():
+                response = await super(CatalogueCacheMixin, self).get(request, *args, **kwargs)
+            response = self._store(key, etag, response)
+        return response
@@ -0,0 +1,111 @@
+import hashlib
+import json
+from collections.abc import Callable
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .cache import to_plain
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+# A first attempt that has not finished after this long is presumed dead
+# (e.g. the worker was killed) and may be taken over by a retry.
+IN_PROGRESS_TIMEOUT = timedelta(minutes=5)
+
+
+def request_fingerprint(request: Request) -> str:
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+def _claim(request: Request, key: str, fingerprint: str) -> IdempotencyKey | None:
+    """Insert the key row; return the existing row instead if another request owns it."""
+    now = timezone.now()
+    row = IdempotencyKey(
+        user=request.user,
+        key=key,
+        method=request.method,
+        path=request.path,
+        fingerprint=fingerprint,
+        created_at=now,
+        expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+    )
+    try:
+        with transaction.atomic():
+            row.save(force_insert=True)
+        return None
+    except IntegrityError:
+        pass
+
+    existing = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+    if existing is None:
+        # Purged between our insert and this read; try once more.
+        return _claim(request, key, fingerprint)
+    stale = (existing.status_code is None and existing.created_at < now - IN_PROGRESS_TIMEOUT) or existing.expires_at < now
+    # Conditional delete: of several retries racing to take over, one wins.
+    if stale and IdempotencyKey.objects.filter(pk=existing.pk, created_at=existing.created_at).delete()[0]:
+        return _claim(request, key, fingerprint)
+    return existing
+
+
+def run_idempotent(request: Request, handler: Callable[[], Response]) -> Response:
+    key = request.headers.get(HEADER)
+    if key is None:
+        return handler()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return Response(
+            {"detail": f"{HEADER} must be 1-{MAX_KEY_LENGTH} characters."}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    fingerprint = request_fingerprint(request)
+    existing = _claim(request, key, fingerprint)
+    if existing is not None:
+        if existing.fingerprint != fingerprint:
+            return Response(
+                {"detail": f"{HEADER} was already used for a different request."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if existing.status_code is None:
+            return Response(
+                {"detail": f"A request with this {HEADER} is still in progress."}, status=status.HTTP_409_CONFLICT
+            )
+        response = Response(existing.response, status=existing.status_code)
+        response[REPLAYED_HEADER] = "true"
+        return response
+
+    try:
+        response = handler()
+    except Exception:
+        IdempotencyKey.objects.filter(user=request.user, key=key).delete()
+        raise
+    if response.status_code >= 500:
+        # Server errors are not final; let the client's retry run again.
+        IdempotencyKey.objects.filter(user=request.user, key=key).delete()
+    else:
+        IdempotencyKey.objects.filter(user=request.user, key=key).update(
+            status_code=response.status_code, response=to_plain(response.data)
+        )
+    return response
+
+
+class IdempotentPostMixin:
+    """Honour an ``Idempotency-Key`` header on ``post``.
+
+    The first response (anything but a 5xx) is stored and replayed verbatim,
+    marked ``Idempotent-Replayed: true``, for later requests with the same
+    key; the view does not run again. Reusing a key for a different body
+    is rejected with 422, and a duplicate that arrives while the first is
+    still running gets 409. Must precede the view class in the MRO.
+    """
+
+    def post(self, request: Request, *args, **kwargs) -> Response:
+        return run_idempotent(request, lambda: super(IdempotentPostMixin, self).post(request, *args, **kwargs))
@@ -0,0 +1,143 @@
+import json
+import platform
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from core.benchmarks import CASES, Fixture, budget_for, compare, run_case, run_concurrent_writes, run_server_load
+from core.routers import replica_alias
+from core.synthetic import ScaleConfig, generate
+
+BUDGETS_PATH = Path(__file__).resolve().parents[2] / "bench_budgets.json"
+
+
+class Command(BaseCommand):
+    help = "Benchmark every API route against a synthetic dataset and check committed budgets"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--scale", type=int, default=1, help="Synthetic dataset scale (see seed --scale)")
+        parser.add_argument("--iterations", type=int, default=20, help="Requests per route")
+        parser.add_argument("--case", action="append", dest="cases", help="Only run the named case (repeatable)")
+        parser.add_argument("--budgets", default=str(BUDGETS_PATH), help="Budgets file to compare against")
+        parser.add_argument("--report", help="Write a JSON report of the run to this path")
+        parser.add_argument("--writers", type=int, default=0, help="Also measure throughput with this many concurrent writers")
+        parser.add_argument("--writer-iterations", type=int, default=25, help="Orders each writer creates and confirms")
+        parser.add_argument("--server-clients", type=int, default=0, help="Also compare uvicorn and WSGI with this many concurrent clients")
+        parser.add_argument("--server-requests", type=int, default=2000, help="Requests sent to each server")
+        parser.add_argument("--update-budgets", action="store_true", help="Rewrite budgets from this run's results, with headroom")
+
+    def handle(self, *args, **kwargs) -> None:
+        cases = CASES
+        if kwargs["cases"]:
+            unknown = set(kwargs["cases"]) - {case.name for case in CASES}
+            if unknown:
+                raise CommandError(f"Unknown cases: {', '.join(sorted(unknown))}.")
+            cases = [case for case in CASES if case.name in kwargs["cases"]]
+
+        # Never touch the configured database: build a throwaway test one.
+        setup_test_environment()
+        # Queries are counted here; ProfilingMiddleware's own profile would hide them.
+        no_profiling = override_settings(REQUEST_PROFILING={**settings.REQUEST_PROFILING, "ENABLED": False})
+        no_profiling.enable()
+        old_name = connection.settings_dict["NAME"]
+        writers = kwargs["writers"]
+        server_clients = kwargs["server_clients"]
+        scratch_dir = None
+        if (writers or server_clients) and connection.vendor == "sqlite" and not connection.settings_dict["TEST"]["NAME"]:
+            # The default in-memory test database has no WAL and locks per
+            # table, which says nothing about a real deployment.
+            scratch_dir = tempfile.mkdtemp()
+            connection.settings_dict["TEST"]["NAME"] = str(Path(scratch_dir) / "bench.sqlite3")
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        if replica_alias():
+            connections[replica_alias()].creation.set_as_test_mirror(connection.settings_dict)
+        concurrency = None
+        server_load = None
+        try:
+            for cache in caches.all():
+                cache.clear()
+            self.stdout.write(f"Generating scale {kwargs['scale']} dataset...")
+            counts = generate(ScaleConfig.for_scale(kwargs["scale"]))
+            fixture = Fixture.load()
+            client = Client()
+            # Cache the token first, so whichever case runs first doesn't pay
+            # the one-off authentication lookup and budgets hold with --case.
+            client.get("/api/buyers/me/", HTTP_AUTHORIZATION=f"Token {fixture.token}")
+            results = {}
+            for case in cases:
+                results[case.name] = run_case(case, fixture, client, kwargs["iterations"])
+                row = results[case.name]
+                self.stdout.write(
+                    f"  {case.name:<24} p50 {row['p50_ms']:>9.2f} ms  p95 {row['p95_ms']:>9.2f} ms"
+                    f"  {row['queries']:>3} queries  {row['peak_kb']:>9.1f} KB"
+                )
+            if writers:
+                concurrency = run_concurrent_writes(fixture, writers, kwargs["writer_iterations"])
+                self.stdout.write(
+                    f"  {writers} concurrent writers ({connection.vendor}): {concurrency['requests_per_s']} req/s,"
+                    f" p50 {concurrency['p50_ms']:.2f} ms, p95 {concurrency['p95_ms']:.2f} ms,"
+                    f" {sum(concurrency['errors'].values())} errors"
+                )
+            if server_clients:
+                server_load = run_server_load(fixture, server_clients, kwargs["server_requests"])
+                for server, row in server_load.items():
+                    self.stdout.write(
+                        f"  {server} with {server_clients} clients: {row['requests_per_s']} req/s,"
+                        f" p50 {row['p50_ms']:.2f} ms, p95 {row['p95_ms']:.2f} ms,"
+                        f" {sum(row['errors'].values())} errors"
+                    )
+        except AssertionError as exc:
+            raise CommandError(str(exc))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            no_profiling.disable()
+            teardown_test_environment()
+            if scratch_dir:
+                shutil.rmtree(scratch_dir, ignore_errors=True)
+
+        budgets_path = Path(kwargs["budgets"])
+        if kwargs["report"]:
+            report = {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "scale": kwargs["scale"],
+                "iterations": kwargs["iterations"],
+                "dataset": counts,
+                "results": results,
+                "concurrent_writes": concurrency,
+                "server_load": server_load,
+            }
+            Path(kwargs["report"]).write_text(json.dumps(report, indent=2) + "\n")
+            self.stdout.write(f"Report written to {kwargs['report']}")
+
+        if concurrency and concurrency["errors"]:
+            failed = "\n  ".join(f"{count} x {error}" for error, count in concurrency["errors"].items())
+            raise CommandError(f"Concurrent writes failed:\n  {failed}")
+        for server, row in (server_load or {}).items():
+            if row["errors"]:
+                failed = "\n  ".join(f"{count} x {error}" for error, count in row["errors"].items())
+                raise CommandError(f"Requests to {server} failed:\n  {failed}")
+
+        if kwargs["update_budgets"]:
+            budgets = json.loads(budgets_path.read_text()) if budgets_path.exists() else {}
+            budgets.update({name: budget_for(row) for name, row in results.items()})
+            budgets_path.write_text(json.dumps(dict(sorted(budgets.items())), indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Budgets updated in {budgets_path}"))
+            return
+
+        if not budgets_path.exists():
+            raise CommandError(f"No budgets file at {budgets_path}; run with --update-budgets first.")
+        failures = compare(results, json.loads(budgets_path.read_text()))
+        if failures:
+            raise CommandError("Benchmark budgets exceeded:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS(f"All {len(results)} routes within budget."))
@@ -0,0 +1,55 @@
+import sys
+from contextlib import nullcontext
+from django.core.management.base import BaseCommand, CommandError
+from ingredients.importer import (
+    BATCH_SIZE,
+    PRICE_LIST_FORMATS,
+    READERS,
+    PriceListFileError,
+    decode_lines,
+    format_for_filename,
+    import_price_list,
+)
+from suppliers.models import Supplier
+
+
+class Command(BaseCommand):
+    help = "Create or reprice a supplier's ingredients from a CSV or NDJSON price list"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("supplier", type=int, help="Supplier id")
+        parser.add_argument("path", help="Price list file, or - for stdin")
+        parser.add_argument("--format", choices=PRICE_LIST_FORMATS, help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows written per bulk statement")
+        parser.add_argument("--dry-run", action="store_true", help="Report the changes without writing them")
+
+    def handle(self, *args, **kwargs) -> None:
+        try:
+            supplier = Supplier.objects.get(pk=kwargs["supplier"])
+        except Supplier.DoesNotExist:
+            raise CommandError(f"Supplier {kwargs['supplier']} does not exist.")
+        path = kwargs["path"]
+        file_format = kwargs["format"] or format_for_filename(path)
+        if file_format is None:
+            raise CommandError("Can't tell the format from the file name; pass --format.")
+
+        with nullcontext(sys.stdin.buffer) if path == "-" else open(path, "rb") as stream:
+            try:
+                summary = import_price_list(
+                    supplier,
+                    READERS[file_format](decode_lines(stream)),
+                    dry_run=kwargs["dry_run"],
+                    batch_size=kwargs["batch_size"],
+                )
+            except PriceListFileError as exc:
+                raise CommandError(f"{exc} Nothing was imported.")
+
+        for error in summary.errors:
+            self.stderr.write(f"line {error['line']}: {error['detail']}")
+        if summary.error_count > len(summary.errors):
+            self.stderr.write(f"... and {summary.error_count - len(summary.errors)} more errors")
+        verb = "Would import" if kwargs["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {summary.rows} rows for {supplier.name}: {summary.created} created, "
+            f"{summary.updated} updated, {summary.unchanged} unchanged, {summary.error_count} errors."
+        ))
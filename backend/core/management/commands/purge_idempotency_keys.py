@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete expired idempotency keys in small batches (run periodically, e.g. hourly from cron)"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per statement")
+
+    def handle(self, *args, **kwargs) -> None:
+        batch_size = kwargs["batch_size"]
+        now = timezone.now()
+        expired = IdempotencyKey.objects.filter(expires_at__lt=now).order_by("expires_at")
+        purged = 0
+        # Short deletes keep each write lock brief; the expires_at index
+        # makes finding every batch cheap.
+        while True:
+            ids = list(expired.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            purged += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} expired idempotency keys."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from orders.spend import rebuild_spend_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily spend rollup from order lines (after bulk imports, or to compact emptied buckets)"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--buyer", type=int, help="Only rebuild this buyer's rows")
+
+    def handle(self, *args, **kwargs) -> None:
+        buckets = rebuild_spend_rollups(kwargs["buyer"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} spend buckets."))
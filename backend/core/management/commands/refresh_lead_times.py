@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from orders.events import refresh_lead_times
+
+
+class Command(BaseCommand):
+    help = "Fold order events recorded since the last run into the lead-time rollup (run periodically)"
+
+    def handle(self, *args, **kwargs) -> None:
+        folded = refresh_lead_times()
+        self.stdout.write(self.style.SUCCESS(f"Folded {folded} order events into lead times."))
@@ -1,10 +1,12 @@
 from django.contrib.auth.models import User
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from buyers.models import Buyer
 from ingredients.models import Ingredient
 from orders.models import Order, OrderItem, OrderStatus
+from orders.spend import record_created
 from products.models import Product, ProductIngredient
 from suppliers.models import Supplier
+from core.synthetic import ScaleConfig, generate, synthetic_data_exists
 
 
 SUPPLIERS = [
@@ -55,9 +57,23 @@ DEMO_COMPANY = "Demo Buying Co."
 
 
 class Command(BaseCommand):
-    help = "Seed the database with demo data (idempotent)"
+    help = "Seed the database with demo data (idempotent), or with --scale N a large synthetic dataset"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--scale", type=int, help="Generate synthetic data; scale 1 is ~1k orders, counts grow linearly")
+        parser.add_argument("--buyers", type=int, help="Override the number of synthetic buyers")
+        parser.add_argument("--suppliers", type=int, help="Override the number of synthetic suppliers")
+        parser.add_argument("--ingredients-per-supplier", type=int, help="Override catalogue depth (default 50)")
+        parser.add_argument("--products-per-buyer", type=int, help="Override products per buyer (default 20)")
+        parser.add_argument("--orders", type=int, help="Override the total number of synthetic orders")
+        parser.add_argument("--seed", type=int, default=42, help="RNG seed; the same seed reproduces the same data")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per bulk insert")
 
     def handle(self, *args, **kwargs) -> None:
+        if kwargs["scale"] is not None:
+            self._seed_scale(**kwargs)
+            return
+
         self.stdout.write("Seeding database...")
 
         # --- Buyer ---
@@ -176,6 +192,29 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS("Seed complete."))
 
+    def _seed_scale(self, scale: int, seed: int, batch_size: int, **kwargs) -> None:
+        if scale < 1:
+            raise CommandError("--scale must be at least 1.")
+        if synthetic_data_exists():
+            raise CommandError("Synthetic data is already loaded; start from an empty database to keep runs reproducible.")
+        config = ScaleConfig.for_scale(
+            scale,
+            buyers=kwargs.get("buyers"),
+            suppliers=kwargs.get("suppliers"),
+            ingredients_per_supplier=kwargs.get("ingredients_per_supplier"),
+            products_per_buyer=kwargs.get("products_per_buyer"),
+            orders=kwargs.get("orders"),
+            seed=seed,
+            batch_size=batch_size,
+        )
+        if min(config.buyers, config.suppliers, config.ingredients_per_supplier) < 1:
+            raise CommandError("Buyers, suppliers and ingredients per supplier must all be at least 1.")
+
+        self.stdout.write(f"Generating synthetic data (scale {scale}, seed {seed})...")
+        counts = generate(config, log=self.stdout.write)
+        summary = ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Seed complete: {summary}."))
+
     def _create_product(
         self,
         buyer: Buyer,
@@ -198,11 +237,14 @@ class Command(BaseCommand):
         items: list[tuple[Ingredient, int]],
     ) -> Order:
         order = Order.objects.create(buyer=buyer)
-        for ingredient, quantity in items:
+        lines = [
             OrderItem.objects.create(
                 order=order,
                 ingredient=ingredient,
                 quantity=quantity,
                 unit_price=ingredient.price_per_unit,
             )
+            for ingredient, quantity in items
+        ]
+        record_created([order], lines)
         return order
@@ -0,0 +1,164 @@
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from .profiling import (
+    RequestProfile,
+    activate,
+    deactivate,
+    install_query_timing,
+    install_serializer_timing,
+    track_queries,
+)
+
+logger = logging.getLogger("core.profiling")
+
+
+class ProfilingMiddleware:
+    """Record query count, DB, serializer and view time for sampled requests.
+
+    Configured by ``settings.REQUEST_PROFILING``. When disabled Django drops
+    the middleware at startup, so it costs nothing. Sampled responses carry a
+    ``Server-Timing`` header and produce one JSON log line on
+    ``core.profiling``; statements repeated ``DUPLICATE_THRESHOLD`` or more
+    times are listed as likely N+1 patterns. Keep it first in ``MIDDLEWARE``
+    so ``total`` covers the whole stack. Runs natively under both WSGI and
+    ASGI, like ``ReplicaRoutingMiddleware``.
+
+    A streaming response's body is produced after the middleware returns, so
+    its profile stays active until the body has been consumed, and the log
+    line is written then. Its ``Server-Timing`` header has already been sent
+    by that point and only covers the work done before the body.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        config = settings.REQUEST_PROFILING
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = config["SAMPLE_RATE"]
+        self.duplicate_threshold = config["DUPLICATE_THRESHOLD"]
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            # Django would otherwise run the sync hook through a thread hop.
+            self.process_view = self._aprocess_view
+        install_query_timing()
+        install_serializer_timing()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if self._skip():
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        request._profile = profile
+        token = activate(profile)
+        try:
+            track_queries()
+            response = self.get_response(request)
+        finally:
+            deactivate(token)
+        return self._finish(request, response, profile)
+
+    async def __acall__(self, request):
+        if self._skip():
+            return await self.get_response(request)
+
+        profile = RequestProfile()
+        request._profile = profile
+        token = activate(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            deactivate(token)
+        return self._finish(request, response, profile)
+
+    def process_view(self, request, view_func, view_args, view_kwargs) -> None:
+        self._start_view(request)
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs) -> None:
+        self._start_view(request)
+
+    def _start_view(self, request) -> None:
+        if hasattr(request, "_profile"):
+            request._profile_view_started = time.perf_counter()
+
+    def _skip(self) -> bool:
+        return self.sample_rate < 1 and random.random() >= self.sample_rate
+
+    def _finish(self, request, response, profile: RequestProfile):
+        if hasattr(request, "_profile_view_started"):
+            profile.view_seconds = time.perf_counter() - request._profile_view_started
+        self._set_server_timing(response, profile)
+        if response.streaming:
+            wrap = self._aprofiled if response.is_async else self._profiled
+            response.streaming_content = wrap(response.streaming_content, request, response, profile)
+        else:
+            self._log(request, response, profile)
+        return response
+
+    def _profiled(self, content, request, response, profile: RequestProfile):
+        chunks = iter(content)
+        try:
+            while True:
+                token = activate(profile)
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    break
+                finally:
+                    deactivate(token)
+                yield chunk
+        finally:
+            self._log(request, response, profile)
+
+    async def _aprofiled(self, content, request, response, profile: RequestProfile):
+        chunks = aiter(content)
+        try:
+            while True:
+                token = activate(profile)
+                try:
+                    chunk = await anext(chunks)
+                except StopAsyncIteration:
+                    break
+                finally:
+                    deactivate(token)
+                yield chunk
+        finally:
+            self._log(request, response, profile)
+
+    def _set_server_timing(self, response, profile: RequestProfile) -> None:
+        duplicates = profile.duplicates(self.duplicate_threshold)
+        metrics = [
+            f'db;dur={profile.db_seconds * 1000:.2f};desc="{profile.queries} queries"',
+            f"serialize;dur={profile.serializer_seconds * 1000:.2f}",
+            f"view;dur={profile.view_seconds * 1000:.2f}",
+            f"total;dur={profile.total_seconds * 1000:.2f}",
+        ]
+        if duplicates:
+            metrics.append(f'dup;desc="{len(duplicates)} repeated statements"')
+        response["Server-Timing"] = ", ".join(metrics)
+
+    def _log(self, request, response, profile: RequestProfile) -> None:
+        duplicates = profile.duplicates(self.duplicate_threshold)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": profile.queries,
+            "db_ms": round(profile.db_seconds * 1000, 2),
+            "serializer_ms": round(profile.serializer_seconds * 1000, 2),
+            "view_ms": round(profile.view_seconds * 1000, 2),
+            "total_ms": round(profile.total_seconds * 1000, 2),
+            "duplicates": [{"count": count, "sql": sql[:300]} for sql, count in duplicates],
+        }
+        logger.log(logging.WARNING if duplicates else logging.INFO, json.dumps(record))
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+from buyers.models import Buyer
+
+
+class Tombstone(models.Model):
+    """Record of a deleted row, so delta-sync clients can drop it too.
+
+    ``key`` identifies the row the way the API exposes it (e.g.
+    ``{"id": 5}`` or ``{"product_id": 5, "ingredient_id": 9}``). Rows owned
+    by a buyer carry ``buyer``; shared catalogue rows leave it empty.
+    """
+
+    model = models.CharField(max_length=100)
+    key = models.JSONField()
+    buyer = models.ForeignKey(Buyer, null=True, blank=True, on_delete=models.CASCADE, related_name="+")
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["buyer", "model", "deleted_at", "id"], name="tombstone_sync_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.model} {self.key} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a POST sent with an ``Idempotency-Key`` header.
+
+    ``status_code`` is empty while the first request is still running.
+    Concurrent duplicates are resolved by the unique constraint, not locks.
+    Rows past ``expires_at`` are removed by ``purge_idempotency_keys``.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    key = models.CharField(max_length=255)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "key"], name="idempotency_user_key_uniq")]
+        indexes = [models.Index(fields=["expires_at"], name="idempotency_expires_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.path} [{self.key}]"
@@ -0,0 +1,147 @@
+import json
+from base64 import b64decode, b64encode
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+from urllib import parse
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a stable ``(created_at, id)`` ordering.
+
+    Each cursor encodes the boundary row's ``(created_at, id)`` pair and a
+    direction, so every page is a single indexed range scan with ``LIMIT`` —
+    page 1,000 costs the same as page 1. Cursors are opaque to clients.
+
+    Views may set ``keyset_ordering`` to page over a different
+    ``(value, id)`` pair, e.g. a search rank annotation.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = api_settings.PAGE_SIZE or 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view=None) -> list:
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request)
+        ordering = getattr(view, "keyset_ordering", self.ordering)
+        descending = ordering[0].startswith("-")
+        self.position_field = ordering[0].lstrip("-")
+        reverse = self.cursor is not None and self.cursor[0]
+
+        # Walking backwards means scanning the index in the opposite order.
+        order_desc = descending != reverse
+        prefix = "-" if order_desc else ""
+        queryset = queryset.order_by(f"{prefix}{self.position_field}", f"{prefix}id")
+
+        if self.cursor is not None:
+            _, position, pk = self.cursor
+            lookup = "lt" if order_desc else "gt"
+            try:
+                queryset = queryset.filter(
+                    Q(**{f"{self.position_field}__{lookup}": position})
+                    | Q(**{self.position_field: position, f"id__{lookup}": pk})
+                )
+            except DjangoValidationError:
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        page = rows[: self.page_size]
+        if reverse:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data) -> Response:
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request: Request) -> int:
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            size = int(raw)
+        except ValueError:
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(False, self.page[-1])
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Ran past the end; step back from wherever the cursor pointed.
+            _, position, pk = self.cursor
+            return self._build_link(True, position, pk)
+        return self.encode_cursor(True, self.page[0])
+
+    def encode_cursor(self, reverse: bool, row) -> str:
+        return self._build_link(reverse, getattr(row, self.position_field), row.pk)
+
+    def _build_link(self, reverse: bool, position: Any, pk: int) -> str:
+        # Full-precision strings; the ORM parses them back on filtering.
+        if isinstance(position, datetime):
+            position = position.isoformat()
+        elif isinstance(position, Decimal):
+            position = str(position)
+        querystring = parse.urlencode({"r": int(reverse), "p": json.dumps(position), "i": pk})
+        encoded = b64encode(querystring.encode("ascii")).decode("ascii")
+        url = replace_query_param(self.base_url, self.cursor_query_param, encoded)
+        if self.page_size != type(self).page_size:
+            url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        else:
+            url = remove_query_param(url, self.page_size_query_param)
+        return url
+
+    def decode_cursor(self, request: Request) -> tuple[bool, Any, int] | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            tokens = parse.parse_qs(b64decode(encoded.encode("ascii")).decode("ascii"), keep_blank_values=True)
+            reverse = bool(int(tokens["r"][0]))
+            position = json.loads(tokens["p"][0])
+            pk = int(tokens["i"][0])
+        except (TypeError, ValueError, KeyError, IndexError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, (str, int, float)):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position, pk
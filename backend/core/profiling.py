@@ -0,0 +1,134 @@
+"""Per-request SQL, serializer and view timing used by ``ProfilingMiddleware``.
+
+A ``RequestProfile`` is bound to a context variable for the lifetime of a
+sampled request. Context variables follow ``sync_to_async`` onto other
+threads, so both timings below see it wherever the request's work runs.
+Database time comes from an execute wrapper kept on every connection;
+serializer time from a wrapper around ``BaseSerializer.data``. Both are
+only installed when profiling is enabled and cost one context-variable
+lookup for unsampled requests.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+_active: ContextVar["RequestProfile | None"] = ContextVar("request_profile", default=None)
+
+# Collapses literal values so queries differing only in inlined ids group together.
+_LITERALS = re.compile(r"\b\d+\b|'(?:[^']|'')*'")
+
+
+def normalize_sql(sql: str) -> str:
+    return _LITERALS.sub("?", sql)
+
+
+@dataclass
+class RequestProfile:
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    db_seconds: float = 0.0
+    serializer_seconds: float = 0.0
+    view_seconds: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    _serializer_depth: int = 0
+    # gather_reads records from worker threads alongside the request's.
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            statement = normalize_sql(sql)
+            with self._lock:
+                self.db_seconds += elapsed
+                self.queries += 1
+                self.statements[statement] += 1
+
+    def duplicates(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements run at least ``threshold`` times: the N+1 signature."""
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+    @property
+    def total_seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+
+def current_profile() -> RequestProfile | None:
+    return _active.get()
+
+
+def activate(profile: RequestProfile):
+    return _active.set(profile)
+
+
+def deactivate(token) -> None:
+    _active.reset(token)
+
+
+def _record_active_query(execute, sql, params, many, context):
+    profile = _active.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile.record_query(execute, sql, params, many, context)
+
+
+def _track(connection) -> None:
+    if _record_active_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_active_query)
+
+
+def _track_new_connection(sender, connection, **kwargs) -> None:
+    _track(connection)
+
+
+def track_queries() -> None:
+    """Count queries on this thread's connections towards the active profile."""
+    for connection in connections.all():
+        _track(connection)
+
+
+def install_query_timing() -> None:
+    """Count queries on every connection towards the active profile.
+
+    Covers the current thread's connections and any opened afterwards, on
+    whichever thread runs them. Connections another thread opened earlier
+    are covered once that thread calls ``track_queries``.
+    """
+    connection_created.connect(_track_new_connection, dispatch_uid="core.profiling.track_queries")
+    track_queries()
+
+
+def install_serializer_timing() -> None:
+    """Wrap ``BaseSerializer.data`` so sampled requests accumulate its cost.
+
+    Nested ``.data`` accesses are only counted once, at the outermost call.
+    """
+    original = serializers.BaseSerializer.data
+    if getattr(original.fget, "_profiled", False):
+        return
+
+    def data(self):
+        profile = _active.get()
+        if profile is None:
+            return original.fget(self)
+        profile._serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            profile._serializer_depth -= 1
+            if profile._serializer_depth == 0:
+                profile.serializer_seconds += time.perf_counter() - started
+
+    data._profiled = True
+    # Serializer and ListSerializer override ``data`` and defer to super().
+    serializers.BaseSerializer.data = property(data)
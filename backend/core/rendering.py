@@ -0,0 +1,211 @@
+"""Fast-path rendering for large list responses.
+
+A ``ModelSerializer`` builds every row as a model instance and then walks its
+fields one by one. Most of that time goes on Python overhead, not the
+database. ``FastListMixin`` lets a list view skip both steps without
+changing a byte of its output:
+
+* ``RowFormat`` compiles the view's serializer once into a ``values_list``
+  projection and one converter per field. Each row comes back as a tuple
+  and becomes a dict with the same keys, in the same order, as the
+  serializer would produce.
+* ``FastJSONRenderer`` encodes the result with orjson. Its bytes match
+  DRF's compact ``JSONRenderer`` for the data these views return.
+
+Only flat serializers compile: plain model fields, annotations and
+``source="fk.field"`` lookups. Nested serializers and
+``SerializerMethodField`` need instances, and compiling them raises
+``ImproperlyConfigured``.
+"""
+from decimal import Context, Decimal
+from functools import cache
+from typing import Any, Callable
+
+import orjson
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import QuerySet
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+# Fields whose to_representation returns database values unchanged.
+# CharField calls str(), which is a no-op for a text column.
+_UNCHANGED = (
+    serializers.CharField.to_representation,
+    serializers.IntegerField.to_representation,
+    serializers.ReadOnlyField.to_representation,
+)
+
+# Datetimes, dates and times go to DRF's encoder, which spells UTC as "Z".
+# orjson writes "+00:00".
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+_encode_default = JSONEncoder().default
+
+
+def dumps(data: Any) -> bytes:
+    """Encode ``data`` as DRF's compact ``JSONRenderer`` would, but with orjson."""
+    content = orjson.dumps(data, default=_encode_default, option=_OPTIONS)
+    # JSONRenderer escapes these two so the output is also valid JavaScript.
+    if b"\xe2\x80\xa8" in content or b"\xe2\x80\xa9" in content:
+        content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+    return content
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` that encodes with orjson when the output would be identical.
+
+    Indented output (``Accept: application/json; indent=4``) and
+    non-default ``COMPACT_JSON``/``UNICODE_JSON`` settings fall back to
+    ``JSONRenderer``. So does anything orjson rejects, such as non-string
+    keys or integers beyond 64 bits. orjson writes floats in exponent
+    form differently (``1e-5``, not ``1e-05``) and writes NaN as ``null``.
+    Views using this renderer shouldn't return floats.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if (
+            data is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return dumps(data)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+def _decimal_converter(field: serializers.DecimalField) -> Callable[[Any], str]:
+    # DecimalField.to_representation with its context and exponent built once.
+    if field.decimal_places is None:
+        return field.to_representation
+    exponent = Decimal(".1") ** field.decimal_places
+    context = Context(prec=field.max_digits) if field.max_digits is not None else None
+    rounding = field.rounding
+    to_representation = field.to_representation
+
+    def convert(value):
+        if type(value) is not Decimal:
+            return to_representation(value)
+        return "{:f}".format(value.quantize(exponent, rounding=rounding, context=context))
+
+    return convert
+
+
+def _converter(field: serializers.Field) -> Callable[[Any], Any] | None:
+    """The function applied to a non-null value of ``field``, or None if it passes through."""
+    if getattr(field.to_representation, "__func__", None) in _UNCHANGED:
+        return None
+    if (
+        type(field) is serializers.DecimalField
+        and getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+        and not field.localize
+        and not field.normalize_output
+    ):
+        return _decimal_converter(field)
+    return field.to_representation
+
+
+class RowFormat:
+    """A flat serializer compiled into a ``values_list`` projection.
+
+    ``values(queryset, *extra)`` selects the serializer's sources, plus any
+    ``extra`` fields the view reads itself. Rows are named tuples, so
+    ``row.pk`` works as it does on an instance. ``render(rows)`` turns those
+    rows into the dicts the serializer would return.
+    """
+
+    def __init__(self, serializer: serializers.Serializer):
+        self.keys: list[str] = []
+        self.paths: list[str] = []
+        self.converters: list[tuple[int, Callable]] = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if (
+                isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField,
+                                   RelatedField, ManyRelatedField))
+                or field.source == "*"
+            ):
+                raise ImproperlyConfigured(
+                    f"{type(serializer).__name__}.{name} can't be rendered from a values row."
+                )
+            converter = _converter(field)
+            if converter is not None:
+                self.converters.append((len(self.keys), converter))
+            self.keys.append(name)
+            self.paths.append("__".join(field.source_attrs))
+
+    def values(self, queryset: QuerySet, *extra: str) -> QuerySet:
+        extra_paths = [path for path in dict.fromkeys(extra) if path not in self.paths]
+        return queryset.values_list(*self.paths, *extra_paths, named=True)
+
+    def render(self, rows) -> list[dict]:
+        keys, converters = self.keys, self.converters
+        if not converters:
+            # zip stops at the last key, dropping the extra fields.
+            return [dict(zip(keys, row)) for row in rows]
+        rendered = []
+        for row in rows:
+            values = list(row)
+            for index, convert in converters:
+                value = values[index]
+                if value is not None:
+                    values[index] = convert(value)
+            rendered.append(dict(zip(keys, values)))
+        return rendered
+
+
+@cache
+def row_format(serializer_class: type[serializers.Serializer]) -> RowFormat:
+    return RowFormat(serializer_class())
+
+
+class RowListSerializer(serializers.BaseSerializer):
+    """Read-only stand-in for ``serializer_class(rows, many=True)`` over values rows."""
+
+    def __init__(self, instance, row_format: RowFormat, **kwargs):
+        self.row_format = row_format
+        super().__init__(instance, **kwargs)
+
+    def to_representation(self, rows) -> list[dict]:
+        return self.row_format.render(rows)
+
+
+class FastListMixin:
+    """Render a list view's rows from ``values_list`` tuples with orjson.
+
+    The view's ``serializer_class`` is compiled into a ``RowFormat``, so
+    the response matches what that serializer would return.
+    ``filter_queryset``, which list handlers and ``ChangesView`` call before
+    slicing, turns the queryset into named tuples. Views that read other
+    attributes from rows name them in ``row_fields``. Single-object
+    requests, such as ``create`` responses, are unchanged. Must precede the
+    generic view in the MRO.
+    """
+
+    def get_row_format(self) -> RowFormat:
+        return row_format(self.get_serializer_class())
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        queryset = super().filter_queryset(queryset)
+        extra = ["pk", *getattr(self, "row_fields", ())]
+        if self.paginator is not None and hasattr(self.paginator, "ordering"):
+            # KeysetPagination reads the position field off each page's ends.
+            extra.append(getattr(self, "keyset_ordering", self.paginator.ordering)[0].lstrip("-"))
+        return self.get_row_format().values(queryset, *extra)
+
+    def get_serializer(self, *args, **kwargs):
+        if not kwargs.pop("many", False):
+            return super().get_serializer(*args, **kwargs)
+        kwargs.setdefault("context", self.get_serializer_context())
+        return RowListSerializer(*args, row_format=self.get_row_format(), **kwargs)
+
+    def get_renderers(self) -> list:
+        return [
+            FastJSONRenderer() if type(renderer) is JSONRenderer else renderer
+            for renderer in super().get_renderers()
+        ]
@@ -0,0 +1,143 @@
+"""Read-replica routing for read-only API views.
+
+``ReplicaRoutingMiddleware`` gives every request a ``RoutingState``. Views
+that opt in with ``ReplicaReadMixin`` flip it to replica reads for safe
+methods once the user is authenticated, and ``ReplicaRouter`` sends reads
+there. Every other read, and every write, goes to the primary. A request
+that writes pins its user to the primary for ``STICKY_SECONDS``, so their
+next GETs see their own writes despite replication lag.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+
+@dataclass
+class RoutingState:
+    replica_reads: bool = False
+    wrote: bool = False
+
+
+_state: ContextVar[RoutingState | None] = ContextVar("replica_routing", default=None)
+
+
+def replica_alias() -> str | None:
+    """The configured replica alias, or ``None`` if no replica is set up."""
+    alias = settings.REPLICA_ROUTING["ALIAS"]
+    return alias if alias in settings.DATABASES else None
+
+
+def _pin_key(user_id: int) -> str:
+    return f"replica-pin:{user_id}"
+
+
+def pin_to_primary(user_id: int) -> None:
+    config = settings.REPLICA_ROUTING
+    caches[config["CACHE"]].set(_pin_key(user_id), True, config["STICKY_SECONDS"])
+
+
+def is_pinned(user_id: int) -> bool:
+    return caches[settings.REPLICA_ROUTING["CACHE"]].get(_pin_key(user_id), False)
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, even in a replica-routed view."""
+    state = _state.get()
+    if state is None or not state.replica_reads:
+        yield
+        return
+    state.replica_reads = False
+    try:
+        yield
+    finally:
+        state.replica_reads = True
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints) -> str:
+        state = _state.get()
+        if state is not None and state.replica_reads:
+            return replica_alias() or DEFAULT_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints) -> str:
+        # Explicit, so rows read from the replica are never saved back to it.
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # Both aliases hold the same data.
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """Track writes per request and pin the writing user to the primary.
+
+    Removed at startup when no replica database is configured. Runs natively
+    under both WSGI and ASGI, so it never forces async views onto a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        if replica_alias() is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        self._pin_writer(request, state)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        self._pin_writer(request, state)
+        return response
+
+    def _pin_writer(self, request, state: RoutingState) -> None:
+        # DRF copies the authenticated user back onto the Django request.
+        user = getattr(request, "user", None)
+        if state.wrote and user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
+
+
+class ReplicaReadMixin:
+    """Serve safe-method requests from the read replica.
+
+    Authentication and permission checks run on the primary first, so a
+    freshly issued token is always found. Users who wrote within the last
+    ``STICKY_SECONDS`` stay on the primary. Must precede the view class in
+    the MRO.
+    """
+
+    def initial(self, request, *args, **kwargs) -> None:
+        super().initial(request, *args, **kwargs)
+        state = _state.get()
+        if state is not None and request.method in SAFE_METHODS and not is_pinned(request.user.pk):
+            state.replica_reads = True
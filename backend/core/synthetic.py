@@ -0,0 +1,315 @@
+"""Deterministic large-scale fixture generator behind ``seed --scale``.
+
+Everything is derived from one ``random.Random(seed)`` and a fixed epoch, so
+two runs against empty databases produce identical rows. All writes go
+through ``bulk_create`` in batches; nothing is held in memory beyond the
+catalogue and one batch of orders.
+"""
+import random
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import models, transaction
+
+from buyers.models import Buyer
+from core.cache import bump_catalogue_version
+from ingredients.models import Ingredient, IngredientGroup
+from ingredients.prices import record_prices
+from orders.events import refresh_lead_times
+from orders.models import Order, OrderEvent, OrderItem, OrderStatus
+from orders.spend import rebuild_spend_rollups
+from products.models import Product, ProductIngredient
+from suppliers.models import Supplier
+
+USERNAME_PREFIX = "synthetic-buyer-"
+PASSWORD = "demo1234"
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+HISTORY_DAYS = 730
+
+SUPPLIER_WORDS = [
+    "Nordic", "Alpine", "Tropical", "Coastal", "Highland", "Valley", "Meadow", "Harbour",
+    "Golden", "Atlas", "Summit", "River", "Prairie", "Orchard", "Cedar", "Willow",
+]
+SUPPLIER_KINDS = ["Grains", "Dairy", "Botanicals", "Oils", "Spices", "Sweeteners", "Proteins", "Fruits"]
+QUALIFIERS = [
+    "Organic", "Fine", "Coarse", "Roasted", "Raw", "Refined", "Unrefined", "Cold-Pressed",
+    "Stone-Ground", "Freeze-Dried", "Toasted", "Premium", "Wholegrain", "Natural", "Fairtrade",
+]
+BASES = [
+    ("Rolled Oats", "kg"), ("Rye Flour", "kg"), ("Spelt Flour", "kg"), ("Barley Flakes", "kg"),
+    ("Butter", "kg"), ("Double Cream", "litre"), ("Milk Powder", "kg"), ("Whey Protein", "kg"),
+    ("Vanilla Extract", "litre"), ("Cacao Powder", "kg"), ("Coconut Sugar", "kg"), ("Desiccated Coconut", "kg"),
+    ("Sunflower Oil", "litre"), ("Rapeseed Oil", "litre"), ("Coconut Oil", "kg"), ("Sea Salt", "kg"),
+    ("Honey", "kg"), ("Almonds", "kg"), ("Hazelnuts", "kg"), ("Dried Cranberries", "kg"),
+    ("Pea Protein", "kg"), ("Cinnamon", "kg"), ("Oat Syrup", "litre"), ("Apple Juice Concentrate", "litre"),
+]
+# Half the suppliers have no minimum order value.
+MINIMUM_ORDER_VALUES = [0, 0, 0, 0, 50, 100, 250, 500]
+PRODUCT_KINDS = ["Granola", "Protein Bar", "Oat Milk", "Loaf", "Cookie", "Cake", "Porridge", "Smoothie", "Cracker"]
+
+# Weighted so most history is closed out, as in a real order book.
+STATUS_WEIGHTS = [
+    (OrderStatus.DELIVERED, 55),
+    (OrderStatus.SHIPPED, 10),
+    (OrderStatus.PROCESSING, 8),
+    (OrderStatus.CONFIRMED, 10),
+    (OrderStatus.PENDING, 10),
+    (OrderStatus.CANCELLED, 7),
+]
+FULFILMENT_PATH = [
+    OrderStatus.PENDING,
+    OrderStatus.CONFIRMED,
+    OrderStatus.PROCESSING,
+    OrderStatus.SHIPPED,
+    OrderStatus.DELIVERED,
+]
+
+
+@dataclass
+class ScaleConfig:
+    buyers: int
+    suppliers: int
+    ingredients_per_supplier: int
+    products_per_buyer: int
+    orders: int
+    seed: int = 42
+    batch_size: int = 5000
+
+    @classmethod
+    def for_scale(cls, scale: int, **overrides) -> "ScaleConfig":
+        """Scale 1 is ~1k orders; every count grows linearly except the catalogue depth."""
+        config = cls(
+            buyers=10 * scale,
+            suppliers=20 * scale,
+            ingredients_per_supplier=50,
+            products_per_buyer=20,
+            orders=1000 * scale,
+        )
+        for name, value in overrides.items():
+            if value is not None:
+                setattr(config, name, value)
+        return config
+
+
+@contextmanager
+def historical_timestamps(*model_classes: type[models.Model]):
+    """Let bulk_create keep explicit created_at/updated_at values."""
+    saved = []
+    for model in model_classes:
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.DateTimeField) and (field.auto_now or field.auto_now_add):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def synthetic_data_exists() -> bool:
+    return User.objects.filter(username__startswith=USERNAME_PREFIX).exists()
+
+
+def price_history(rng: random.Random, current: Decimal, created_at: datetime) -> list[tuple[Decimal, datetime]]:
+    """Up to six earlier prices within 20% of ``current``, ending at ``current``."""
+    end = EPOCH + timedelta(days=HISTORY_DAYS)
+    span = int((end - created_at).total_seconds())
+    changes = sorted(rng.randrange(1, span) for _ in range(rng.randint(0, 6))) if span > 1 else []
+    points = [created_at, *(created_at + timedelta(seconds=offset) for offset in changes)]
+    prices = [(current * rng.randint(80, 120) / 100).quantize(Decimal("0.01")) for _ in points[1:]]
+    return list(zip([*prices, current], points))
+
+
+def generate(config: ScaleConfig, log: Callable[[str], None] = lambda message: None) -> dict[str, int]:
+    rng = random.Random(config.seed)
+    batch = config.batch_size
+
+    def history(order: Order) -> list[OrderEvent]:
+        """Events walking the order to its status, ending at ``updated_at``."""
+        if order.status == OrderStatus.CANCELLED:
+            path = FULFILMENT_PATH[:rng.randint(1, 2)] + [OrderStatus.CANCELLED]
+        else:
+            path = FULFILMENT_PATH[:FULFILMENT_PATH.index(order.status) + 1]
+        span = int((order.updated_at - order.created_at).total_seconds())
+        offsets = sorted(rng.randrange(span + 1) for _ in range(len(path) - 2)) + [span]
+        return [
+            OrderEvent(
+                order_id=order.pk,
+                from_status=source,
+                to_status=target,
+                created_at=order.created_at + timedelta(seconds=offset),
+            )
+            for source, target, offset in zip(path, path[1:], offsets)
+        ]
+
+    def moment() -> datetime:
+        return EPOCH + timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400), microseconds=rng.randrange(10**6))
+
+    with historical_timestamps(User, Buyer, Supplier, Ingredient, Product, Order):
+        # --- Buyers ---
+        password = make_password(PASSWORD)
+        width = len(str(config.buyers))
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"{USERNAME_PREFIX}{i:0{width}d}",
+                    email=f"buyer{i}@example.com",
+                    password=password,
+                    date_joined=EPOCH,
+                )
+                for i in range(config.buyers)
+            ],
+            batch_size=batch,
+        )
+        buyers = Buyer.objects.bulk_create(
+            [Buyer(user=user, company_name=f"Synthetic Buying Co. {i}", created_at=EPOCH) for i, user in enumerate(users)],
+            batch_size=batch,
+        )
+        log(f"  {len(buyers)} buyers")
+
+        # --- Suppliers & ingredients ---
+        supplier_rows = [
+            Supplier(
+                name=f"{rng.choice(SUPPLIER_WORDS)} {rng.choice(SUPPLIER_KINDS)} {i}",
+                description="Synthetic supplier for load testing.",
+                created_at=moment(),
+            )
+            for i in range(config.suppliers)
+        ]
+        # Like price history below, minimums and groups use their own RNG or
+        # none, so adding them didn't change any other generated value.
+        minimum_rng = random.Random(f"{config.seed}-minimums")
+        for supplier in supplier_rows:
+            supplier.updated_at = supplier.created_at
+            supplier.minimum_order_value = Decimal(minimum_rng.choice(MINIMUM_ORDER_VALUES))
+        suppliers = Supplier.objects.bulk_create(supplier_rows, batch_size=batch)
+        groups = IngredientGroup.objects.in_bulk([base for base, _ in BASES], field_name="name")
+        missing = [IngredientGroup(name=base, unit=unit) for base, unit in BASES if base not in groups]
+        groups.update({group.name: group for group in IngredientGroup.objects.bulk_create(missing)})
+        ingredient_rows = []
+        for supplier in suppliers:
+            for j in range(config.ingredients_per_supplier):
+                base, unit = rng.choice(BASES)
+                ingredient_rows.append(Ingredient(
+                    supplier=supplier,
+                    group=groups[base],
+                    name=f"{rng.choice(QUALIFIERS)} {base} {j}",
+                    description=f"{base}, synthetic grade {rng.randint(1, 5)}",
+                    unit=unit,
+                    price_per_unit=Decimal(rng.randint(50, 9000)) / 100,
+                    created_at=moment(),
+                ))
+        # Earlier prices come from their own RNG, so the rest of the dataset
+        # doesn't depend on how much price history is generated.
+        price_rng = random.Random(f"{config.seed}-prices")
+        price_points: list[list[tuple[Decimal, datetime]]] = []
+        for ingredient in ingredient_rows:
+            price_points.append(price_history(price_rng, ingredient.price_per_unit, ingredient.created_at))
+            ingredient.updated_at = price_points[-1][-1][1]
+        ingredients = Ingredient.objects.bulk_create(ingredient_rows, batch_size=batch)
+        record_prices(
+            ((ingredient.pk, price, at) for ingredient, points in zip(ingredients, price_points) for price, at in points),
+            batch_size=batch,
+        )
+        by_supplier: dict[int, list[Ingredient]] = {}
+        for ingredient in ingredients:
+            by_supplier.setdefault(ingredient.supplier_id, []).append(ingredient)
+        log(f"  {len(suppliers)} suppliers, {len(ingredients)} ingredients")
+
+        # --- Products with BOMs ---
+        product_count = 0
+        recipe_lines = 0
+        buyers_per_batch = max(1, batch // max(1, config.products_per_buyer))
+        for start in range(0, len(buyers), buyers_per_batch):
+            chunk = buyers[start:start + buyers_per_batch]
+            products = []
+            for buyer in chunk:
+                for k in range(config.products_per_buyer):
+                    created = moment()
+                    products.append(Product(
+                        buyer=buyer,
+                        name=f"{rng.choice(QUALIFIERS)} {rng.choice(PRODUCT_KINDS)} {k}",
+                        description="Synthetic product.",
+                        created_at=created,
+                        updated_at=created,
+                    ))
+            with transaction.atomic():
+                products = Product.objects.bulk_create(products, batch_size=batch)
+                lines = []
+                for product in products:
+                    # A recipe mostly draws from a few suppliers, like a real one.
+                    pool = [i for s in rng.sample(suppliers, min(3, len(suppliers))) for i in by_supplier.get(s.pk, [])]
+                    for ingredient in rng.sample(pool, min(len(pool), rng.randint(3, 8))):
+                        lines.append(ProductIngredient(
+                            product=product,
+                            ingredient=ingredient,
+                            quantity=Decimal(rng.randint(5, 800)) / 1000,
+                        ))
+                ProductIngredient.objects.bulk_create(lines, batch_size=batch)
+            product_count += len(products)
+            recipe_lines += len(lines)
+        log(f"  {product_count} products, {recipe_lines} recipe lines")
+
+        # --- Orders ---
+        statuses = [status for status, _ in STATUS_WEIGHTS]
+        weights = [weight for _, weight in STATUS_WEIGHTS]
+        item_count = 0
+        event_count = 0
+        for start in range(0, config.orders, batch):
+            size = min(batch, config.orders - start)
+            orders = []
+            for _ in range(size):
+                created = moment()
+                orders.append(Order(
+                    buyer_id=rng.choice(buyers).pk,
+                    status=rng.choices(statuses, weights)[0],
+                    created_at=created,
+                    updated_at=created + timedelta(hours=rng.randint(0, 24 * 14)),
+                ))
+            with transaction.atomic():
+                orders = Order.objects.bulk_create(orders, batch_size=batch)
+                items = []
+                events = []
+                for order in orders:
+                    events.extend(history(order))
+                    catalogue = by_supplier[rng.choice(suppliers).pk]
+                    for ingredient in rng.sample(catalogue, min(len(catalogue), rng.randint(1, 8))):
+                        # Raw ids skip the related-descriptor bookkeeping, which
+                        # dominates bulk_create time at millions of rows.
+                        items.append(OrderItem(
+                            order_id=order.pk,
+                            ingredient_id=ingredient.pk,
+                            quantity=rng.randint(1, 200),
+                            unit_price=ingredient.price_per_unit,
+                        ))
+                OrderItem.objects.bulk_create(items, batch_size=batch)
+                OrderEvent.objects.bulk_create(events, batch_size=batch)
+            item_count += len(items)
+            event_count += len(events)
+            log(f"  {start + size}/{config.orders} orders")
+
+    # bulk_create skips the signals that normally invalidate these caches.
+    bump_catalogue_version()
+    log("  folding order events into lead-time rollups")
+    refresh_lead_times()
+    log("  building spend rollups")
+    spend_buckets = rebuild_spend_rollups()
+
+    return {
+        "buyers": len(buyers),
+        "suppliers": len(suppliers),
+        "ingredients": len(ingredients),
+        "ingredient_prices": sum(len(points) for points in price_points),
+        "products": product_count,
+        "recipe_lines": recipe_lines,
+        "orders": config.orders,
+        "order_items": item_count,
+        "order_events": event_count,
+        "spend_buckets": spend_buckets,
+    }
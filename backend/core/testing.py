@@ -0,0 +1,53 @@
+"""Fixtures shared by the apps' test modules."""
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from buyers.models import Buyer
+from ingredients.models import Ingredient
+from orders.models import Order, OrderItem
+from products.models import Product, ProductIngredient
+from suppliers.models import Supplier
+
+
+def create_buyer(username: str = "buyer") -> Buyer:
+    user = User.objects.create_user(username=username, password="pw")
+    return Buyer.objects.create(user=user, company_name=f"{username} Ltd")
+
+
+def buyer_client(buyer: Buyer) -> APIClient:
+    client = APIClient()
+    # A fresh instance per client, so the buyer isn't cached on a shared user.
+    client.force_authenticate(User.objects.select_related("buyer_profile").get(pk=buyer.user_id))
+    return client
+
+
+def create_supplier(name: str = "Supplier", ingredients: int = 2, **kwargs) -> Supplier:
+    supplier = Supplier.objects.create(name=name, **kwargs)
+    for number in range(ingredients):
+        Ingredient.objects.create(
+            supplier=supplier,
+            name=f"{name} ingredient {number}",
+            unit="kg",
+            price_per_unit=Decimal("2.50") + number,
+        )
+    return supplier
+
+
+def create_product(buyer: Buyer, ingredients: list[Ingredient], name: str = "Product") -> Product:
+    product = Product.objects.create(buyer=buyer, name=name)
+    ProductIngredient.objects.bulk_create([
+        ProductIngredient(product=product, ingredient=ingredient, quantity=Decimal("1.500"))
+        for ingredient in ingredients
+    ])
+    return product
+
+
+def create_order(buyer: Buyer, ingredients: list[Ingredient], quantity: int = 2) -> Order:
+    order = Order.objects.create(buyer=buyer)
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, ingredient=ingredient, quantity=quantity, unit_price=ingredient.price_per_unit)
+        for ingredient in ingredients
+    ])
+    return order
@@ -0,0 +1,374 @@
+import json
+import tempfile
+import threading
+import warnings
+from base64 import b64encode
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.utils.urls import replace_query_param
+from ingredients.models import Ingredient, IngredientGroup
+from ingredients.views import IngredientChangesView, IngredientListView
+from orders.models import OrderItem
+from orders.views import OrderListCreateView
+from products.models import Product, ProductIngredient
+from products.views import ProductListCreateView
+from suppliers.views import SupplierChangesView, SupplierIngredientListView, SupplierListView
+from .async_views import gather_reads
+from .middleware import ProfilingMiddleware
+from .pagination import KeysetPagination
+from .profiling import RequestProfile, activate, deactivate, track_queries
+from .rendering import FastListMixin
+from .testing import buyer_client, create_buyer, create_order, create_product, create_supplier
+
+
+def serializer_rendered(view_class: type) -> type:
+    """``view_class`` without ``FastListMixin``, so its serializer renders every row."""
+    bases = tuple(base for base in view_class.__bases__ if base is not FastListMixin)
+    return type(f"Serialized{view_class.__name__}", bases, dict(view_class.__dict__))
+
+
+# Changed rows normally wait two seconds before they are listed.
+@mock.patch("core.sync.SETTLE_DELAY", timedelta(0))
+class FastListParityTests(TestCase):
+    """``FastListMixin`` responses are byte-identical to the serializers'."""
+
+    def setUp(self):
+        self.buyer = create_buyer()
+        self.supplier = create_supplier(
+            'Ünïcode "Mill"   🍋', ingredients=3, description="tab\tnewline\n line\u2028separator", minimum_order_value=Decimal("12.50")
+        )
+        create_supplier("Dairy", ingredients=2)
+        group = IngredientGroup.objects.create(name="Oats", unit="kg")
+        # One grouped ingredient; the rest have a null group_id.
+        Ingredient.objects.filter(pk=self.supplier.ingredients.order_by("pk")[0].pk).update(group=group)
+        Ingredient.objects.create(
+            supplier=self.supplier, name="Saffron", unit="g", price_per_unit=Decimal("1234.05")
+        )
+        ingredients = list(Ingredient.objects.all())
+        create_order(self.buyer, ingredients, quantity=7)
+        create_order(self.buyer, [])
+        create_product(self.buyer, ingredients[:2])
+        create_product(self.buyer, [], name="Empty")
+        self.factory = APIRequestFactory()
+
+    def render(self, view_class: type, url: str, **kwargs) -> bytes:
+        caches["catalogue"].clear()
+        request = self.factory.get(url)
+        force_authenticate(request, user=self.buyer.user)
+        view = view_class.as_view()
+        response = async_to_sync(view)(request, **kwargs) if view_class.view_is_async else view(request, **kwargs)
+        self.assertEqual(response.status_code, 200, url)
+        return response.render().content
+
+    def assert_parity(self, view_class: type, url: str, **kwargs) -> list[dict]:
+        """Compare every page, following ``next`` links or ``changes/`` watermarks."""
+        reference = serializer_rendered(view_class)
+        pages = []
+        while url:
+            fast = self.render(view_class, url, **kwargs)
+            self.assertEqual(fast, self.render(reference, url, **kwargs), url)
+            body = json.loads(fast)
+            pages.append(body["results"])
+            if "watermark" in body:
+                url = replace_query_param(url, "since", body["watermark"]) if body["has_more"] else None
+            else:
+                url = body["next"]
+        self.assertGreater(len(pages), 1, "the parity check should span several pages")
+        self.assertTrue(all(pages[:-1]))
+        return [row for page in pages for row in page]
+
+    def test_supplier_list(self):
+        rows = self.assert_parity(SupplierListView, "/api/suppliers/?page_size=1")
+        self.assertEqual({row["minimum_order_value"] for row in rows}, {"12.50", "0.00"})
+        self.assertTrue(all(row["created_at"].endswith("Z") for row in rows))
+
+    def test_supplier_ingredient_list(self):
+        self.assert_parity(
+            SupplierIngredientListView, f"/api/suppliers/{self.supplier.pk}/ingredients/?page_size=3", pk=self.supplier.pk
+        )
+
+    def test_ingredient_list(self):
+        rows = self.assert_parity(IngredientListView, "/api/ingredients/?page_size=3")
+        self.assertEqual(len(rows), 6)
+        self.assertIn(None, [row["group_id"] for row in rows])
+        self.assertIn("1234.05", [row["price_per_unit"] for row in rows])
+
+    def test_ingredient_search(self):
+        self.assert_parity(IngredientListView, "/api/ingredients/?search=ingredient&page_size=2")
+
+    def test_order_list(self):
+        rows = self.assert_parity(OrderListCreateView, "/api/orders/?page_size=1")
+        # The empty order's total is the coalesced 0.00.
+        self.assertEqual([row["total_amount"] for row in rows], ["0.00", "8753.85"])
+
+    def test_product_list(self):
+        self.assert_parity(ProductListCreateView, "/api/products/?page_size=1")
+
+    def test_ingredient_changes(self):
+        self.assert_parity(IngredientChangesView, "/api/ingredients/changes/?page_size=4")
+
+    def test_supplier_changes(self):
+        self.assert_parity(SupplierChangesView, "/api/suppliers/changes/?page_size=1")
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.buyer = create_buyer()
+        self.client = buyer_client(self.buyer)
+        products = [create_product(self.buyer, [], name=f"Product {number}") for number in range(7)]
+        # Three share a timestamp, so a page boundary falls inside the tie.
+        base = timezone.now()
+        offsets = [0, 1, 1, 1, 2, 3, 3]
+        for product, offset in zip(products, offsets):
+            Product.objects.filter(pk=product.pk).update(created_at=base - timedelta(minutes=offset))
+        self.expected = list(Product.objects.order_by("-created_at", "-id").values_list("pk", flat=True))
+
+    def walk(self, url: str, link: str) -> list[list[int]]:
+        """Pages from ``url`` on, following ``link`` ("next" or "previous") to its end."""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row["id"] for row in response.json()["results"]])
+            url = response.json()[link]
+        return pages
+
+    def test_next_and_previous_round_trip(self):
+        forward = self.walk("/api/products/?page_size=2", "next")
+        self.assertEqual(forward, [self.expected[start:start + 2] for start in range(0, 7, 2)])
+
+        # Back from the last page to the first.
+        url = "/api/products/?page_size=2"
+        for _ in forward[1:]:
+            url = self.client.get(url).json()["next"]
+        backward = self.walk(self.client.get(url).json()["previous"], "previous")
+        self.assertEqual(backward[::-1], forward[:-1])
+        self.assertIsNone(self.client.get("/api/products/?page_size=2").json()["previous"])
+
+    def test_ties_are_ordered_by_pk(self):
+        tied_at = Product.objects.get(pk=self.expected[1]).created_at
+        tied = Product.objects.filter(created_at=tied_at).values_list("pk", flat=True)
+        self.assertEqual(self.expected[1:4], sorted(tied, reverse=True))
+        for page_size in (1, 2, 3):
+            pages = self.walk(f"/api/products/?page_size={page_size}", "next")
+            self.assertEqual([pk for page in pages for pk in page], self.expected, page_size)
+
+    def test_descending_keyset_ordering(self):
+        ingredients = create_supplier("Mill", ingredients=5).ingredients.order_by("pk")
+        Ingredient.objects.filter(pk__in=[ingredient.pk for ingredient in ingredients[:3]]).update(
+            price_per_unit=Decimal("4.00")
+        )
+        view = SimpleNamespace(keyset_ordering=("-price_per_unit", "-id"))
+        expected = list(Ingredient.objects.order_by("-price_per_unit", "-id").values_list("pk", flat=True))
+
+        pks, url = [], "/api/ingredients/?page_size=2"
+        while url:
+            paginator = KeysetPagination()
+            request = Request(APIRequestFactory().get(url))
+            pks += [row.pk for row in paginator.paginate_queryset(Ingredient.objects.all(), request, view)]
+            url = paginator.get_next_link()
+        self.assertEqual(pks, expected)
+
+    def test_bad_cursor_is_not_found(self):
+        malformed = "not-a-cursor"
+        bad_position = b64encode(b"r=0&p=%22yesterday%22&i=1").decode()
+        for cursor in (malformed, bad_position):
+            response = self.client.get(f"/api/products/?cursor={cursor}")
+            self.assertEqual(response.status_code, 404, cursor)
+            self.assertEqual(response.json(), {"detail": "Invalid cursor"})
+
+
+class CatalogueCacheTests(TestCase):
+    def setUp(self):
+        caches["catalogue"].clear()
+        self.ingredient = create_supplier("Mill", ingredients=1).ingredients.get()
+        self.client = buyer_client(create_buyer())
+
+    def test_etag_revalidation_and_invalidation(self):
+        url = f"/api/suppliers/{self.ingredient.supplier_id}/ingredients/"
+        first = self.client.get(url)
+        etag = first["ETag"]
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual((cached["ETag"], cached.json()), (etag, first.json()))
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((not_modified.status_code, not_modified["ETag"]), (304, etag))
+
+        self.ingredient.price_per_unit = Decimal("9.99")
+        self.ingredient.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+        self.assertEqual(changed.json()["results"][0]["price_per_unit"], "9.99")
+
+
+@override_settings(REQUEST_PROFILING={"ENABLED": True, "SAMPLE_RATE": 1.0, "DUPLICATE_THRESHOLD": 3})
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.buyer = create_buyer()
+        create_order(self.buyer, list(create_supplier("Mill", ingredients=3).ingredients.all()))
+        self.token = Token.objects.create(user=self.buyer.user)
+        # Server threads open their connections after the middleware loads;
+        # the test database's connection predates it.
+        track_queries()
+
+    def assert_export_profiled(self, response, logs) -> None:
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Server-Timing", response)
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record["path"], "/api/orders/export/")
+        # The header was set before the body ran the export's queries.
+        header_queries = int(response["Server-Timing"].split('desc="')[1].split(" ")[0])
+        self.assertGreater(record["queries"], header_queries)
+
+    def test_streamed_queries_are_profiled(self):
+        client = buyer_client(self.buyer)
+        with self.assertLogs("core.profiling", "INFO") as logs:
+            response = client.get("/api/orders/export/")
+            self.assertFalse(logs.records)
+            b"".join(response.streaming_content)
+        self.assert_export_profiled(response, logs)
+
+    async def test_streamed_queries_are_profiled_under_asgi(self):
+        with self.assertLogs("core.profiling", "INFO") as logs:
+            response = await self.async_client.get(
+                "/api/orders/export/", headers={"Authorization": f"Token {self.token.key}"}
+            )
+            self.assertFalse(logs.records)
+            # Read the body as Django's ASGI handler does.
+            async for _ in response:
+                pass
+        self.assert_export_profiled(response, logs)
+
+    def test_runs_natively_under_asgi(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = ProfilingMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertTrue(iscoroutinefunction(middleware.process_view))
+        self.assertFalse(iscoroutinefunction(ProfilingMiddleware(lambda request: HttpResponse())))
+
+
+# Committed data, so the worker threads' connections can read it.
+class GatherReadsTests(TransactionTestCase):
+    def setUp(self):
+        self.buyer = create_buyer()
+        self.ingredients = list(create_supplier("Mill", ingredients=3).ingredients.all())
+        self.client = buyer_client(self.buyer)
+
+    def test_reads_run_on_separate_connections(self):
+        def read():
+            return threading.get_ident(), id(connection.connection), OrderItem.objects.count()
+
+        first, second = async_to_sync(gather_reads)(read, read)
+        self.assertNotEqual(first[:2], second[:2])
+        self.assertEqual((first[2], second[2]), (0, 0))
+
+    def test_reads_in_a_transaction_stay_on_its_connection(self):
+        def read():
+            return id(connection.connection), OrderItem.objects.count()
+
+        with transaction.atomic():
+            create_order(self.buyer, self.ingredients)
+            first, second = async_to_sync(gather_reads)(read, read)
+        self.assertEqual(first, second)
+        self.assertEqual(first[1], 3)
+
+    def test_detail_views_gather_their_reads(self):
+        order = create_order(self.buyer, self.ingredients)
+        product = create_product(self.buyer, self.ingredients)
+        for url in (f"/api/orders/{order.pk}/", f"/api/products/{product.pk}/"):
+            # Counted like ProfilingMiddleware does.
+            profile = RequestProfile()
+            token = activate(profile)
+            try:
+                track_queries()
+                response = self.client.get(url)
+            finally:
+                deactivate(token)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            self.assertEqual(len(body.get("items", body.get("ingredients"))), 3)
+            # The worker thread's lines query is counted too.
+            self.assertEqual(profile.queries, 2, url)
+
+    def test_detail_views_do_not_load_another_buyers_lines(self):
+        other = create_buyer("other")
+        cases = (
+            (f"/api/orders/{create_order(other, self.ingredients).pk}/", OrderItem),
+            (f"/api/products/{create_product(other, self.ingredients).pk}/", ProductIngredient),
+        )
+        for url, line_model in cases:
+            with mock.patch.object(line_model, "from_db", wraps=line_model.from_db) as loaded:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(loaded.call_count, 0)
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """Reads switch between the test database and a second SQLite file used as the replica."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        replica = {**settings.DATABASES["default"], "NAME": str(Path(directory.name) / "replica.sqlite3")}
+        databases = {**settings.DATABASES, "replica": replica}
+        connections.settings["replica"] = connections.configure_settings(databases)["replica"]
+        self.addCleanup(self.remove_replica)
+        allowed = mock.patch.object(type(self), "databases", self.databases | {"replica"})
+        allowed.start()
+        self.addCleanup(allowed.stop)
+        overridden = override_settings(DATABASES=databases)
+        with warnings.catch_warnings():
+            # The connection for the new alias is set up by hand above.
+            warnings.filterwarnings("ignore", "Overriding setting DATABASES")
+            overridden.enable()
+        self.addCleanup(overridden.disable)
+        # Same schema, no rows: a stale snapshot.
+        call_command("migrate", database="replica", verbosity=0)
+
+        caches["replica_pins"].clear()
+        self.buyer = create_buyer()
+        self.ingredient = create_supplier("Mill", ingredients=1).ingredients.get()
+        create_order(self.buyer, [self.ingredient])
+        self.client = buyer_client(self.buyer)
+
+    def remove_replica(self):
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+
+    def order_count(self) -> int:
+        response = self.client.get("/api/orders/")
+        self.assertEqual(response.status_code, 200)
+        return len(response.json()["results"])
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        # Nothing written yet, so the list comes from the empty replica.
+        self.assertEqual(self.order_count(), 0)
+
+        response = self.client.post(
+            "/api/orders/", {"items": [{"ingredient_id": self.ingredient.pk, "quantity": 1}]}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.order_count(), 2)
+
+        # Once the pin lapses, reads go back to the replica.
+        caches["replica_pins"].clear()
+        self.assertEqual(self.order_count(), 0)
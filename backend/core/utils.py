@@ -0,0 +1,16 @@
+from collections.abc import Iterable
+from django.db import models
+
+
+def seed_prefetch_cache(instance: models.Model, related_name: str, objects: Iterable[models.Model]) -> None:
+    """Populate ``instance.<related_name>.all()`` with rows already in memory.
+
+    Lets serializers read freshly bulk-created children without issuing
+    another query, exactly as if they had been loaded via ``prefetch_related``.
+    """
+    queryset = getattr(instance, related_name).all()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    if not hasattr(instance, "_prefetched_objects_cache"):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[related_name] = queryset
@@ -1,9 +1,15 @@
 from django.contrib import admin
-from .models import Ingredient
+from .models import Ingredient, IngredientGroup
 
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
-    list_display = ["id", "name", "supplier", "unit", "price_per_unit"]
+    list_display = ["id", "name", "supplier", "unit", "price_per_unit", "group"]
     search_fields = ["name", "supplier__name"]
-    list_filter = ["supplier"]
+    list_filter = ["supplier", "group"]
+
+
+@admin.register(IngredientGroup)
+class IngredientGroupAdmin(admin.ModelAdmin):
+    list_display = ["id", "name", "unit"]
+    search_fields = ["name"]
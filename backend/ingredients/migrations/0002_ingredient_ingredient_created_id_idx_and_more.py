@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ingredients", "0001_initial"),
+        ("suppliers", "0002_supplier_supplier_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(fields=["created_at", "id"], name="ingredient_created_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(fields=["supplier", "created_at", "id"], name="ingredient_supp_created_idx"),
+        ),
+    ]
@@ -0,0 +1,106 @@
+import django.db.models.deletion
+import ingredients.search
+from django.db import migrations, models
+
+
+FTS_SETUP = [
+    """
+    CREATE VIRTUAL TABLE ingredients_ingredient_fts USING fts5(
+        name, description, supplier_name,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER ingredients_ingredient_fts_ai AFTER INSERT ON ingredients_ingredient BEGIN
+        INSERT INTO ingredients_ingredient_fts (rowid, name, description, supplier_name)
+        SELECT new.id, new.name, new.description, s.name FROM suppliers_supplier s WHERE s.id = new.supplier_id;
+    END
+    """,
+    """
+    CREATE TRIGGER ingredients_ingredient_fts_au AFTER UPDATE OF name, description, supplier_id ON ingredients_ingredient BEGIN
+        UPDATE ingredients_ingredient_fts
+        SET name = new.name,
+            description = new.description,
+            supplier_name = (SELECT s.name FROM suppliers_supplier s WHERE s.id = new.supplier_id)
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER ingredients_ingredient_fts_ad AFTER DELETE ON ingredients_ingredient BEGIN
+        DELETE FROM ingredients_ingredient_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER suppliers_supplier_fts_au AFTER UPDATE OF name ON suppliers_supplier BEGIN
+        UPDATE ingredients_ingredient_fts SET supplier_name = new.name
+        WHERE rowid IN (SELECT i.id FROM ingredients_ingredient i WHERE i.supplier_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO ingredients_ingredient_fts (rowid, name, description, supplier_name)
+    SELECT i.id, i.name, i.description, s.name
+    FROM ingredients_ingredient i JOIN suppliers_supplier s ON s.id = i.supplier_id
+    """,
+]
+
+FTS_TEARDOWN = [
+    "DROP TRIGGER IF EXISTS suppliers_supplier_fts_au",
+    "DROP TRIGGER IF EXISTS ingredients_ingredient_fts_ad",
+    "DROP TRIGGER IF EXISTS ingredients_ingredient_fts_au",
+    "DROP TRIGGER IF EXISTS ingredients_ingredient_fts_ai",
+    "DROP TABLE IF EXISTS ingredients_ingredient_fts",
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ingredients", "0002_ingredient_ingredient_created_id_idx_and_more"),
+        ("suppliers", "0002_supplier_supplier_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngredientSearchIndex",
+            fields=[
+                (
+                    "ingredient",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_index",
+                        serialize=False,
+                        to="ingredients.ingredient",
+                    ),
+                ),
+                ("document", ingredients.search.FullTextField(db_column="ingredients_ingredient_fts")),
+                ("name", models.TextField()),
+                ("description", models.TextField()),
+                ("supplier_name", models.TextField()),
+                ("rank", models.FloatField()),
+            ],
+            options={
+                "db_table": "ingredients_ingredient_fts",
+                "managed": False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(fields=["unit", "price_per_unit"], name="ingredient_unit_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(fields=["price_per_unit"], name="ingredient_price_idx"),
+        ),
+        migrations.RunPython(run_on_sqlite(FTS_SETUP), run_on_sqlite(FTS_TEARDOWN)),
+    ]
@@ -0,0 +1,29 @@
+from importlib import import_module
+from django.db import migrations
+
+search_index = import_module("ingredients.migrations.0003_search_index")
+
+# SQLite refuses to rebuild a table (as AlterField does) while triggers on
+# other tables reference it, and a rebuild drops the table's own triggers.
+# The FTS triggers are therefore dropped around the updated_at changes to
+# suppliers and ingredients and recreated by 0005.
+FTS_TRIGGERS_DROP = [sql for sql in search_index.FTS_TEARDOWN if sql.startswith("DROP TRIGGER")]
+FTS_TRIGGERS_CREATE = [sql for sql in search_index.FTS_SETUP if sql.strip().startswith("CREATE TRIGGER")]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ingredients", "0003_search_index"),
+    ]
+
+    run_before = [
+        ("suppliers", "0003_supplier_updated_at_supplier_supplier_updated_id_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            search_index.run_on_sqlite(FTS_TRIGGERS_DROP),
+            search_index.run_on_sqlite(FTS_TRIGGERS_CREATE),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from importlib import import_module
+from django.db import migrations, models
+from django.db.models import F
+
+search_index = import_module("ingredients.migrations.0003_search_index")
+triggers = import_module("ingredients.migrations.0004_drop_fts_triggers")
+
+
+def backfill_updated_at(apps, schema_editor):
+    Ingredient = apps.get_model("ingredients", "Ingredient")
+    Ingredient.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ingredients", "0004_drop_fts_triggers"),
+        ("suppliers", "0003_supplier_updated_at_supplier_supplier_updated_id_idx"),
+    ]
+
+    # Added nullable first so SQLite can ALTER TABLE in place, then
+    # backfilled from created_at so existing rows don't all look just-changed.
+    operations = [
+        migrations.AddField(
+            model_name="ingredient",
+            name="updated_at",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="ingredient",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(fields=["updated_at", "id"], name="ingredient_updated_id_idx"),
+        ),
+        migrations.RunPython(
+            search_index.run_on_sqlite(triggers.FTS_TRIGGERS_CREATE),
+            search_index.run_on_sqlite(triggers.FTS_TRIGGERS_DROP),
+        ),
+    ]
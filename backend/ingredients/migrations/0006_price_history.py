@@ -0,0 +1,63 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_prices(apps, schema_editor):
+    # Earlier prices were overwritten, so the current one is taken to have
+    # applied since the ingredient was created.
+    Ingredient = apps.get_model("ingredients", "Ingredient")
+    IngredientPrice = apps.get_model("ingredients", "IngredientPrice")
+    rows = Ingredient.objects.values_list("pk", "price_per_unit", "created_at")
+    IngredientPrice.objects.bulk_create(
+        (
+            IngredientPrice(ingredient_id=pk, price_per_unit=price, effective_from=created_at)
+            for pk, price, created_at in rows.iterator(chunk_size=5000)
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ingredients", "0005_ingredient_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngredientPrice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "price_per_unit",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                ("effective_from", models.DateTimeField()),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_history",
+                        to="ingredients.ingredient",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["ingredient", "effective_from"],
+                        name="ingredient_price_effective_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_prices, migrations.RunPython.noop),
+    ]
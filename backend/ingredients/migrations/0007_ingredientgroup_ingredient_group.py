@@ -0,0 +1,39 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ingredients", "0006_price_history"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngredientGroup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("unit", models.CharField(max_length=50)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="ingredient",
+            name="group",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="ingredients",
+                to="ingredients.ingredientgroup",
+            ),
+        ),
+    ]
@@ -1,14 +1,129 @@
-from django.db import models
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from suppliers.models import Supplier
+from . import units
+from .search import FullTextField
+
+
+class IngredientGroup(models.Model):
+    """Interchangeable ingredients, e.g. every supplier's sunflower oil.
+
+    ``unit`` is the base unit the sourcing optimizer compares prices in;
+    members must use a unit convertible to it (see ``ingredients.units``).
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    unit = models.CharField(max_length=50)
+
+    def __str__(self) -> str:
+        return f"{self.name} (per {self.unit})"
+
+    def clean(self) -> None:
+        if units.to_base(self.unit) is None:
+            raise ValidationError({"unit": f"Unknown unit {self.unit!r}."})
 
 
 class Ingredient(models.Model):
     supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, related_name="ingredients")
+    group = models.ForeignKey(
+        IngredientGroup, on_delete=models.SET_NULL, null=True, blank=True, related_name="ingredients"
+    )
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     unit = models.CharField(max_length=50)
     price_per_unit = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="ingredient_created_id_idx"),
+            models.Index(fields=["updated_at", "id"], name="ingredient_updated_id_idx"),
+            models.Index(fields=["supplier", "created_at", "id"], name="ingredient_supp_created_idx"),
+            models.Index(fields=["unit", "price_per_unit"], name="ingredient_unit_price_idx"),
+            models.Index(fields=["price_per_unit"], name="ingredient_price_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name} ({self.supplier.name})"
+
+    def clean(self) -> None:
+        if self.group is not None and units.factor(self.unit, self.group.unit) is None:
+            raise ValidationError({"unit": f"{self.unit!r} doesn't convert to the group's unit {self.group.unit!r}."})
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Compared in save() to decide whether to append to the price history.
+        instance._saved_price = instance.__dict__.get("price_per_unit")
+        return instance
+
+    def save(self, *args, **kwargs) -> None:
+        """Save, appending an ``IngredientPrice`` when the price is new or changed.
+
+        Bulk writes bypass this and must call ``ingredients.prices.record_prices``.
+        """
+        update_fields = kwargs.get("update_fields")
+        price = Decimal(str(self.price_per_unit))
+        if (update_fields is not None and "price_per_unit" not in update_fields) or (
+            not self._state.adding and price == getattr(self, "_saved_price", None)
+        ):
+            super().save(*args, **kwargs)
+            return
+        if update_fields is not None:
+            # Stamp updated_at too: it dates the history row, and the changes
+            # feed pages on it.
+            kwargs["update_fields"] = {*update_fields, "updated_at"}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            IngredientPrice.objects.create(ingredient=self, price_per_unit=price, effective_from=self.updated_at)
+        self._saved_price = price
+
+
+class IngredientPrice(models.Model):
+    """Append-only history of ``Ingredient.price_per_unit``.
+
+    Each row holds the price from ``effective_from`` until the ingredient's
+    next row. Point-in-time lookups seek the (ingredient, effective_from)
+    index backwards, so they don't slow down as history grows.
+    """
+
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE, related_name="price_history")
+    price_per_unit = models.DecimalField(max_digits=10, decimal_places=2)
+    effective_from = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["ingredient", "effective_from"], name="ingredient_price_effective_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.ingredient_id} @ {self.price_per_unit} from {self.effective_from:%Y-%m-%d %H:%M}"
+
+
+class IngredientSearchIndex(models.Model):
+    """SQLite FTS5 index over ingredient and supplier names.
+
+    The table and the triggers that keep it in sync with ``Ingredient`` and
+    ``Supplier`` writes (including bulk ones) are created by migration 0003;
+    on other database backends it does not exist and search falls back to
+    ``icontains`` filters.
+    """
+
+    ingredient = models.OneToOneField(
+        Ingredient,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        related_name="search_index",
+    )
+    document = FullTextField(db_column="ingredients_ingredient_fts")
+    name = models.TextField()
+    description = models.TextField()
+    supplier_name = models.TextField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "ingredients_ingredient_fts"
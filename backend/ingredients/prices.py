@@ -0,0 +1,72 @@
+"""Ingredient price history: recording and point-in-time lookups.
+
+Both lookups take many ingredients and run one query. Each ingredient's
+price at an instant is a correlated subquery that seeks the
+(ingredient, effective_from) index to the last row at or before it, so the
+cost grows with the number of ingredients asked for, not with history
+length.
+"""
+from collections.abc import Iterable
+from datetime import datetime
+from decimal import Decimal
+from django.db.models import OuterRef, Q, Subquery
+from .models import Ingredient, IngredientPrice
+
+# Ingredient ids accepted per request; keeps ``IN (...)`` lists under
+# SQLite's bound-parameter limit.
+MAX_INGREDIENTS = 500
+
+
+def record_prices(prices: Iterable[tuple[int, Decimal, datetime]], batch_size: int = 1000) -> None:
+    """Append ``(ingredient id, price, effective from)`` rows to the history.
+
+    For writers that bypass ``Ingredient.save()`` (``bulk_create``,
+    ``bulk_update``, raw SQL); call it in the same transaction.
+    """
+    IngredientPrice.objects.bulk_create(
+        (
+            IngredientPrice(ingredient_id=ingredient_id, price_per_unit=price, effective_from=effective_from)
+            for ingredient_id, price, effective_from in prices
+        ),
+        batch_size=batch_size,
+    )
+
+
+def _latest_at(at: datetime) -> Subquery:
+    """Id of the price row in effect at ``at`` for the outer ``Ingredient``."""
+    return Subquery(
+        IngredientPrice.objects.filter(ingredient=OuterRef("pk"), effective_from__lte=at)
+        .order_by("-effective_from")
+        .values("pk")[:1]
+    )
+
+
+def prices_at(ingredient_ids: Iterable[int], at: datetime) -> dict[int, IngredientPrice]:
+    """The price row in effect at ``at`` per ingredient; missing if none was yet."""
+    in_effect = Ingredient.objects.filter(pk__in=ingredient_ids).values(price_id=_latest_at(at))
+    rows = IngredientPrice.objects.filter(pk__in=in_effect)
+    return {row.ingredient_id: row for row in rows}
+
+
+def price_series(
+    ingredient_ids: Iterable[int], start: datetime | None = None, end: datetime | None = None
+) -> dict[int, list[IngredientPrice]]:
+    """Each ingredient's prices in effect during ``[start, end)``, oldest first.
+
+    With a ``start``, the row already in effect then leads each series, so it
+    opens at the right price even if the last change was long before.
+    """
+    ingredient_ids = list(ingredient_ids)
+    changes = Q(ingredient_id__in=ingredient_ids)
+    if start is not None:
+        changes &= Q(effective_from__gt=start)
+    if end is not None:
+        changes &= Q(effective_from__lt=end)
+    if start is not None:
+        opening = Ingredient.objects.filter(pk__in=ingredient_ids).values(price_id=_latest_at(start))
+        changes |= Q(pk__in=opening)
+    rows = IngredientPrice.objects.filter(changes).order_by("ingredient_id", "effective_from")
+    series: dict[int, list[IngredientPrice]] = {}
+    for row in rows:
+        series.setdefault(row.ingredient_id, []).append(row)
+    return series
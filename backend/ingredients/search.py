@@ -0,0 +1,33 @@
+import re
+from django.db import models
+from django.db.models import Lookup
+
+# Matches the tokenizer closely enough to split user input into terms; the
+# real tokenization is still done by FTS5 on each quoted term.
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class FullTextField(models.TextField):
+    """Stand-in for the hidden FTS5 column named after its table."""
+
+
+@FullTextField.register_lookup
+class Match(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection) -> tuple[str, list]:
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+def build_match_query(text: str) -> str | None:
+    """Turn free text into an FTS5 query where every term is a quoted prefix.
+
+    Quoting keeps user input from being parsed as FTS5 syntax (``AND``,
+    ``NEAR``, column filters, stray quotes). Terms are implicitly ANDed.
+    """
+    terms = TERM_RE.findall(text)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Ingredient
+from .models import Ingredient, IngredientPrice
+from .prices import MAX_INGREDIENTS
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -7,4 +8,29 @@ class IngredientSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Ingredient
-        fields = ["id", "supplier_id", "supplier_name", "name", "description", "unit", "price_per_unit"]
+        fields = ["id", "supplier_id", "supplier_name", "name", "description", "unit", "price_per_unit", "group_id"]
+
+
+class IngredientFilterSerializer(serializers.Serializer):
+    search = serializers.CharField(required=False, allow_blank=True, max_length=200)
+    supplier = serializers.IntegerField(required=False)
+    unit = serializers.CharField(required=False, max_length=50)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+
+
+class IngredientPriceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = IngredientPrice
+        fields = ["price_per_unit", "effective_from"]
+
+
+class PriceAtParamsSerializer(serializers.Serializer):
+    ingredient = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=MAX_INGREDIENTS)
+    at = serializers.DateTimeField(required=False)
+
+
+class PriceHistoryParamsSerializer(serializers.Serializer):
+    ingredient = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=MAX_INGREDIENTS)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
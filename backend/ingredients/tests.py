@@ -0,0 +1,23 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.test import TestCase
+from core.testing import create_supplier
+from .models import Ingredient
+
+
+class PriceHistoryTests(TestCase):
+    def test_partial_save_dates_the_price_change_now(self):
+        ingredient = create_supplier("Mill", ingredients=1).ingredients.get()
+        # As if the ingredient was loaded an hour after its last change.
+        stale = ingredient.updated_at - timedelta(hours=1)
+        Ingredient.objects.filter(pk=ingredient.pk).update(updated_at=stale)
+        ingredient.updated_at = stale
+
+        ingredient.price_per_unit = Decimal("9.99")
+        ingredient.save(update_fields=["price_per_unit"])
+
+        ingredient.refresh_from_db()
+        latest = ingredient.price_history.latest("effective_from")
+        self.assertEqual(latest.price_per_unit, Decimal("9.99"))
+        self.assertGreater(latest.effective_from, stale)
+        self.assertEqual(latest.effective_from, ingredient.updated_at)
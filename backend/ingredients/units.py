@@ -0,0 +1,41 @@
+"""Unit normalisation for comparing interchangeable ingredients.
+
+Each known unit maps to a base unit and the number of base units it
+holds, so prices and quantities from suppliers quoting in grams and
+kilograms (or millilitres and litres) can be compared. Units not listed
+only match themselves.
+"""
+from decimal import Decimal
+
+UNITS: dict[str, tuple[str, Decimal]] = {
+    "kg": ("kg", Decimal(1)),
+    "g": ("kg", Decimal("0.001")),
+    "mg": ("kg", Decimal("0.000001")),
+    "t": ("kg", Decimal(1000)),
+    "tonne": ("kg", Decimal(1000)),
+    "lb": ("kg", Decimal("0.45359237")),
+    "oz": ("kg", Decimal("0.028349523125")),
+    "litre": ("litre", Decimal(1)),
+    "l": ("litre", Decimal(1)),
+    "ml": ("litre", Decimal("0.001")),
+    "cl": ("litre", Decimal("0.01")),
+}
+
+
+def _key(unit: str) -> str:
+    return unit.strip().lower()
+
+
+def to_base(unit: str) -> tuple[str, Decimal] | None:
+    """``(base unit, base units per unit)`` for a known unit, else ``None``."""
+    return UNITS.get(_key(unit))
+
+
+def factor(unit: str, target: str) -> Decimal | None:
+    """How many ``target`` units one ``unit`` holds, or ``None`` if they don't convert."""
+    if _key(unit) == _key(target):
+        return Decimal(1)
+    source, target_base = to_base(unit), to_base(target)
+    if source is None or target_base is None or source[0] != target_base[0]:
+        return None
+    return source[1] / target_base[1]
@@ -1,6 +1,9 @@
 from django.urls import path
-from .views import IngredientListView
+from .views import IngredientListView, IngredientChangesView, IngredientPriceView, IngredientPriceHistoryView
 
 urlpatterns = [
     path("", IngredientListView.as_view(), name="ingredient-list"),
+    path("changes/", IngredientChangesView.as_view(), name="ingredient-changes"),
+    path("prices/", IngredientPriceView.as_view(), name="ingredient-prices"),
+    path("prices/history/", IngredientPriceHistoryView.as_view(), name="ingredient-price-history"),
 ]
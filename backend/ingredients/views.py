@@ -1,8 +1,123 @@
-from rest_framework.generics import ListAPIView
+from datetime import datetime, time, timedelta
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from core.async_views import AsyncListAPIView
+from core.cache import AsyncCatalogueCacheMixin
+from core.rendering import FastListMixin
+from core.routers import ReplicaReadMixin
+from core.sync import ChangesView
 from .models import Ingredient
-from .serializers import IngredientSerializer
+from .prices import price_series, prices_at
+from .search import build_match_query
+from .serializers import (
+    IngredientFilterSerializer,
+    IngredientPriceSerializer,
+    IngredientSerializer,
+    PriceAtParamsSerializer,
+    PriceHistoryParamsSerializer,
+)
 
 
-class IngredientListView(ListAPIView):
+class IngredientListView(ReplicaReadMixin, AsyncCatalogueCacheMixin, FastListMixin, AsyncListAPIView):
+    """Catalogue listing with optional search and filters.
+
+    ``?search=`` runs a prefix match over ingredient name, description and
+    supplier name against the FTS5 index and orders results by relevance.
+    ``?supplier=``, ``?unit=``, ``?min_price=`` and ``?max_price=`` narrow
+    the result set using plain indexed filters.
+    """
+
+    serializer_class = IngredientSerializer
+
+    def get_queryset(self):
+        filters = IngredientFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+
+        queryset = Ingredient.objects.select_related("supplier")
+        if "supplier" in params:
+            queryset = queryset.filter(supplier_id=params["supplier"])
+        if "unit" in params:
+            queryset = queryset.filter(unit=params["unit"])
+        if "min_price" in params:
+            queryset = queryset.filter(price_per_unit__gte=params["min_price"])
+        if "max_price" in params:
+            queryset = queryset.filter(price_per_unit__lte=params["max_price"])
+
+        match = build_match_query(params.get("search", ""))
+        if match is None:
+            return queryset
+        if connection.vendor == "sqlite":
+            # bm25: lower is more relevant, so rank ascending.
+            self.keyset_ordering = ("rank", "id")
+            return queryset.filter(search_index__document__match=match).annotate(rank=F("search_index__rank"))
+        term = params["search"].strip()
+        return queryset.filter(
+            Q(name__icontains=term) | Q(description__icontains=term) | Q(supplier__name__icontains=term)
+        )
+
+
+class IngredientChangesView(FastListMixin, ChangesView):
+    """Catalogue delta sync. Supplier renames arrive via ``/api/suppliers/changes/``."""
+
     serializer_class = IngredientSerializer
-    queryset = Ingredient.objects.select_related("supplier").all()
+    tombstone_models = (Ingredient,)
+
+    def get_queryset(self):
+        return Ingredient.objects.select_related("supplier")
+
+
+class IngredientPriceView(ReplicaReadMixin, APIView):
+    """Prices in effect at ``?at=`` (default now) for repeatable ``?ingredient=``.
+
+    Ingredients that didn't exist yet, or don't exist, get a null price.
+    """
+
+    def get(self, request: Request) -> Response:
+        params = PriceAtParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        ingredient_ids = list(dict.fromkeys(params.validated_data["ingredient"]))
+        at = params.validated_data.get("at") or timezone.now()
+
+        prices = prices_at(ingredient_ids, at)
+        results = []
+        for ingredient_id in ingredient_ids:
+            price = prices.get(ingredient_id)
+            results.append({
+                "ingredient_id": ingredient_id,
+                "price_per_unit": str(price.price_per_unit) if price else None,
+                "effective_from": price.effective_from if price else None,
+            })
+        return Response({"at": at, "results": results})
+
+
+class IngredientPriceHistoryView(ReplicaReadMixin, APIView):
+    """Price series for repeatable ``?ingredient=``, oldest change first.
+
+    ``?date_from=``/``?date_to=`` (inclusive) narrow the window; the first
+    point of each series is the price already in effect at ``date_from``.
+    """
+
+    def get(self, request: Request) -> Response:
+        params = PriceHistoryParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        ingredient_ids = list(dict.fromkeys(data["ingredient"]))
+        tz = timezone.get_current_timezone()
+        start = datetime.combine(data["date_from"], time.min, tzinfo=tz) if "date_from" in data else None
+        end = datetime.combine(data["date_to"] + timedelta(days=1), time.min, tzinfo=tz) if "date_to" in data else None
+
+        series = price_series(ingredient_ids, start, end)
+        return Response({
+            "results": [
+                {
+                    "ingredient_id": ingredient_id,
+                    "prices": IngredientPriceSerializer(series.get(ingredient_id, []), many=True).data,
+                }
+                for ingredient_id in ingredient_ids
+            ],
+        })
@@ -1,5 +1,9 @@
+import os
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = "django-insecure-code-challenge-template-change-in-production"
@@ -27,6 +31,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.ProfilingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -35,6 +40,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.routers.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "opply.urls"
@@ -57,11 +63,155 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "opply.wsgi.application"
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# SQLite by default; DATABASE_ENGINE=postgres plus the POSTGRES_* variables
+# for production. Connections are kept open between requests (see
+# CONN_MAX_AGE) and checked before reuse, rather than opened per request.
+DATABASE_ENGINE = os.environ.get("DATABASE_ENGINE", "sqlite")
+DATABASE_CONN_MAX_AGE = int(os.environ.get("DATABASE_CONN_MAX_AGE", "600"))
+
+if DATABASE_ENGINE == "postgres":
+    # With a pool, each process shares DATABASE_POOL_MAX_SIZE connections
+    # across its threads and requests hand them back when they finish.
+    # Django doesn't combine pooling with CONN_MAX_AGE, so setting the pool
+    # size to 0 falls back to one persistent connection per thread.
+    DATABASE_POOL_MAX_SIZE = int(os.environ.get("DATABASE_POOL_MAX_SIZE", "10"))
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("POSTGRES_DB", "opply"),
+            "USER": os.environ.get("POSTGRES_USER", "opply"),
+            "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+            "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+            "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+            "CONN_MAX_AGE": 0 if DATABASE_POOL_MAX_SIZE else DATABASE_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": (
+                {"pool": {"min_size": 1, "max_size": DATABASE_POOL_MAX_SIZE, "timeout": 10}}
+                if DATABASE_POOL_MAX_SIZE
+                else {}
+            ),
+        }
+    }
+    if os.environ.get("POSTGRES_REPLICA_HOST"):
+        DATABASES["replica"] = {
+            **DATABASES["default"],
+            "HOST": os.environ["POSTGRES_REPLICA_HOST"],
+            "PORT": os.environ.get("POSTGRES_REPLICA_PORT", DATABASES["default"]["PORT"]),
+            "TEST": {"MIRROR": "default"},
+        }
+elif DATABASE_ENGINE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+            "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                # Take the write lock at BEGIN so concurrent writers queue on
+                # busy_timeout. Under the default DEFERRED mode a transaction
+                # that reads first fails with "database is locked" as soon as
+                # it tries to write, without waiting.
+                "transaction_mode": "IMMEDIATE",
+                # WAL lets readers run alongside the single writer, and with
+                # WAL synchronous=NORMAL only risks the last commits on power
+                # loss, never corruption.
+                "init_command": (
+                    "PRAGMA journal_mode = WAL;"
+                    "PRAGMA synchronous = NORMAL;"
+                    f"PRAGMA busy_timeout = {int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))};"
+                ),
+            },
+        }
     }
+    if os.environ.get("SQLITE_REPLICA_PATH"):
+        DATABASES["replica"] = {
+            **DATABASES["default"],
+            "NAME": os.environ["SQLITE_REPLICA_PATH"],
+            "TEST": {"MIRROR": "default"},
+        }
+else:
+    raise ImproperlyConfigured(f"Unknown DATABASE_ENGINE {DATABASE_ENGINE!r}; use 'sqlite' or 'postgres'.")
+
+# Read-only views (see core.routers.ReplicaReadMixin) read from the
+# "replica" alias when one is configured above. After a write, that user's
+# reads stay on the primary for STICKY_SECONDS, which should exceed the
+# replication lag. CACHE holds those pins and must be shared by every worker,
+# or a user's next request can land on a worker that never saw the pin.
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+REPLICA_ROUTING = {
+    "ALIAS": "replica",
+    "STICKY_SECONDS": float(os.environ.get("DATABASE_REPLICA_STICKY_SECONDS", "5")),
+    "CACHE": "replica_pins",
+}
+
+# Backends for the caches below that other workers must see. "locmem" is
+# per-process, so use "file" when running several workers on one host.
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+}
+
+# Worker processes per host, as uvicorn and gunicorn read it.
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+
+CATALOGUE_CACHE_BACKEND = os.environ.get("CATALOGUE_CACHE_BACKEND", "file")
+if WEB_CONCURRENCY > 1 and CATALOGUE_CACHE_BACKEND == "locmem":
+    raise ImproperlyConfigured(
+        "CATALOGUE_CACHE_BACKEND=locmem would let each of the "
+        f"{WEB_CONCURRENCY} workers serve stale catalogue responses; use 'file'."
+    )
+
+REPLICA_PIN_CACHE_BACKEND = os.environ.get("REPLICA_PIN_CACHE_BACKEND", "file")
+if "replica" in DATABASES and WEB_CONCURRENCY > 1 and REPLICA_PIN_CACHE_BACKEND == "locmem":
+    raise ImproperlyConfigured(
+        "REPLICA_PIN_CACHE_BACKEND=locmem can't pin a user to the primary across "
+        f"{WEB_CONCURRENCY} workers; use 'file'."
+    )
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Catalogue responses (see core.cache), plus the catalogue and recipe
+    # versions that key ETags and cached costings.
+    "catalogue": {
+        "BACKEND": CACHE_BACKENDS[CATALOGUE_CACHE_BACKEND],
+        "LOCATION": os.environ.get("CATALOGUE_CACHE_LOCATION", str(BASE_DIR / ".cache" / "catalogue")),
+        "TIMEOUT": 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    "replica_pins": {
+        "BACKEND": CACHE_BACKENDS[REPLICA_PIN_CACHE_BACKEND],
+        "LOCATION": os.environ.get("REPLICA_PIN_CACHE_LOCATION", str(BASE_DIR / ".cache" / "replica-pins")),
+    },
+}
+
+# Per-request SQL/timing instrumentation (see core.middleware). Off unless
+# REQUEST_PROFILING_ENABLED=1; lower the sample rate in production.
+REQUEST_PROFILING = {
+    "ENABLED": os.environ.get("REQUEST_PROFILING_ENABLED", "0") == "1",
+    "SAMPLE_RATE": float(os.environ.get("REQUEST_PROFILING_SAMPLE_RATE", "1.0")),
+    "DUPLICATE_THRESHOLD": int(os.environ.get("REQUEST_PROFILING_DUPLICATE_THRESHOLD", "3")),
+}
+
+# How long a stored response is replayed for a repeated Idempotency-Key
+# (see core.idempotency). Expired keys are removed by purge_idempotency_keys.
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.environ.get("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+
+# Process-local token → (user, buyer) cache used by CachedTokenAuthentication.
+# Changes made in other processes are seen after at most TTL_SECONDS.
+TOKEN_AUTH_CACHE = {
+    "MAX_ENTRIES": int(os.environ.get("TOKEN_AUTH_CACHE_MAX_ENTRIES", "10000")),
+    "TTL_SECONDS": float(os.environ.get("TOKEN_AUTH_CACHE_TTL_SECONDS", "60")),
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "core.profiling": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -84,13 +234,16 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
 ]
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
 
 # Django REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "core.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
+    "PAGE_SIZE": 50,
 }
@@ -0,0 +1,177 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from suppliers.models import Supplier
+from .models import LeadTimeRollup, Order, OrderEvent, OrderItem, OrderStatus, RollupWatermark
+
+LEAD_TIME_ROLLUP = "lead_times"
+EVENT_BATCH_SIZE = 2000
+# Ids from a sequence can commit out of order under concurrent writers, so
+# on such databases only events older than this are folded; a watermark past
+# a still-open transaction's id would skip its event forever. SQLite
+# serialises writers, so it needs no delay.
+SETTLE_DELAY = timedelta(seconds=30)
+# Keeps every ``IN (...)`` list under SQLite's bound-parameter limit.
+ID_CHUNK_SIZE = 900
+
+
+class RollupContention(Exception):
+    """Another process advanced the watermark first; its batch wins."""
+
+
+def _chunks(ids: list[int]):
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        yield ids[start:start + ID_CHUNK_SIZE]
+
+
+def _fold_batch(events: list[tuple[int, int, str, datetime]]) -> None:
+    """Add one batch of events to the lead-time histograms.
+
+    Every event closes one interval per status the order had already reached:
+    from PENDING (the order's ``created_at``) and from each earlier event's
+    ``to_status``. Orders spanning several suppliers count once for each.
+    """
+    order_ids = sorted({order_id for _, order_id, _, _ in events})
+    first_id = events[0][0]
+    created: dict[int, tuple[int, datetime]] = {}
+    suppliers: dict[int, set[int]] = defaultdict(set)
+    milestones: dict[int, dict[str, datetime]] = defaultdict(dict)
+    for chunk in _chunks(order_ids):
+        for pk, buyer_id, created_at in Order.objects.filter(pk__in=chunk).values_list("pk", "buyer_id", "created_at"):
+            created[pk] = (buyer_id, created_at)
+            milestones[pk][OrderStatus.PENDING] = created_at
+        lines = OrderItem.objects.filter(order_id__in=chunk).values_list("order_id", "ingredient__supplier_id").distinct()
+        for order_id, supplier_id in lines:
+            suppliers[order_id].add(supplier_id)
+        earlier = OrderEvent.objects.filter(order_id__in=chunk, pk__lt=first_id).order_by("pk")
+        for order_id, to_status, created_at in earlier.values_list("order_id", "to_status", "created_at"):
+            milestones[order_id][to_status] = created_at
+
+    increments: dict[tuple, list[int]] = defaultdict(lambda: [0, 0])
+    for _, order_id, to_status, reached in events:
+        if order_id not in created:
+            continue
+        buyer_id = created[order_id][0]
+        day = timezone.localdate(reached)
+        for from_status, since in milestones[order_id].items():
+            if from_status == to_status:
+                continue
+            seconds = max(0, int((reached - since).total_seconds()))
+            for supplier_id in suppliers[order_id]:
+                bucket = increments[(buyer_id, from_status, to_status, day, supplier_id, seconds // 3600)]
+                bucket[0] += 1
+                bucket[1] += seconds
+        milestones[order_id][to_status] = reached
+
+    # Rollup rows are deltas: a bucket may have one row per batch, and
+    # readers always SUM. Nothing is read back, so folding stays append-only.
+    LeadTimeRollup.objects.bulk_create(
+        [
+            LeadTimeRollup(
+                buyer_id=buyer_id,
+                from_status=from_status,
+                to_status=to_status,
+                day=day,
+                supplier_id=supplier_id,
+                hours=hours,
+                count=count,
+                total_seconds=seconds,
+            )
+            for (buyer_id, from_status, to_status, day, supplier_id, hours), (count, seconds) in increments.items()
+        ],
+        batch_size=1000,
+    )
+
+
+def refresh_lead_times() -> int:
+    """Fold events newer than the watermark into ``LeadTimeRollup``.
+
+    Only unseen events are read, so the cost follows the number of
+    transitions since the last refresh, not the size of the log. Each batch
+    commits together with its watermark move, which is itself a conditional
+    update: if another process got there first, this one stops. Returns the
+    number of events folded in.
+    """
+    watermark, _ = RollupWatermark.objects.get_or_create(name=LEAD_TIME_ROLLUP)
+    last_id = watermark.last_event_id
+    folded = 0
+    while True:
+        events = list(
+            OrderEvent.objects.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", "order_id", "to_status", "created_at")[:EVENT_BATCH_SIZE]
+        )
+        if connection.vendor != "sqlite":
+            cutoff = timezone.now() - SETTLE_DELAY
+            settled = next((i for i, event in enumerate(events) if event[3] > cutoff), len(events))
+            events = events[:settled]
+        if not events:
+            return folded
+        new_last_id = events[-1][0]
+        try:
+            with transaction.atomic():
+                # Claim the batch first so concurrent refreshers serialise here.
+                claimed = RollupWatermark.objects.filter(name=LEAD_TIME_ROLLUP, last_event_id=last_id).update(
+                    last_event_id=new_last_id
+                )
+                if not claimed:
+                    raise RollupContention
+                _fold_batch(events)
+        except RollupContention:
+            return folded
+        last_id = new_last_id
+        folded += len(events)
+
+
+def _percentile(histogram: list[tuple[int, int]], fraction: float) -> int:
+    """Lowest hour bucket holding at least ``fraction`` of the observations."""
+    total = sum(count for _, count in histogram)
+    threshold = fraction * total
+    running = 0
+    for hours, count in histogram:
+        running += count
+        if running >= threshold:
+            return hours
+    return histogram[-1][0]
+
+
+def lead_time_summary(
+    buyer_id: int, from_status: str, to_status: str, date_from: date | None = None, date_to: date | None = None
+) -> list[dict]:
+    """Per-supplier lead times from the rollup histograms (hour resolution).
+
+    Read-only: events reach the histograms when ``refresh_lead_times`` runs,
+    via the management command of the same name.
+    """
+    rows = LeadTimeRollup.objects.filter(buyer_id=buyer_id, from_status=from_status, to_status=to_status)
+    if date_from is not None:
+        rows = rows.filter(day__gte=date_from)
+    if date_to is not None:
+        rows = rows.filter(day__lte=date_to)
+
+    histograms: dict[int, list[tuple[int, int]]] = defaultdict(list)
+    seconds: dict[int, int] = defaultdict(int)
+    bucketed = (
+        rows.values("supplier_id", "hours")
+        .annotate(n=Sum("count"), s=Sum("total_seconds"))
+        .order_by("supplier_id", "hours")
+    )
+    for row in bucketed:
+        histograms[row["supplier_id"]].append((row["hours"], row["n"]))
+        seconds[row["supplier_id"]] += row["s"]
+
+    names = dict(Supplier.objects.filter(pk__in=list(histograms)).values_list("pk", "name"))
+    summary = []
+    for supplier_id, histogram in histograms.items():
+        count = sum(n for _, n in histogram)
+        summary.append({
+            "supplier_id": supplier_id,
+            "supplier_name": names.get(supplier_id),
+            "orders": count,
+            "median_hours": _percentile(histogram, 0.5),
+            "p90_hours": _percentile(histogram, 0.9),
+            "mean_hours": round(seconds[supplier_id] / count / 3600, 1),
+        })
+    return sorted(summary, key=lambda row: row["supplier_name"] or "")
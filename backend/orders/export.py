@@ -0,0 +1,126 @@
+import csv
+from collections.abc import AsyncIterator, Iterable, Iterator
+from itertools import islice
+from json.encoder import encode_basestring_ascii
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from .models import OrderItem
+
+EXPORT_FIELDS = [
+    "order_id",
+    "status",
+    "created_at",
+    "updated_at",
+    "ingredient_id",
+    "ingredient_name",
+    "supplier_id",
+    "supplier_name",
+    "quantity",
+    "unit_price",
+    "line_total",
+]
+
+# One NDJSON line with a %s slot per field, laid out exactly as json.dumps
+# writes a dict (", " and ": " separators).
+NDJSON_LINE = "{" + ", ".join(f"{encode_basestring_ascii(name)}: %s" for name in EXPORT_FIELDS) + "}\n"
+
+# Rows fetched per database round trip, and rows joined into each chunk
+# handed to the server.
+FETCH_SIZE = 2000
+WRITE_SIZE = 500
+
+
+class Echo:
+    """File-like object whose ``write`` just hands the value back (for csv.writer)."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def export_rows(queryset: QuerySet[OrderItem]) -> Iterator[list]:
+    """Yield one flat row per order item, reading the database in chunks."""
+    rows = queryset.order_by("order_id", "id").values_list(
+        "order_id",
+        "order__status",
+        "order__created_at",
+        "order__updated_at",
+        "ingredient_id",
+        "ingredient__name",
+        "ingredient__supplier_id",
+        "ingredient__supplier__name",
+        "quantity",
+        "unit_price",
+    )
+    for (order_id, status, created_at, updated_at, ingredient_id, ingredient_name,
+         supplier_id, supplier_name, quantity, unit_price) in rows.iterator(chunk_size=FETCH_SIZE):
+        yield [
+            order_id,
+            status,
+            created_at.isoformat(),
+            updated_at.isoformat(),
+            ingredient_id,
+            ingredient_name,
+            supplier_id,
+            supplier_name,
+            quantity,
+            str(unit_price),
+            str(unit_price * quantity),
+        ]
+
+
+def _batched(lines: Iterable[str]) -> Iterator[str]:
+    batch: list[str] = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= WRITE_SIZE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def stream_csv(rows: Iterable[list]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    yield from _batched(writer.writerow(row) for row in rows)
+
+
+def ndjson_line(row: list) -> str:
+    """``json.dumps(dict(zip(EXPORT_FIELDS, row))) + "\\n"`` without building the dict.
+
+    Ids and quantities are ints and everything else is text, so each value
+    is either written as is or escaped with json's own string encoder.
+    """
+    (order_id, status, created_at, updated_at, ingredient_id, ingredient_name,
+     supplier_id, supplier_name, quantity, unit_price, line_total) = row
+    return NDJSON_LINE % (
+        order_id,
+        encode_basestring_ascii(status),
+        encode_basestring_ascii(created_at),
+        encode_basestring_ascii(updated_at),
+        ingredient_id,
+        encode_basestring_ascii(ingredient_name),
+        supplier_id,
+        encode_basestring_ascii(supplier_name),
+        quantity,
+        encode_basestring_ascii(unit_price),
+        encode_basestring_ascii(line_total),
+    )
+
+
+def stream_ndjson(rows: Iterable[list]) -> Iterator[str]:
+    yield from _batched(ndjson_line(row) for row in rows)
+
+
+async def aiter_chunks(chunks: Iterator[str]) -> AsyncIterator[str]:
+    """Serve ``stream_csv``/``stream_ndjson`` output to an ASGI server.
+
+    Given a sync iterator, Django's ASGI handler reads the whole of it into a
+    list before sending anything. This takes one fetch's worth of chunks per
+    trip to the request's sync thread instead, so the cursor stays on that
+    thread's connection and only ``FETCH_SIZE`` rows are held at a time.
+    """
+    take = sync_to_async(lambda count: list(islice(chunks, count)))
+    while batch := await take(max(FETCH_SIZE // WRITE_SIZE, 1)):
+        for chunk in batch:
+            yield chunk
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("buyers", "0001_initial"),
+        ("orders", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["buyer", "created_at", "id"], name="order_buyer_created_idx"),
+        ),
+    ]
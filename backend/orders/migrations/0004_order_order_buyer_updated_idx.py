@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("buyers", "0001_initial"),
+        ("orders", "0003_order_events"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["buyer", "updated_at", "id"], name="order_buyer_updated_idx"),
+        ),
+    ]
@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_spend(apps, schema_editor):
+    OrderItem = apps.get_model("orders", "OrderItem")
+    SpendRollup = apps.get_model("orders", "SpendRollup")
+    buckets = (
+        OrderItem.objects.values(
+            "order__buyer_id",
+            "ingredient__supplier_id",
+            "ingredient_id",
+            "order__status",
+            day=TruncDate("order__created_at"),
+        )
+        .annotate(total_quantity=Sum("quantity"), amount=Sum(F("unit_price") * F("quantity")), line_count=Count("id"))
+        .order_by()
+    )
+    SpendRollup.objects.bulk_create(
+        (
+            SpendRollup(
+                buyer_id=bucket["order__buyer_id"],
+                day=bucket["day"],
+                supplier_id=bucket["ingredient__supplier_id"],
+                ingredient_id=bucket["ingredient_id"],
+                status=bucket["order__status"],
+                quantity=bucket["total_quantity"],
+                amount_cents=round(Decimal(str(bucket["amount"])) * 100),
+                lines=bucket["line_count"],
+            )
+            for bucket in buckets.iterator(chunk_size=5000)
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("buyers", "0001_initial"),
+        ("ingredients", "0005_ingredient_updated_at"),
+        ("orders", "0004_order_order_buyer_updated_idx"),
+        ("suppliers", "0003_supplier_updated_at_supplier_supplier_updated_id_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SpendRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("CONFIRMED", "Confirmed"),
+                            ("PROCESSING", "Processing"),
+                            ("SHIPPED", "Shipped"),
+                            ("DELIVERED", "Delivered"),
+                            ("CANCELLED", "Cancelled"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("quantity", models.BigIntegerField(default=0)),
+                ("amount_cents", models.BigIntegerField(default=0)),
+                ("lines", models.IntegerField(default=0)),
+                (
+                    "buyer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="buyers.buyer",
+                    ),
+                ),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="ingredients.ingredient",
+                    ),
+                ),
+                (
+                    "supplier",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="suppliers.supplier",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("buyer", "day", "supplier", "ingredient", "status"),
+                        name="spend_rollup_bucket_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_spend, migrations.RunPython.noop),
+    ]
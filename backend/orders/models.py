@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from buyers.models import Buyer
 from ingredients.models import Ingredient
+from suppliers.models import Supplier
 
 
 class OrderStatus(models.TextChoices):
@@ -22,6 +24,15 @@ VALID_TRANSITIONS: dict[str, list[str]] = {
 }
 
 
+def sources_for(new_status: str) -> list[str]:
+    """Statuses from which ``new_status`` may be reached."""
+    return [source for source, targets in VALID_TRANSITIONS.items() if new_status in targets]
+
+
+class TransitionConflict(ValueError):
+    """The order's status changed after it was read."""
+
+
 class Order(models.Model):
     buyer = models.ForeignKey(Buyer, on_delete=models.CASCADE, related_name="orders")
     status = models.CharField(
@@ -32,6 +43,12 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["buyer", "created_at", "id"], name="order_buyer_created_idx"),
+            models.Index(fields=["buyer", "updated_at", "id"], name="order_buyer_updated_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"Order #{self.pk} [{self.status}] — {self.buyer}"
 
@@ -39,8 +56,18 @@ class Order(models.Model):
         allowed = VALID_TRANSITIONS.get(self.status, [])
         if new_status not in allowed:
             raise ValueError(f"Cannot transition from {self.status} to {new_status}")
+        from .spend import record_transitions
+
+        # Conditional update: a concurrent transition makes this match no
+        # row instead of being silently overwritten.
+        now = timezone.now()
+        with transaction.atomic():
+            if not Order.objects.filter(pk=self.pk, status=self.status).update(status=new_status, updated_at=now):
+                raise TransitionConflict(f"Order #{self.pk} is no longer {self.status}")
+            event = OrderEvent.objects.create(order=self, from_status=self.status, to_status=new_status, created_at=now)
+            record_transitions([event])
         self.status = new_status
-        self.save()
+        self.updated_at = now
 
 
 class OrderItem(models.Model):
@@ -51,3 +78,76 @@ class OrderItem(models.Model):
 
     def __str__(self) -> str:
         return f"{self.quantity}x {self.ingredient.name} @ {self.unit_price}"
+
+
+class OrderEvent(models.Model):
+    """One status transition. Append-only: rows are never updated or deleted."""
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="events")
+    from_status = models.CharField(max_length=20, choices=OrderStatus.choices)
+    to_status = models.CharField(max_length=20, choices=OrderStatus.choices)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["order", "created_at"], name="orderevent_order_created_idx")]
+
+    def __str__(self) -> str:
+        return f"Order #{self.order_id}: {self.from_status} → {self.to_status}"
+
+
+class LeadTimeRollup(models.Model):
+    """Histogram of hours between two statuses, per buyer, supplier and day.
+
+    ``day`` is the date the later status was reached. Rows are deltas
+    appended by ``orders.events.refresh_lead_times`` (the
+    ``refresh_lead_times`` command) as new ``OrderEvent`` rows arrive, so
+    one bucket may span several rows; always aggregate.
+    """
+
+    buyer = models.ForeignKey(Buyer, on_delete=models.CASCADE, related_name="+")
+    supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, related_name="+")
+    from_status = models.CharField(max_length=20, choices=OrderStatus.choices)
+    to_status = models.CharField(max_length=20, choices=OrderStatus.choices)
+    day = models.DateField()
+    hours = models.PositiveIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    total_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["buyer", "from_status", "to_status", "day"], name="leadtime_rollup_lookup_idx"),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """Highest event id already folded into a rollup."""
+
+    name = models.CharField(max_length=50, unique=True)
+    last_event_id = models.BigIntegerField(default=0)
+
+
+class SpendRollup(models.Model):
+    """Spend per buyer, order day, supplier, ingredient and current order status.
+
+    Maintained by ``orders.spend`` in the same transaction as order creation
+    and every status change, which move an order's lines between status
+    buckets. ``day`` is the day the order was placed. Amounts are whole
+    cents so the incremental additions stay exact on every database.
+    """
+
+    buyer = models.ForeignKey(Buyer, on_delete=models.CASCADE, related_name="+")
+    day = models.DateField()
+    supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, related_name="+")
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE, related_name="+")
+    status = models.CharField(max_length=20, choices=OrderStatus.choices)
+    quantity = models.BigIntegerField(default=0)
+    amount_cents = models.BigIntegerField(default=0)
+    lines = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Leads with (buyer, day) so it also serves the date-range reads.
+            models.UniqueConstraint(
+                fields=["buyer", "day", "supplier", "ingredient", "status"], name="spend_rollup_bucket_uniq"
+            ),
+        ]
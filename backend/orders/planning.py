@@ -0,0 +1,140 @@
+from collections import defaultdict
+from decimal import ROUND_CEILING, Decimal
+from django.db import transaction
+from ingredients.models import Ingredient
+from products.models import Product
+from products.sourcing import plan_lines, plan_sourcing
+from .models import Order, OrderItem
+from .spend import record_created
+
+# Keeps every ``IN (...)`` list under SQLite's bound-parameter limit.
+ID_CHUNK_SIZE = 900
+QUANTITY_PLACES = Decimal("0.001")
+
+
+def _chunks(ids: list[int]):
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        yield ids[start:start + ID_CHUNK_SIZE]
+
+
+def unknown_products(buyer_id: int, product_ids: list[int]) -> list[int]:
+    found: set[int] = set()
+    for chunk in _chunks(product_ids):
+        found.update(Product.objects.filter(buyer_id=buyer_id, pk__in=chunk).values_list("pk", flat=True))
+    return sorted(set(product_ids) - found)
+
+
+def _top_up(group: dict) -> None:
+    """Buy whole extra units of the group's cheapest line up to the supplier's minimum.
+
+    The cheapest line overshoots the minimum by less than one of its units.
+    """
+    shortfall = group["minimum_order_value"] - group["total_amount"]
+    priced = [item for item in group["items"] if item["unit_price"] > 0]
+    if shortfall <= 0 or not priced:
+        return
+    item = min(priced, key=lambda item: (item["unit_price"], item["ingredient"].pk))
+    extra = int((shortfall / item["unit_price"]).to_integral_value(rounding=ROUND_CEILING))
+    item["top_up_quantity"] = extra
+    item["quantity"] += extra
+    item["line_total"] += item["unit_price"] * extra
+    group["total_amount"] += item["unit_price"] * extra
+
+
+def explode_plan(buyer_id: int, plan: dict[int, Decimal], optimize: bool = False) -> list[dict]:
+    """Turn "make N units of each product" into per-supplier purchase lists.
+
+    The database sums the demand per ingredient (``plan_lines``), and
+    ingredient prices and suppliers are then resolved in one more query.
+    Order quantities are whole units, rounded up from the exact demand. With
+    ``optimize``, each line may be bought as any ingredient in its group,
+    picked by ``products.sourcing.plan_sourcing``. That choice counts
+    minimum order top-ups as spent, so orders still below a supplier's
+    minimum are topped up here (``top_up_quantity``) and placed that way.
+    """
+    if optimize:
+        demand = plan_sourcing(buyer_id, plan)
+    else:
+        demand = defaultdict(Decimal)
+        for ingredient_id, quantity in plan_lines(buyer_id, plan, "ingredient_id"):
+            demand[ingredient_id] += quantity
+
+    ingredients = Ingredient.objects.select_related("supplier").in_bulk(list(demand))
+    groups: dict[int, dict] = {}
+    for ingredient_id, required in demand.items():
+        ingredient = ingredients[ingredient_id]
+        group = groups.get(ingredient.supplier_id)
+        if group is None:
+            group = groups[ingredient.supplier_id] = {
+                "order_id": None,
+                "supplier_id": ingredient.supplier_id,
+                "supplier_name": ingredient.supplier.name,
+                "minimum_order_value": ingredient.supplier.minimum_order_value,
+                "total_amount": Decimal("0.00"),
+                "items": [],
+            }
+        order_quantity = int(required.to_integral_value(rounding=ROUND_CEILING))
+        line_total = ingredient.price_per_unit * order_quantity
+        group["total_amount"] += line_total
+        group["items"].append({
+            "ingredient": ingredient,
+            "required_quantity": required,
+            "quantity": order_quantity,
+            "top_up_quantity": 0,
+            "unit_price": ingredient.price_per_unit,
+            "line_total": line_total,
+        })
+
+    for group in groups.values():
+        group["items"].sort(key=lambda item: item["ingredient"].name)
+        if optimize:
+            _top_up(group)
+    return sorted(groups.values(), key=lambda group: group["supplier_name"])
+
+
+def place_plan_orders(buyer_id: int, groups: list[dict]) -> None:
+    """Write one PENDING order per supplier group, filling in ``order_id``."""
+    with transaction.atomic():
+        orders = Order.objects.bulk_create([Order(buyer_id=buyer_id) for _ in groups])
+        items = []
+        for order, group in zip(orders, groups):
+            group["order_id"] = order.pk
+            items.extend(
+                OrderItem(
+                    order=order,
+                    ingredient=item["ingredient"],
+                    quantity=item["quantity"],
+                    unit_price=item["unit_price"],
+                )
+                for item in group["items"]
+            )
+        OrderItem.objects.bulk_create(items, batch_size=2000)
+        record_created(orders, items)
+
+
+def render_plan(groups: list[dict]) -> list[dict]:
+    return [
+        {
+            "order_id": group["order_id"],
+            "supplier_id": group["supplier_id"],
+            "supplier_name": group["supplier_name"],
+            "item_count": len(group["items"]),
+            "total_amount": str(group["total_amount"]),
+            "minimum_order_value": str(group["minimum_order_value"]),
+            "below_minimum": group["total_amount"] < group["minimum_order_value"],
+            "items": [
+                {
+                    "ingredient_id": item["ingredient"].pk,
+                    "name": item["ingredient"].name,
+                    "unit": item["ingredient"].unit,
+                    "required_quantity": str(item["required_quantity"].quantize(QUANTITY_PLACES)),
+                    "quantity": item["quantity"],
+                    "top_up_quantity": item["top_up_quantity"],
+                    "unit_price": str(item["unit_price"]),
+                    "line_total": str(item["line_total"]),
+                }
+                for item in group["items"]
+            ],
+        }
+        for group in groups
+    ]
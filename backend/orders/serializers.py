@@ -1,7 +1,7 @@
 from decimal import Decimal
 from rest_framework import serializers
 from ingredients.serializers import IngredientSerializer
-from .models import Order, OrderItem
+from .models import Order, OrderEvent, OrderItem, OrderStatus
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -22,30 +22,98 @@ class OrderItemCreateSerializer(serializers.Serializer):
 
 
 class OrderSerializer(serializers.ModelSerializer):
-    item_count = serializers.SerializerMethodField()
-    total_amount = serializers.SerializerMethodField()
+    # Annotated onto the list queryset in SQL (see OrderListCreateView).
+    item_count = serializers.IntegerField(read_only=True)
+    total_amount = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
 
     class Meta:
         model = Order
         fields = ["id", "status", "created_at", "item_count", "total_amount"]
 
+
+class OrderDetailSerializer(OrderSerializer):
+    # The detail payload loads every item anyway, so the aggregates are
+    # computed from those rows rather than from annotations.
+    item_count = serializers.SerializerMethodField()
+    total_amount = serializers.SerializerMethodField()
+    items = OrderItemSerializer(many=True, read_only=True)
+
+    class Meta(OrderSerializer.Meta):
+        fields = OrderSerializer.Meta.fields + ["items", "updated_at"]
+
     def get_item_count(self, obj: Order) -> int:
-        return obj.items.count()
+        return len(obj.items.all())
 
     def get_total_amount(self, obj: Order) -> str:
         total = sum(
-            Decimal(str(item.unit_price)) * item.quantity
-            for item in obj.items.all()
+            (Decimal(str(item.unit_price)) * item.quantity for item in obj.items.all()),
+            Decimal("0.00"),
         )
         return str(total)
 
 
-class OrderDetailSerializer(OrderSerializer):
-    items = OrderItemSerializer(many=True, read_only=True)
+class OrderCreateSerializer(serializers.Serializer):
+    items = OrderItemCreateSerializer(many=True)
 
-    class Meta(OrderSerializer.Meta):
-        fields = OrderSerializer.Meta.fields + ["items", "updated_at"]
 
+class ProductionPlanLineSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    quantity = serializers.DecimalField(max_digits=12, decimal_places=3, min_value=Decimal("0.001"))
 
-class OrderCreateSerializer(serializers.Serializer):
-    items = OrderItemCreateSerializer(many=True)
+
+class ProductionPlanSerializer(serializers.Serializer):
+    products = ProductionPlanLineSerializer(many=True, allow_empty=False)
+    dry_run = serializers.BooleanField(default=False)
+    # Source each line from the cheapest interchangeable ingredient.
+    optimize = serializers.BooleanField(default=False)
+
+
+class OrderExportParamsSerializer(serializers.Serializer):
+    output = serializers.ChoiceField(choices=["ndjson", "csv"], default="ndjson")
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    status = serializers.ListField(child=serializers.ChoiceField(choices=OrderStatus.choices), required=False)
+
+
+class OrderTransitionSerializer(serializers.Serializer):
+    order_id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=OrderStatus.choices)
+    expected_status = serializers.ChoiceField(choices=OrderStatus.choices, required=False)
+
+
+class BatchTransitionSerializer(serializers.Serializer):
+    transitions = OrderTransitionSerializer(many=True, allow_empty=False, max_length=10000)
+
+    def validate_transitions(self, value: list[dict]) -> list[dict]:
+        order_ids = [entry["order_id"] for entry in value]
+        if len(set(order_ids)) != len(order_ids):
+            raise serializers.ValidationError("Each order may appear only once.")
+        return value
+
+
+class OrderEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderEvent
+        fields = ["id", "from_status", "to_status", "created_at"]
+
+
+class LeadTimeParamsSerializer(serializers.Serializer):
+    from_status = serializers.ChoiceField(choices=OrderStatus.choices, default=OrderStatus.PENDING.value)
+    to_status = serializers.ChoiceField(choices=OrderStatus.choices, default=OrderStatus.DELIVERED.value)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+
+class SpendParamsSerializer(serializers.Serializer):
+    group_by = serializers.ListField(
+        child=serializers.ChoiceField(choices=["supplier", "ingredient", "month", "day", "status"]), required=False
+    )
+    status = serializers.ListField(child=serializers.ChoiceField(choices=OrderStatus.choices), required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    supplier = serializers.IntegerField(required=False)
+
+    def validate_group_by(self, value: list[str]) -> list[str]:
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("Each grouping may appear only once.")
+        return value
@@ -0,0 +1,218 @@
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+from ingredients.models import Ingredient
+from suppliers.models import Supplier
+from .models import Order, OrderEvent, OrderItem, SpendRollup
+
+# Keeps every ``IN (...)`` list under SQLite's bound-parameter limit.
+ID_CHUNK_SIZE = 900
+GROUP_FIELDS = {
+    "supplier": "supplier_id",
+    "ingredient": "ingredient_id",
+    "status": "status",
+    "month": "month",
+    "day": "day",
+}
+
+# (buyer_id, day, supplier_id, ingredient_id, status) -> [quantity, cents, lines]
+Deltas = dict[tuple[int, date, int, int, str], list[int]]
+
+
+def _chunks(ids: list[int]):
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        yield ids[start:start + ID_CHUNK_SIZE]
+
+
+def _cents(amount) -> int:
+    # str() first: SQLite sums decimals as floats, and unsaved rows may hold strings.
+    return round(Decimal(str(amount)) * 100)
+
+
+def _apply(deltas: Deltas) -> None:
+    """Add ``deltas`` to their rollup buckets with one upsert per batch.
+
+    ``INSERT ... ON CONFLICT DO UPDATE`` increments in place on both SQLite
+    and PostgreSQL, so concurrent writers never read-modify-write a bucket.
+    Rows go in key order, so two transactions upserting overlapping buckets
+    lock them in the same order and can't deadlock.
+    """
+    rows = [
+        (buyer_id, day, supplier_id, ingredient_id, status, quantity, cents, lines)
+        for (buyer_id, day, supplier_id, ingredient_id, status), (quantity, cents, lines) in sorted(deltas.items())
+        if quantity or cents or lines
+    ]
+    if not rows:
+        return
+    table = connection.ops.quote_name(SpendRollup._meta.db_table)
+    sql = (
+        f"INSERT INTO {table} (buyer_id, day, supplier_id, ingredient_id, status, quantity, amount_cents, lines) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s) "
+        "ON CONFLICT (buyer_id, day, supplier_id, ingredient_id, status) DO UPDATE SET "
+        f"quantity = {table}.quantity + excluded.quantity, "
+        f"amount_cents = {table}.amount_cents + excluded.amount_cents, "
+        f"lines = {table}.lines + excluded.lines"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def record_created(orders: Iterable[Order], items: Iterable[OrderItem]) -> None:
+    """Count new orders' lines; call inside the transaction that wrote them.
+
+    ``items`` must carry their ``ingredient`` (only ``supplier_id`` is read).
+    """
+    orders_by_id = {order.pk: order for order in orders}
+    deltas: Deltas = defaultdict(lambda: [0, 0, 0])
+    for item in items:
+        order = orders_by_id[item.order_id]
+        day = timezone.localdate(order.created_at)
+        bucket = deltas[(order.buyer_id, day, item.ingredient.supplier_id, item.ingredient_id, order.status)]
+        bucket[0] += item.quantity
+        bucket[1] += _cents(Decimal(str(item.unit_price)) * item.quantity)
+        bucket[2] += 1
+    _apply(deltas)
+
+
+def record_transitions(events: Iterable[OrderEvent]) -> None:
+    """Move transitioned orders' lines to their new status bucket.
+
+    Call inside the transaction that changed the statuses. One grouped
+    query per chunk of orders reads the lines.
+    """
+    moves = {event.order_id: (event.from_status, event.to_status) for event in events}
+    deltas: Deltas = defaultdict(lambda: [0, 0, 0])
+    for chunk in _chunks(list(moves)):
+        lines = (
+            OrderItem.objects.filter(order_id__in=chunk)
+            .values("order_id", "order__buyer_id", "order__created_at", "ingredient_id", "ingredient__supplier_id")
+            .annotate(
+                total_quantity=Sum("quantity"), amount=Sum(F("unit_price") * F("quantity")), line_count=Count("id")
+            )
+            .order_by()
+        )
+        for line in lines:
+            from_status, to_status = moves[line["order_id"]]
+            day = timezone.localdate(line["order__created_at"])
+            key = (line["order__buyer_id"], day, line["ingredient__supplier_id"], line["ingredient_id"])
+            cents = _cents(line["amount"])
+            for status, sign in ((from_status, -1), (to_status, 1)):
+                bucket = deltas[(*key, status)]
+                bucket[0] += sign * line["total_quantity"]
+                bucket[1] += sign * cents
+                bucket[2] += sign * line["line_count"]
+    _apply(deltas)
+
+
+def rebuild_spend_rollups(buyer_id: int | None = None) -> int:
+    """Recompute the rollup from ``OrderItem``; returns the number of buckets.
+
+    Also compacts buckets that transitions have emptied. On PostgreSQL the
+    table is locked against writes for the duration, so orders created or
+    moved meanwhile are counted exactly once; SQLite already serialises
+    writers.
+    """
+    items = OrderItem.objects.all()
+    rollups = SpendRollup.objects.all()
+    if buyer_id is not None:
+        items = items.filter(order__buyer_id=buyer_id)
+        rollups = rollups.filter(buyer_id=buyer_id)
+    buckets = (
+        items.values(
+            "order__buyer_id",
+            "ingredient__supplier_id",
+            "ingredient_id",
+            "order__status",
+            day=TruncDate("order__created_at"),
+        )
+        .annotate(total_quantity=Sum("quantity"), amount=Sum(F("unit_price") * F("quantity")), line_count=Count("id"))
+        .order_by()
+    )
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"LOCK TABLE {connection.ops.quote_name(SpendRollup._meta.db_table)} IN EXCLUSIVE MODE")
+        rollups.delete()
+        batch: list[SpendRollup] = []
+        count = 0
+        for bucket in buckets.iterator(chunk_size=5000):
+            batch.append(SpendRollup(
+                buyer_id=bucket["order__buyer_id"],
+                day=bucket["day"],
+                supplier_id=bucket["ingredient__supplier_id"],
+                ingredient_id=bucket["ingredient_id"],
+                status=bucket["order__status"],
+                quantity=bucket["total_quantity"],
+                amount_cents=_cents(bucket["amount"]),
+                lines=bucket["line_count"],
+            ))
+            if len(batch) >= 5000:
+                SpendRollup.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        SpendRollup.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
+
+def spend_summary(
+    buyer_id: int,
+    group_by: list[str],
+    statuses: list[str],
+    date_from: date | None = None,
+    date_to: date | None = None,
+    supplier_id: int | None = None,
+) -> list[dict]:
+    """Spend grouped by any of ``GROUP_FIELDS``, read from the rollup only."""
+    rows = SpendRollup.objects.filter(buyer_id=buyer_id, status__in=statuses)
+    if date_from is not None:
+        rows = rows.filter(day__gte=date_from)
+    if date_to is not None:
+        rows = rows.filter(day__lte=date_to)
+    if supplier_id is not None:
+        rows = rows.filter(supplier_id=supplier_id)
+    if "month" in group_by:
+        rows = rows.annotate(month=TruncMonth("day"))
+
+    fields = [GROUP_FIELDS[name] for name in group_by]
+    grouped = list(
+        rows.values(*fields)
+        .annotate(total_quantity=Sum("quantity"), cents=Sum("amount_cents"), line_count=Sum("lines"))
+        .filter(line_count__gt=0)
+        .order_by(*fields)
+    )
+
+    suppliers: dict[int, str] = {}
+    ingredients: dict[int, Ingredient] = {}
+    if "supplier" in group_by:
+        supplier_ids = {row["supplier_id"] for row in grouped}
+        suppliers = dict(Supplier.objects.filter(pk__in=supplier_ids).values_list("pk", "name"))
+    if "ingredient" in group_by:
+        ingredients = Ingredient.objects.in_bulk({row["ingredient_id"] for row in grouped})
+
+    summary = []
+    for row in grouped:
+        entry = {}
+        for name in group_by:
+            if name == "supplier":
+                entry["supplier_id"] = row["supplier_id"]
+                entry["supplier_name"] = suppliers.get(row["supplier_id"])
+            elif name == "ingredient":
+                ingredient = ingredients.get(row["ingredient_id"])
+                entry["ingredient_id"] = row["ingredient_id"]
+                entry["ingredient_name"] = ingredient.name if ingredient else None
+                entry["unit"] = ingredient.unit if ingredient else None
+            elif name == "month":
+                entry["month"] = row["month"].strftime("%Y-%m")
+            else:
+                entry[name] = row[GROUP_FIELDS[name]]
+        entry["quantity"] = row["total_quantity"]
+        entry["lines"] = row["line_count"]
+        entry["total_amount"] = str(Decimal(row["cents"]).scaleb(-2))
+        summary.append(entry)
+    return summary
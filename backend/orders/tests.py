@@ -0,0 +1,416 @@
+import tracemalloc
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from core.testing import buyer_client, create_buyer, create_order, create_product, create_supplier
+from . import export
+from .models import LeadTimeRollup, Order, OrderEvent, OrderItem, OrderStatus, SpendRollup
+from .spend import rebuild_spend_rollups, spend_summary
+
+
+def rollup_rows() -> list[tuple]:
+    """Non-empty spend buckets; ``rebuild_spend_rollups`` drops emptied ones."""
+    return sorted(
+        SpendRollup.objects.filter(lines__gt=0).values_list(
+            "buyer_id", "day", "supplier_id", "ingredient_id", "status", "quantity", "amount_cents", "lines"
+        )
+    )
+
+
+def assert_rollups_rebuild_unchanged(test: TestCase) -> None:
+    maintained = rollup_rows()
+    test.assertTrue(maintained)
+    rebuild_spend_rollups()
+    test.assertEqual(maintained, rollup_rows())
+
+
+class OrderCreateQueryTests(TestCase):
+    # Ingredient lookup, order insert, one bulk item insert and one
+    # executemany spend rollup upsert, plus the savepoint and its release.
+    QUERIES = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = create_buyer()
+        cls.ingredients = list(create_supplier("Mill", ingredients=20).ingredients.all())
+
+    def setUp(self):
+        self.client = buyer_client(self.buyer)
+
+    def create(self, ingredients):
+        return self.client.post(
+            "/api/orders/",
+            {"items": [{"ingredient_id": ingredient.pk, "quantity": 3} for ingredient in ingredients]},
+            format="json",
+        )
+
+    def test_query_count_does_not_grow_with_items(self):
+        with self.assertNumQueries(self.QUERIES):
+            single = self.create(self.ingredients[:1])
+        with self.assertNumQueries(self.QUERIES):
+            many = self.create(self.ingredients)
+
+        self.assertEqual(single.status_code, 201)
+        self.assertEqual(many.status_code, 201)
+        self.assertEqual(many.json()["item_count"], 20)
+        self.assertEqual(OrderItem.objects.filter(order_id=many.json()["id"]).count(), 20)
+
+
+class OrderReadQueryTests(TestCase):
+    """List and detail cost the same queries for one small order as for many large ones."""
+
+    def setUp(self):
+        self.buyer = create_buyer()
+        self.ingredients = list(create_supplier("Mill", ingredients=10).ingredients.all())
+        self.client = buyer_client(self.buyer)
+
+    def test_list_query_count_does_not_grow_with_orders_or_items(self):
+        create_order(self.buyer, self.ingredients[:1])
+        with self.assertNumQueries(1):
+            small = self.client.get("/api/orders/")
+        for _ in range(10):
+            create_order(self.buyer, self.ingredients)
+        with self.assertNumQueries(1):
+            large = self.client.get("/api/orders/")
+
+        self.assertEqual(len(small.json()["results"]), 1)
+        self.assertEqual(len(large.json()["results"]), 11)
+        self.assertEqual(large.json()["results"][0]["item_count"], 10)
+
+    def test_detail_query_count_does_not_grow_with_items(self):
+        small = create_order(self.buyer, self.ingredients[:1])
+        large = create_order(self.buyer, self.ingredients)
+        for order, items in ((small, 1), (large, 10)):
+            # The order and its items with their ingredients and suppliers.
+            with self.assertNumQueries(2):
+                response = self.client.get(f"/api/orders/{order.pk}/")
+            self.assertEqual(len(response.json()["items"]), items)
+
+    def test_detail_does_not_load_another_buyers_items(self):
+        order = create_order(create_buyer("other"), self.ingredients)
+        with mock.patch.object(OrderItem, "from_db", wraps=OrderItem.from_db) as loaded:
+            response = self.client.get(f"/api/orders/{order.pk}/")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(loaded.call_count, 0)
+
+
+# Small chunks, so a few thousand rows span many fetches and writes.
+@mock.patch.object(export, "FETCH_SIZE", 100)
+@mock.patch.object(export, "WRITE_SIZE", 50)
+class OrderExportMemoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = create_buyer()
+        cls.ingredients = list(create_supplier("Mill", ingredients=10).ingredients.all())
+
+        cls.token = Token.objects.create(user=cls.buyer.user)
+
+    def setUp(self):
+        self.client = buyer_client(self.buyer)
+
+    def add_rows(self, count: int) -> None:
+        orders = Order.objects.bulk_create([Order(buyer=self.buyer) for _ in range(count // 10)])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, ingredient=ingredient, quantity=1, unit_price=ingredient.price_per_unit)
+            for order in orders
+            for ingredient in self.ingredients
+        ])
+
+    def stream(self, output: str) -> tuple[int, int]:
+        """Export and consume the body; return (lines, peak traced bytes)."""
+        lines = 0
+        tracemalloc.start()
+        try:
+            response = self.client.get(f"/api/orders/export/?output={output}")
+            self.assertEqual(response.status_code, 200)
+            for chunk in response.streaming_content:
+                lines += chunk.count(b"\n")
+            response.close()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return lines, peak
+
+    async def astream(self, output: str) -> tuple[int, int]:
+        """``stream`` through the ASGI handler."""
+        lines = 0
+        tracemalloc.start()
+        try:
+            response = await self.async_client.get(
+                f"/api/orders/export/?output={output}", headers={"Authorization": f"Token {self.token.key}"}
+            )
+            self.assertEqual(response.status_code, 200)
+            # Read the body as Django's ASGI handler does.
+            async for chunk in response:
+                lines += chunk.count(b"\n")
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return lines, peak
+
+    def test_peak_memory_does_not_grow_with_rows(self):
+        self.assert_flat(self.stream)
+
+    def test_peak_memory_does_not_grow_with_rows_under_asgi(self):
+        self.assert_flat(async_to_sync(self.astream))
+
+    def assert_flat(self, stream) -> None:
+        self.add_rows(500)
+        small = {output: stream(output) for output in ("ndjson", "csv")}
+        self.add_rows(4500)
+        large = {output: stream(output) for output in ("ndjson", "csv")}
+
+        for output, header in (("ndjson", 0), ("csv", 1)):
+            self.assertEqual(small[output][0], 500 + header)
+            self.assertEqual(large[output][0], 5000 + header)
+            # Ten times the rows; anything proportional would be about 10x.
+            self.assertLess(large[output][1], small[output][1] * 1.5, output)
+
+
+class ProductionPlanIdempotencyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = create_buyer()
+        first = create_supplier("Mill")
+        second = create_supplier("Dairy")
+        cls.product = create_product(
+            cls.buyer, [*first.ingredients.all()[:1], *second.ingredients.all()[:1]]
+        )
+
+    def setUp(self):
+        self.client = buyer_client(self.buyer)
+
+    def plan(self, key: str, quantity: str = "10"):
+        return self.client.post(
+            "/api/orders/plan/",
+            {"products": [{"product_id": self.product.pk, "quantity": quantity}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_repeated_key_replays_the_first_response(self):
+        first = self.plan("plan-1")
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(Order.objects.filter(buyer=self.buyer).count(), 2)
+
+        second = self.plan("plan-1")
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(Order.objects.filter(buyer=self.buyer).count(), 2)
+
+    def test_reused_key_with_a_different_body_is_rejected(self):
+        self.plan("plan-2")
+        response = self.plan("plan-2", quantity="20")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.filter(buyer=self.buyer).count(), 2)
+
+
+class OrderTransitionTests(TestCase):
+    def setUp(self):
+        self.buyer = create_buyer()
+        self.client = buyer_client(self.buyer)
+        ingredients = list(create_supplier("Mill").ingredients.all())
+        self.applied, self.stale, self.invalid, self.invalid_expected = (
+            create_order(self.buyer, ingredients) for _ in range(4)
+        )
+        self.stale.transition_to(OrderStatus.CONFIRMED)
+        # create_order writes no rollup; start from a consistent one.
+        rebuild_spend_rollups()
+
+    def events(self) -> list[tuple]:
+        return sorted(OrderEvent.objects.values_list("order_id", "from_status", "to_status"))
+
+    def test_mixed_batch(self):
+        before = self.events()
+        response = self.client.post(
+            "/api/orders/transitions/",
+            {
+                "transitions": [
+                    # Same (expected, target) group, so only one of the two rows
+                    # matches its UPDATE and the moved row is read back.
+                    {"order_id": self.applied.pk, "status": "CONFIRMED", "expected_status": "PENDING"},
+                    {"order_id": self.stale.pk, "status": "CONFIRMED", "expected_status": "PENDING"},
+                    {"order_id": 999999, "status": "CONFIRMED"},
+                    {"order_id": self.invalid.pk, "status": "DELIVERED"},
+                    {"order_id": self.invalid_expected.pk, "status": "SHIPPED", "expected_status": "PENDING"},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["summary"], {"applied": 1, "conflict": 1, "invalid": 2, "not_found": 1})
+        self.assertEqual(
+            [(result["order_id"], result["result"], result.get("status")) for result in body["results"]],
+            [
+                (self.applied.pk, "applied", "CONFIRMED"),
+                (self.stale.pk, "conflict", "CONFIRMED"),
+                (999999, "not_found", None),
+                (self.invalid.pk, "invalid", "PENDING"),
+                (self.invalid_expected.pk, "invalid", None),
+            ],
+        )
+        self.assertEqual(
+            dict(Order.objects.values_list("pk", "status")),
+            {
+                self.applied.pk: "CONFIRMED",
+                self.stale.pk: "CONFIRMED",
+                self.invalid.pk: "PENDING",
+                self.invalid_expected.pk: "PENDING",
+            },
+        )
+        self.assertEqual(self.events(), sorted([*before, (self.applied.pk, "PENDING", "CONFIRMED")]))
+        assert_rollups_rebuild_unchanged(self)
+
+    def test_stale_expected_status_is_a_conflict(self):
+        before = self.events()
+        response = self.client.post(
+            f"/api/orders/{self.stale.pk}/transition/",
+            {"status": "CANCELLED", "expected_status": "PENDING"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["detail"], "Order is CONFIRMED, expected PENDING")
+        self.stale.refresh_from_db()
+        self.assertEqual(self.stale.status, "CONFIRMED")
+        self.assertEqual(self.events(), before)
+
+
+class SpendRollupTests(TestCase):
+    def setUp(self):
+        self.buyer = create_buyer()
+        self.client = buyer_client(self.buyer)
+        self.mill, self.dairy = create_supplier("Mill"), create_supplier("Dairy", ingredients=1)
+        oats, barley = self.mill.ingredients.order_by("pk")
+        milk = self.dairy.ingredients.get()
+        self.ingredients = (oats, barley, milk)
+        # 2 x 2.50 + 4 x 2.50 and 1 x 2.50 + 3 x 3.50.
+        self.first = self.create([(oats, 2), (milk, 4)])
+        self.second = self.create([(oats, 1), (barley, 3)])
+        self.transition(self.first, "CONFIRMED")
+        response = self.client.post(
+            "/api/orders/transitions/", {"transitions": [{"order_id": self.second, "status": "CANCELLED"}]}, format="json"
+        )
+        self.assertEqual(response.json()["summary"]["applied"], 1)
+        self.transition(self.first, "PROCESSING")
+
+    def create(self, lines) -> int:
+        response = self.client.post(
+            "/api/orders/",
+            {"items": [{"ingredient_id": ingredient.pk, "quantity": quantity} for ingredient, quantity in lines]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def transition(self, order_id: int, status: str) -> None:
+        response = self.client.post(f"/api/orders/{order_id}/transition/", {"status": status}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def summary(self, group_by: str) -> list[dict]:
+        return spend_summary(self.buyer.pk, [group_by], OrderStatus.values)
+
+    def test_maintained_rollup_matches_a_rebuild(self):
+        assert_rollups_rebuild_unchanged(self)
+
+    def test_summary_by_each_group(self):
+        oats, barley, milk = self.ingredients
+        today = timezone.localdate()
+        totals = {"quantity": 10, "lines": 4, "total_amount": "28.00"}
+        self.assertEqual(
+            [(row["supplier_name"], row["quantity"], row["lines"], row["total_amount"]) for row in self.summary("supplier")],
+            [("Mill", 6, 3, "18.00"), ("Dairy", 4, 1, "10.00")],
+        )
+        self.assertEqual(
+            [(row["ingredient_id"], row["quantity"], row["lines"], row["total_amount"]) for row in self.summary("ingredient")],
+            [(oats.pk, 3, 2, "7.50"), (barley.pk, 3, 1, "10.50"), (milk.pk, 4, 1, "10.00")],
+        )
+        self.assertEqual(
+            [(row["status"], row["quantity"], row["lines"], row["total_amount"]) for row in self.summary("status")],
+            [("CANCELLED", 4, 2, "13.00"), ("PROCESSING", 6, 2, "15.00")],
+        )
+        self.assertEqual(self.summary("month"), [{"month": today.strftime("%Y-%m"), **totals}])
+        self.assertEqual(self.summary("day"), [{"day": today, **totals}])
+
+
+class LeadTimeTests(TestCase):
+    def setUp(self):
+        self.buyer = create_buyer()
+        self.client = buyer_client(self.buyer)
+        order = create_order(self.buyer, list(create_supplier("Mill").ingredients.all()))
+        order.transition_to(OrderStatus.CONFIRMED)
+
+    def lead_times(self):
+        response = self.client.get("/api/orders/lead-times/?from_status=PENDING&to_status=CONFIRMED")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["suppliers"]
+
+    def test_summary_is_read_only(self):
+        # Only the rollup read; the confirmation isn't folded in yet.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.lead_times(), [])
+        self.assertFalse(LeadTimeRollup.objects.exists())
+
+    def test_command_folds_new_events(self):
+        call_command("refresh_lead_times", stdout=StringIO())
+        [supplier] = self.lead_times()
+        self.assertEqual((supplier["supplier_name"], supplier["orders"]), ("Mill", 1))
+
+
+class ProductionPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = create_buyer()
+        # Ingredients at 2.50 and 3.50; recipes use 1.500 of each.
+        cls.mill = create_supplier("Mill", minimum_order_value=Decimal("100.00"))
+        oats, barley = cls.mill.ingredients.order_by("pk")
+        cls.products = [create_product(cls.buyer, [oats, barley], name=f"Bar {n}") for n in range(5)]
+        cls.oats = oats
+
+    def setUp(self):
+        self.client = buyer_client(self.buyer)
+
+    def plan(self, quantities, **options):
+        return self.client.post(
+            "/api/orders/plan/",
+            {
+                "products": [{"product_id": p.pk, "quantity": q} for p, q in zip(self.products, quantities)],
+                **options,
+            },
+            format="json",
+        )
+
+    def test_demand_is_summed_in_one_query(self):
+        # Product lookup, summed demand and the ingredient prices, at any plan size.
+        for quantities in (["2.5"], ["2.5", "1.25", "1", "3", "0.5"]):
+            with self.assertNumQueries(3):
+                response = self.plan(quantities, dry_run=True)
+            [order] = response.json()["orders"]
+            # 1.5 of each ingredient per unit made.
+            required = Decimal("1.5") * sum(Decimal(q) for q in quantities)
+            self.assertEqual({item["required_quantity"] for item in order["items"]}, {f"{required:.3f}"})
+
+    def test_optimized_plan_places_the_minimum_order_top_up(self):
+        # 4 x 1.5 = 6 units of each: 15.00 + 21.00 = 36.00 against a 100.00 minimum.
+        response = self.plan(["4"], optimize=True)
+        self.assertEqual(response.status_code, 201)
+        [order] = response.json()["orders"]
+        # The 64.00 shortfall is bought as 26 more oats, the cheaper line.
+        self.assertEqual(order["total_amount"], "101.00")
+        self.assertFalse(order["below_minimum"])
+        oats = next(item for item in order["items"] if item["ingredient_id"] == self.oats.pk)
+        self.assertEqual((oats["quantity"], oats["top_up_quantity"], oats["line_total"]), (32, 26, "80.00"))
+        placed = dict(OrderItem.objects.filter(order_id=order["order_id"]).values_list("ingredient_id", "quantity"))
+        self.assertEqual(placed[self.oats.pk], 32)
+
+    def test_plan_as_written_only_flags_the_shortfall(self):
+        [order] = self.plan(["4"], dry_run=True).json()["orders"]
+        self.assertEqual(order["total_amount"], "36.00")
+        self.assertTrue(order["below_minimum"])
+        self.assertEqual({item["top_up_quantity"] for item in order["items"]}, {0})
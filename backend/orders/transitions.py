@@ -0,0 +1,108 @@
+from collections import defaultdict
+from django.db import transaction
+from django.utils import timezone
+from .models import Order, OrderEvent, sources_for, VALID_TRANSITIONS
+from .spend import record_transitions
+
+# Keeps every ``IN (...)`` list under SQLite's bound-parameter limit.
+ID_CHUNK_SIZE = 900
+
+APPLIED = "applied"
+CONFLICT = "conflict"
+INVALID = "invalid"
+NOT_FOUND = "not_found"
+
+
+def _chunks(ids: list[int]):
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        yield ids[start:start + ID_CHUNK_SIZE]
+
+
+def apply_transitions(buyer_id: int, requested: list[dict]) -> list[dict]:
+    """Apply many status changes with conditional ``UPDATE`` statements.
+
+    Each entry is ``{"order_id", "status", "expected_status"?}``. Orders are
+    grouped by (current, target) status and moved with one
+    ``UPDATE ... WHERE id IN (...) AND status = <current>`` per group, so a
+    row changed concurrently is simply not matched rather than overwritten.
+    Without ``expected_status`` the current status of each candidate is read
+    (locked where the database supports it) to pick its group. Every move is
+    appended to ``OrderEvent``. Rows the updates did not reach are read back
+    afterwards to report why. Spend rollups move with the orders in the same
+    transaction. Returns one result per entry, in request order.
+    """
+    stamp = timezone.now()
+    results: dict[int, dict] = {}
+    groups: dict[tuple[str | None, str], list[int]] = defaultdict(list)
+    for entry in requested:
+        order_id, target, expected = entry["order_id"], entry["status"], entry.get("expected_status")
+        if expected is not None and target not in VALID_TRANSITIONS[expected]:
+            results[order_id] = {
+                "order_id": order_id,
+                "result": INVALID,
+                "detail": f"Cannot transition from {expected} to {target}",
+            }
+            continue
+        groups[(expected, target)].append(order_id)
+
+    unmatched: dict[int, tuple[str | None, str]] = {}
+    events: list[OrderEvent] = []
+    with transaction.atomic():
+        for (expected, target), order_ids in groups.items():
+            for chunk in _chunks(order_ids):
+                by_source: dict[str, list[int]] = defaultdict(list)
+                if expected is not None:
+                    by_source[expected] = chunk
+                else:
+                    candidates = Order.objects.select_for_update().filter(
+                        buyer_id=buyer_id, pk__in=chunk, status__in=sources_for(target)
+                    )
+                    for order_id, source in candidates.values_list("pk", "status"):
+                        by_source[source].append(order_id)
+
+                moved: set[int] = set()
+                for source, source_ids in by_source.items():
+                    updated = Order.objects.filter(buyer_id=buyer_id, pk__in=source_ids, status=source).update(
+                        status=target, updated_at=stamp
+                    )
+                    if updated == len(source_ids):
+                        hits = source_ids
+                    else:
+                        # The stamp identifies exactly the rows this statement moved.
+                        hits = Order.objects.filter(
+                            pk__in=source_ids, status=target, updated_at=stamp
+                        ).values_list("pk", flat=True)
+                    for order_id in hits:
+                        moved.add(order_id)
+                        events.append(OrderEvent(order_id=order_id, from_status=source, to_status=target, created_at=stamp))
+
+                for order_id in chunk:
+                    if order_id in moved:
+                        results[order_id] = {"order_id": order_id, "result": APPLIED, "status": target}
+                    else:
+                        unmatched[order_id] = (expected, target)
+        OrderEvent.objects.bulk_create(events, batch_size=2000)
+        record_transitions(events)
+
+    current: dict[int, str] = {}
+    for chunk in _chunks(list(unmatched)):
+        current.update(Order.objects.filter(buyer_id=buyer_id, pk__in=chunk).values_list("pk", "status"))
+    for order_id, (expected, target) in unmatched.items():
+        if order_id not in current:
+            results[order_id] = {"order_id": order_id, "result": NOT_FOUND, "detail": "Order not found."}
+        elif expected is not None:
+            results[order_id] = {
+                "order_id": order_id,
+                "result": CONFLICT,
+                "status": current[order_id],
+                "detail": f"Order is {current[order_id]}, expected {expected}",
+            }
+        else:
+            results[order_id] = {
+                "order_id": order_id,
+                "result": INVALID,
+                "status": current[order_id],
+                "detail": f"Cannot transition from {current[order_id]} to {target}",
+            }
+
+    return [results[entry["order_id"]] for entry in requested]
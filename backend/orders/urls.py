@@ -1,8 +1,26 @@
 from django.urls import path
-from .views import OrderListCreateView, OrderDetailView, OrderTransitionView
+from .views import (
+    OrderListCreateView,
+    OrderDetailView,
+    OrderTransitionView,
+    ProductionPlanView,
+    OrderExportView,
+    BatchTransitionView,
+    OrderEventListView,
+    LeadTimeView,
+    OrderChangesView,
+    SpendView,
+)
 
 urlpatterns = [
     path("", OrderListCreateView.as_view(), name="order-list-create"),
+    path("changes/", OrderChangesView.as_view(), name="order-changes"),
+    path("plan/", ProductionPlanView.as_view(), name="order-plan"),
+    path("export/", OrderExportView.as_view(), name="order-export"),
+    path("transitions/", BatchTransitionView.as_view(), name="order-batch-transition"),
+    path("lead-times/", LeadTimeView.as_view(), name="order-lead-times"),
+    path("spend/", SpendView.as_view(), name="order-spend"),
     path("<int:pk>/", OrderDetailView.as_view(), name="order-detail"),
+    path("<int:pk>/events/", OrderEventListView.as_view(), name="order-events"),
     path("<int:pk>/transition/", OrderTransitionView.as_view(), name="order-transition"),
 ]
@@ -1,58 +1,300 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.db import models, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce
 from rest_framework import status
-from rest_framework.generics import ListCreateAPIView, RetrieveAPIView
+from rest_framework.generics import ListAPIView, ListCreateAPIView
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from core.async_views import AsyncRetrieveAPIView, gather_reads
+from core.idempotency import IdempotentPostMixin, run_idempotent
+from core.rendering import FastListMixin
+from core.routers import ReplicaReadMixin
+from core.sync import ChangesView
+from core.utils import seed_prefetch_cache
 from ingredients.models import Ingredient
-from .models import Order, OrderItem
+from .models import Order, OrderEvent, OrderItem, OrderStatus
+from .events import lead_time_summary
+from .export import aiter_chunks, export_rows, stream_csv, stream_ndjson
+from .planning import explode_plan, place_plan_orders, render_plan, unknown_products
+from .spend import record_created, spend_summary
+from .transitions import APPLIED, CONFLICT, INVALID, NOT_FOUND, apply_transitions
 from .serializers import (
     OrderSerializer,
     OrderDetailSerializer,
     OrderCreateSerializer,
+    ProductionPlanSerializer,
+    OrderExportParamsSerializer,
+    BatchTransitionSerializer,
+    OrderEventSerializer,
+    LeadTimeParamsSerializer,
+    SpendParamsSerializer,
 )
 
+AMOUNT_FIELD = models.DecimalField(max_digits=14, decimal_places=2)
 
-class OrderListCreateView(ListCreateAPIView):
+
+class OrderListCreateView(ReplicaReadMixin, IdempotentPostMixin, FastListMixin, ListCreateAPIView):
     serializer_class = OrderSerializer
 
     def get_queryset(self):
-        return Order.objects.filter(buyer=self.request.user.buyer_profile).prefetch_related("items")
+        return Order.objects.filter(buyer=self.request.user.buyer_profile).annotate(
+            item_count=Count("items"),
+            total_amount=Coalesce(
+                Sum(F("items__unit_price") * F("items__quantity"), output_field=AMOUNT_FIELD),
+                Value(Decimal("0.00")),
+                output_field=AMOUNT_FIELD,
+            ),
+        )
 
     def create(self, request: Request, *args, **kwargs) -> Response:
         serializer = OrderCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        buyer = request.user.buyer_profile
-        order = Order.objects.create(buyer=buyer)
-
-        for item_data in serializer.validated_data["items"]:
-            ingredient = Ingredient.objects.get(pk=item_data["ingredient_id"])
-            OrderItem.objects.create(
-                order=order,
-                ingredient=ingredient,
-                quantity=item_data["quantity"],
-                unit_price=ingredient.price_per_unit,
+        items_data = serializer.validated_data["items"]
+        ingredient_ids = {item_data["ingredient_id"] for item_data in items_data}
+        ingredients = Ingredient.objects.select_related("supplier").in_bulk(ingredient_ids)
+        unknown_ids = sorted(ingredient_ids - ingredients.keys())
+        if unknown_ids:
+            return Response(
+                {
+                    "detail": f"Unknown ingredient ids: {', '.join(map(str, unknown_ids))}.",
+                    "unknown_ingredient_ids": unknown_ids,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
+        buyer = request.user.buyer_profile
+        with transaction.atomic():
+            order = Order.objects.create(buyer=buyer)
+            items = OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    ingredient=ingredients[item_data["ingredient_id"]],
+                    quantity=item_data["quantity"],
+                    unit_price=ingredients[item_data["ingredient_id"]].price_per_unit,
+                )
+                for item_data in items_data
+            ])
+            record_created([order], items)
+
+        seed_prefetch_cache(order, "items", items)
         out = OrderDetailSerializer(order)
         return Response(out.data, status=status.HTTP_201_CREATED)
 
 
-class OrderDetailView(RetrieveAPIView):
+class OrderDetailView(ReplicaReadMixin, AsyncRetrieveAPIView):
     serializer_class = OrderDetailSerializer
 
     def get_queryset(self):
-        return Order.objects.filter(buyer=self.request.user.buyer_profile).prefetch_related("items__ingredient__supplier")
+        return Order.objects.filter(buyer=self.request.user.buyer_profile)
+
+    async def get(self, request: Request, pk: int) -> Response:
+        # The lines query checks ownership itself, so it runs alongside get_object.
+        items = OrderItem.objects.filter(order_id=pk, order__buyer__user_id=request.user.pk)
+        order, items = await gather_reads(self.get_object, lambda: list(items.select_related("ingredient__supplier")))
+        seed_prefetch_cache(order, "items", items)
+        return Response(self.get_serializer(order).data)
 
 
 class OrderTransitionView(APIView):
     def post(self, request: Request, pk: int) -> Response:
-        order = Order.objects.get(pk=pk, buyer=request.user.buyer_profile)
         new_status = request.data.get("status")
         if not new_status:
             return Response({"detail": "status is required."}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            order.transition_to(new_status)
-        except ValueError as exc:
-            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        expected_status = request.data.get("expected_status")
+        if expected_status is not None and expected_status not in OrderStatus.values:
+            return Response({"detail": f"Unknown expected_status {expected_status}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        buyer = request.user.buyer_profile
+        [result] = apply_transitions(
+            buyer.pk, [{"order_id": pk, "status": new_status, "expected_status": expected_status}]
+        )
+        if result["result"] != APPLIED:
+            return Response(
+                {"detail": result["detail"]},
+                status={
+                    NOT_FOUND: status.HTTP_404_NOT_FOUND,
+                    CONFLICT: status.HTTP_409_CONFLICT,
+                }.get(result["result"], status.HTTP_400_BAD_REQUEST),
+            )
+        order = Order.objects.prefetch_related("items__ingredient__supplier").get(pk=pk)
         return Response(OrderDetailSerializer(order).data)
+
+
+class BatchTransitionView(APIView):
+    """Move many orders in one request, e.g. a warehouse marking a day's shipments.
+
+    Every entry gets a result: ``applied``, ``conflict`` (its status was not
+    ``expected_status``), ``invalid`` (not allowed by ``VALID_TRANSITIONS``)
+    or ``not_found``. Entries are independent; one failing never blocks the rest.
+    """
+
+    def post(self, request: Request) -> Response:
+        serializer = BatchTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = apply_transitions(request.user.buyer_profile.pk, serializer.validated_data["transitions"])
+        summary = {outcome: 0 for outcome in (APPLIED, CONFLICT, INVALID, NOT_FOUND)}
+        for result in results:
+            summary[result["result"]] += 1
+        return Response({"summary": summary, "results": results})
+
+
+class ProductionPlanView(APIView):
+    """Explode a production plan into one draft (PENDING) order per supplier.
+
+    With ``dry_run`` the purchase plan is returned without writing anything.
+    With ``optimize`` each recipe line is bought from the cheapest member of
+    its ingredient group, taking suppliers' minimum order values into account.
+    An ``Idempotency-Key`` header is honoured as on order creation.
+    """
+
+    def post(self, request: Request) -> Response:
+        # APIView has no post for IdempotentPostMixin to wrap, so call it directly.
+        return run_idempotent(request, lambda: self._plan(request))
+
+    def _plan(self, request: Request) -> Response:
+        serializer = ProductionPlanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        plan: dict[int, Decimal] = {}
+        for line in serializer.validated_data["products"]:
+            plan[line["product_id"]] = plan.get(line["product_id"], Decimal(0)) + line["quantity"]
+
+        buyer = request.user.buyer_profile
+        unknown_ids = unknown_products(buyer.pk, list(plan))
+        if unknown_ids:
+            return Response(
+                {
+                    "detail": f"Unknown product ids: {', '.join(map(str, unknown_ids))}.",
+                    "unknown_product_ids": unknown_ids,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        groups = explode_plan(buyer.pk, plan, optimize=serializer.validated_data["optimize"])
+        dry_run = serializer.validated_data["dry_run"]
+        if not dry_run:
+            place_plan_orders(buyer.pk, groups)
+        return Response(
+            {"dry_run": dry_run, "orders": render_plan(groups)},
+            status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED,
+        )
+
+
+class OrderExportView(APIView):
+    """Stream the buyer's order lines as NDJSON or CSV.
+
+    Rows are read with ``iterator()`` and written out in chunks, so memory
+    use does not grow with the size of the export. Under ASGI the chunks are
+    served as an async iterator (see ``aiter_chunks``). ``?output=ndjson|csv``,
+    ``?date_from=``/``?date_to=`` (inclusive, by order creation date) and
+    repeatable ``?status=`` narrow the export.
+    """
+
+    def get(self, request: Request) -> StreamingHttpResponse:
+        params = OrderExportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        queryset = OrderItem.objects.filter(order__buyer=request.user.buyer_profile)
+        # Whole-day bounds keep the range sargable on (buyer, created_at).
+        tz = timezone.get_current_timezone()
+        if "date_from" in data:
+            queryset = queryset.filter(
+                order__created_at__gte=datetime.combine(data["date_from"], time.min, tzinfo=tz)
+            )
+        if "date_to" in data:
+            queryset = queryset.filter(
+                order__created_at__lt=datetime.combine(data["date_to"] + timedelta(days=1), time.min, tzinfo=tz)
+            )
+        if data.get("status"):
+            queryset = queryset.filter(order__status__in=data["status"])
+
+        rows = export_rows(queryset)
+        if data["output"] == "csv":
+            chunks, content_type = stream_csv(rows), "text/csv"
+        else:
+            chunks, content_type = stream_ndjson(rows), "application/x-ndjson"
+        if isinstance(request._request, ASGIRequest):
+            chunks = aiter_chunks(chunks)
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="orders.{data["output"]}"'
+        return response
+
+
+class OrderEventListView(ListAPIView):
+    """Status timeline of one order, oldest first."""
+
+    serializer_class = OrderEventSerializer
+    pagination_class = None
+
+    def get_queryset(self):
+        return OrderEvent.objects.filter(
+            order_id=self.kwargs["pk"], order__buyer=self.request.user.buyer_profile
+        ).order_by("created_at", "id")
+
+
+class LeadTimeView(APIView):
+    """Per-supplier lead time between two statuses, from the rollup tables."""
+
+    def get(self, request: Request) -> Response:
+        params = LeadTimeParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        if data["from_status"] == data["to_status"]:
+            return Response({"detail": "from_status and to_status must differ."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "from_status": data["from_status"],
+            "to_status": data["to_status"],
+            "suppliers": lead_time_summary(
+                request.user.buyer_profile.pk,
+                data["from_status"],
+                data["to_status"],
+                data.get("date_from"),
+                data.get("date_to"),
+            ),
+        })
+
+
+class SpendView(ReplicaReadMixin, APIView):
+    """Spend totals from the daily rollup, grouped by ``?group_by=`` (repeatable).
+
+    Groupings are ``supplier`` (default), ``ingredient``, ``month``, ``day``
+    and ``status``, combined in the order given. ``?date_from=``/``?date_to=``
+    bound the order date (inclusive), ``?supplier=`` narrows to one supplier,
+    and repeatable ``?status=`` selects order statuses; by default every
+    status except CANCELLED counts.
+    """
+
+    def get(self, request: Request) -> Response:
+        params = SpendParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        statuses = data.get("status") or [value for value in OrderStatus.values if value != OrderStatus.CANCELLED]
+        return Response({
+            "results": spend_summary(
+                request.user.buyer_profile.pk,
+                data.get("group_by") or ["supplier"],
+                statuses,
+                data.get("date_from"),
+                data.get("date_to"),
+                data.get("supplier"),
+            ),
+        })
+
+
+class OrderChangesView(ChangesView):
+    """Orders created or moved to a new status since the watermark, with items."""
+
+    serializer_class = OrderDetailSerializer
+
+    def get_queryset(self):
+        return Order.objects.filter(buyer=self.request.user.buyer_profile).prefetch_related(
+            "items__ingredient__supplier"
+        )
@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class ProductsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "products"
+
+    def ready(self) -> None:
+        from django.db.models.signals import post_delete, post_save, pre_delete
+        from .costing import invalidate_product_costs
+        from .models import Product, ProductIngredient, record_product_tombstones, record_recipe_line_tombstone
+
+        post_save.connect(invalidate_product_costs, sender=ProductIngredient, dispatch_uid="costing-save-ingredient")
+        post_delete.connect(invalidate_product_costs, sender=ProductIngredient, dispatch_uid="costing-delete-ingredient")
+        post_delete.connect(invalidate_product_costs, sender=Product, dispatch_uid="costing-delete-product")
+        pre_delete.connect(record_product_tombstones, sender=Product, dispatch_uid="tombstone-product")
+        post_delete.connect(record_recipe_line_tombstone, sender=ProductIngredient, dispatch_uid="tombstone-recipe-line")
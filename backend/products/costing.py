@@ -0,0 +1,127 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import models
+from django.db.models import F, Sum, Window
+from core.cache import CATALOGUE_CACHE, bump_cache_version, get_cache_version, get_catalogue_version
+from .models import Product, recorded_by_set_ingredients
+
+COST_FIELD = models.DecimalField(max_digits=20, decimal_places=5)
+UNIT_COST_PLACES = Decimal("0.0001")
+MONEY_PLACES = Decimal("0.01")
+QUANTITY_PLACES = Decimal("0.001")
+
+
+def recipe_version_key(buyer_id: int) -> str:
+    return f"costing:recipes:{buyer_id}"
+
+
+def get_recipe_version(buyer_id: int) -> int:
+    return get_cache_version(recipe_version_key(buyer_id), CATALOGUE_CACHE)
+
+
+def bump_recipe_version(buyer_id: int) -> None:
+    """Invalidate cached costings for every product owned by ``buyer_id``.
+
+    The version lives in the catalogue cache, like the catalogue version, so
+    a bump in one worker reaches the others when that cache is shared.
+    """
+    bump_cache_version(recipe_version_key(buyer_id), CATALOGUE_CACHE)
+
+
+def invalidate_product_costs(sender, instance, origin=None, **kwargs) -> None:
+    """Signal receiver for single-row ``Product``/``ProductIngredient`` writes."""
+    if recorded_by_set_ingredients(origin):
+        return
+    product = instance if isinstance(instance, Product) else instance.product
+    bump_recipe_version(product.buyer_id)
+
+
+def compute_costs(buyer_id: int, product_id: int | None = None) -> dict[int, dict]:
+    """Unit cost and per-ingredient breakdown for a buyer's products.
+
+    Line costs and per-product totals are computed by the database in a
+    single query (a window sum over each product's lines); Python only groups
+    the rows. Products without ingredients cost zero.
+    """
+    queryset = Product.objects.filter(buyer_id=buyer_id)
+    if product_id is not None:
+        queryset = queryset.filter(pk=product_id)
+    line_cost = F("product_ingredients__quantity") * F("product_ingredients__ingredient__price_per_unit")
+    rows = (
+        queryset.annotate(
+            line_cost=models.ExpressionWrapper(line_cost, output_field=COST_FIELD),
+            unit_cost=Window(Sum(line_cost, output_field=COST_FIELD), partition_by=F("id")),
+        )
+        .order_by("id", "product_ingredients__id")
+        .values_list(
+            "id",
+            "name",
+            "unit_cost",
+            "product_ingredients__ingredient_id",
+            "product_ingredients__ingredient__name",
+            "product_ingredients__ingredient__unit",
+            "product_ingredients__quantity",
+            "product_ingredients__ingredient__price_per_unit",
+            "line_cost",
+        )
+    )
+
+    costs: dict[int, dict] = {}
+    for pk, name, unit_cost, ingredient_id, ingredient_name, unit, quantity, price, cost in rows.iterator(chunk_size=5000):
+        product = costs.get(pk)
+        if product is None:
+            product = costs[pk] = {"product_id": pk, "name": name, "unit_cost": unit_cost or Decimal(0), "ingredients": []}
+        if ingredient_id is not None:
+            product["ingredients"].append({
+                "ingredient_id": ingredient_id,
+                "name": ingredient_name,
+                "unit": unit,
+                "quantity": quantity,
+                "price_per_unit": price,
+                "unit_cost": cost,
+            })
+    return costs
+
+
+def get_costs(buyer_id: int, product_id: int | None = None) -> dict[int, dict]:
+    """Cached ``compute_costs``.
+
+    Keys embed the catalogue version (bumped on any ingredient write, so
+    price changes invalidate) and the buyer's recipe version (bumped when a
+    product's ingredients change). Both versions come from the catalogue
+    cache, so the costings themselves can stay in this process's cache.
+    """
+    scope = "all" if product_id is None else product_id
+    key = (
+        f"costing:{get_catalogue_version()}:{get_recipe_version(buyer_id)}"
+        f":{buyer_id}:{scope}"
+    )
+    costs = cache.get(key)
+    if costs is None:
+        costs = compute_costs(buyer_id, product_id)
+        cache.set(key, costs)
+    return costs
+
+
+def scale_cost(cost: dict, batch_size: Decimal) -> dict:
+    """Render a costing for ``batch_size`` units, with decimals as strings."""
+    return {
+        "product_id": cost["product_id"],
+        "name": cost["name"],
+        "batch_size": str(batch_size),
+        "unit_cost": str(cost["unit_cost"].quantize(UNIT_COST_PLACES)),
+        "batch_cost": str((cost["unit_cost"] * batch_size).quantize(MONEY_PLACES)),
+        "ingredients": [
+            {
+                "ingredient_id": line["ingredient_id"],
+                "name": line["name"],
+                "unit": line["unit"],
+                "quantity": str(line["quantity"]),
+                "price_per_unit": str(line["price_per_unit"]),
+                "unit_cost": str(line["unit_cost"].quantize(UNIT_COST_PLACES)),
+                "batch_quantity": str((line["quantity"] * batch_size).quantize(QUANTITY_PLACES)),
+                "batch_cost": str((line["unit_cost"] * batch_size).quantize(MONEY_PLACES)),
+            }
+            for line in cost["ingredients"]
+        ],
+    }
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("buyers", "0001_initial"),
+        ("products", "0002_product_product_buyer_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["buyer", "updated_at", "id"], name="product_buyer_updated_idx"),
+        ),
+    ]
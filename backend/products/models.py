@@ -1,5 +1,10 @@
-from django.db import models
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
 from buyers.models import Buyer
+from core.models import Tombstone
+from core.sync import tombstone
+from core.utils import seed_prefetch_cache
 from ingredients.models import Ingredient
 
 
@@ -10,9 +15,60 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["buyer", "created_at", "id"], name="product_buyer_created_idx"),
+            models.Index(fields=["buyer", "updated_at", "id"], name="product_buyer_updated_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.name} ({self.buyer})"
 
+    def set_ingredients(self, ingredients: list[tuple[Ingredient, Decimal]]) -> bool:
+        """Make the recipe match ``ingredients``, writing only the rows that changed.
+
+        Existing rows are read through ``product_ingredients.all()`` so a
+        prefetched recipe costs no extra query. Returns True if anything was
+        written; the resulting rows are left in the prefetch cache in input order.
+        """
+        existing = {row.ingredient_id: row for row in self.product_ingredients.all()}
+        wanted = {ingredient.pk for ingredient, _ in ingredients}
+
+        rows: list[ProductIngredient] = []
+        to_create: list[ProductIngredient] = []
+        to_update: list[ProductIngredient] = []
+        for ingredient, quantity in ingredients:
+            row = existing.get(ingredient.pk)
+            if row is None:
+                row = ProductIngredient(product=self, ingredient=ingredient, quantity=quantity)
+                to_create.append(row)
+            else:
+                row.ingredient = ingredient
+                if row.quantity != quantity:
+                    row.quantity = quantity
+                    to_update.append(row)
+            rows.append(row)
+        stale = [row for ingredient_id, row in existing.items() if ingredient_id not in wanted]
+
+        changed = bool(to_create or to_update or stale)
+        if changed:
+            with transaction.atomic():
+                if stale:
+                    Tombstone.objects.bulk_create([_line_tombstone(row, self.buyer_id) for row in stale])
+                    stale_lines = ProductIngredient.objects.filter(pk__in=[row.pk for row in stale])
+                    # The per-row delete receivers skip it; see recorded_by_set_ingredients.
+                    stale_lines.recorded_by_set_ingredients = True
+                    stale_lines.delete()
+                if to_update:
+                    ProductIngredient.objects.bulk_update(to_update, ["quantity"])
+                if to_create:
+                    ProductIngredient.objects.bulk_create(to_create)
+            from .costing import bump_recipe_version
+            bump_recipe_version(self.buyer_id)
+
+        seed_prefetch_cache(self, "product_ingredients", rows)
+        return changed
+
 
 class ProductIngredient(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="product_ingredients")
@@ -24,3 +80,40 @@ class ProductIngredient(models.Model):
 
     def __str__(self) -> str:
         return f"{self.quantity} x {self.ingredient.name} in {self.product.name}"
+
+
+def recorded_by_set_ingredients(origin) -> bool:
+    """Whether a delete began in ``set_ingredients``, which writes its own tombstones and version bump."""
+    return getattr(origin, "recorded_by_set_ingredients", False)
+
+
+def _started_from(origin, *senders: type[models.Model]) -> bool:
+    """Whether ``origin`` (the instance or queryset a delete began with) is one of ``senders``."""
+    model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    return issubclass(model, senders)
+
+
+def _line_tombstone(row: ProductIngredient, buyer_id: int) -> Tombstone:
+    return tombstone(row, {"product_id": row.product_id, "ingredient_id": row.ingredient_id}, buyer_id)
+
+
+def record_product_tombstones(sender, instance: Product, origin=None, **kwargs) -> None:
+    """``pre_delete`` receiver: tombstone a product and its recipe for delta-sync clients.
+
+    Runs before the cascade, while the recipe can still be read, so instance,
+    queryset and cascade deletes are all covered. A prefetched recipe costs
+    no query. Nothing is written when the buyer themselves is being deleted.
+    """
+    if _started_from(origin, Buyer, get_user_model()):
+        return
+    Tombstone.objects.bulk_create([
+        tombstone(instance, {"id": instance.pk}, instance.buyer_id),
+        *(_line_tombstone(row, instance.buyer_id) for row in instance.product_ingredients.all()),
+    ])
+
+
+def record_recipe_line_tombstone(sender, instance: ProductIngredient, origin=None, **kwargs) -> None:
+    """``post_delete`` receiver for recipe lines removed from a product that remains."""
+    if recorded_by_set_ingredients(origin) or _started_from(origin, Product, Buyer, get_user_model()):
+        return
+    _line_tombstone(instance, instance.product.buyer_id).save()
@@ -1,3 +1,4 @@
+from decimal import Decimal
 from rest_framework import serializers
 from ingredients.serializers import IngredientSerializer
 from .models import Product, ProductIngredient
@@ -13,22 +14,34 @@ class ProductIngredientReadSerializer(serializers.ModelSerializer):
 
 class ProductIngredientWriteSerializer(serializers.Serializer):
     ingredient_id = serializers.IntegerField()
-    quantity = serializers.DecimalField(max_digits=10, decimal_places=3, min_value="0.001")
+    quantity = serializers.DecimalField(max_digits=10, decimal_places=3, min_value=Decimal("0.001"))
+
+
+class CostingParamsSerializer(serializers.Serializer):
+    batch_size = serializers.DecimalField(
+        max_digits=12, decimal_places=3, min_value=Decimal("0.001"), default=Decimal("1")
+    )
+
+
+class SourcingParamsSerializer(CostingParamsSerializer):
+    product = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=500)
 
 
 class ProductSerializer(serializers.ModelSerializer):
-    ingredient_count = serializers.SerializerMethodField()
+    # Annotated onto the list queryset in SQL (see ProductListCreateView).
+    ingredient_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Product
         fields = ["id", "name", "description", "ingredient_count", "created_at"]
 
-    def get_ingredient_count(self, obj: Product) -> int:
-        return obj.product_ingredients.count()
-
 
 class ProductDetailSerializer(ProductSerializer):
+    ingredient_count = serializers.SerializerMethodField()
     ingredients = ProductIngredientReadSerializer(source="product_ingredients", many=True, read_only=True)
 
     class Meta(ProductSerializer.Meta):
         fields = ProductSerializer.Meta.fields + ["ingredients", "updated_at"]
+
+    def get_ingredient_count(self, obj: Product) -> int:
+        return len(obj.product_ingredients.all())
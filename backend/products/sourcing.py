@@ -0,0 +1,323 @@
+"""Cheapest sourcing across interchangeable ingredients.
+
+A recipe line whose ingredient belongs to an ``IngredientGroup`` can be
+bought from any member of the group. Quantities and prices are converted to
+the group's base unit so members quoted per gram and per kilogram compare
+directly. Lines outside a group can only use their own ingredient.
+
+Every grouped offer, cheapest first, and every supplier's minimum order
+value are loaded into a ``PriceIndex`` with two queries. The index is cached
+per catalogue version, so any ingredient or supplier write invalidates it.
+Recipes come from one streamed query, and each product or plan is then
+solved in memory against the index. Costing thousands of products costs no
+more queries than costing one. A production plan's demand is summed per
+ingredient by the database (``plan_lines``).
+"""
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from decimal import Decimal
+from typing import NamedTuple
+from django.core.cache import cache
+from django.db import models
+from django.db.models import Case, F, Sum, Value, When
+from core.cache import get_catalogue_version
+from ingredients import units
+from ingredients.models import Ingredient
+from suppliers.models import Supplier
+from .costing import MONEY_PLACES, QUANTITY_PLACES, UNIT_COST_PLACES
+from .models import Product, ProductIngredient
+
+# Keeps every ``IN (...)`` list under SQLite's bound-parameter limit.
+ID_CHUNK_SIZE = 900
+# A planned product binds three parameters: its id in ``IN (...)`` and a WHEN pair.
+PLAN_CHUNK_SIZE = ID_CHUNK_SIZE // 3
+# Recipe and plan quantities both have 3 decimal places, so 6 keeps products exact.
+PLANNED_QUANTITY = models.DecimalField(max_digits=24, decimal_places=6)
+
+# ("group", group id) for lines that can be substituted, ("ingredient", id) otherwise.
+Key = tuple[str, int]
+
+
+class Offer(NamedTuple):
+    ingredient_id: int
+    name: str
+    unit: str
+    supplier_id: int
+    price_per_unit: Decimal
+    # Base units per ``unit``, and the price of one base unit.
+    factor: Decimal
+    base_price: Decimal
+
+
+class PriceIndex(NamedTuple):
+    offers: dict[int, list[Offer]]
+    # supplier id -> (name, minimum order value)
+    suppliers: dict[int, tuple[str, Decimal]]
+
+
+class Line(NamedTuple):
+    ingredient_id: int
+    name: str
+    unit: str
+    quantity: Decimal
+    price_per_unit: Decimal
+    supplier_id: int
+    group_id: int | None
+    group_unit: str | None
+
+
+# key -> (offer, quantity in base units)
+Choices = dict[Key, tuple[Offer, Decimal]]
+
+
+class Sourcing(NamedTuple):
+    choices: Choices
+    lines_cost: Decimal
+    top_ups: dict[int, Decimal]
+
+    @property
+    def total(self) -> Decimal:
+        return self.lines_cost + sum(self.top_ups.values(), Decimal(0))
+
+
+def _offer(ingredient_id, name, unit, supplier_id, price, factor: Decimal) -> Offer:
+    return Offer(ingredient_id, name, unit, supplier_id, price, factor, price / factor)
+
+
+def build_price_index() -> PriceIndex:
+    offers: dict[int, list[Offer]] = defaultdict(list)
+    members = Ingredient.objects.filter(group__isnull=False).values_list(
+        "pk", "name", "unit", "supplier_id", "price_per_unit", "group_id", "group__unit"
+    )
+    for pk, name, unit, supplier_id, price, group_id, group_unit in members.iterator(chunk_size=5000):
+        factor = units.factor(unit, group_unit)
+        # Members in a unit that doesn't convert can't be compared; Ingredient.clean rejects them.
+        if factor:
+            offers[group_id].append(_offer(pk, name, unit, supplier_id, price, factor))
+    for group_offers in offers.values():
+        group_offers.sort(key=lambda offer: (offer.base_price, offer.ingredient_id))
+    suppliers = {
+        pk: (name, minimum) for pk, name, minimum in Supplier.objects.values_list("pk", "name", "minimum_order_value")
+    }
+    return PriceIndex(dict(offers), suppliers)
+
+
+def get_price_index() -> PriceIndex:
+    key = f"sourcing:index:{get_catalogue_version()}"
+    index = cache.get(key)
+    if index is None:
+        index = build_price_index()
+        cache.set(key, index)
+    return index
+
+
+def _key_and_pinned(line: Line) -> tuple[Key, Offer]:
+    factor = units.factor(line.unit, line.group_unit) if line.group_id is not None else None
+    if not factor:
+        return ("ingredient", line.ingredient_id), _offer(
+            line.ingredient_id, line.name, line.unit, line.supplier_id, line.price_per_unit, Decimal(1)
+        )
+    return ("group", line.group_id), _offer(
+        line.ingredient_id, line.name, line.unit, line.supplier_id, line.price_per_unit, factor
+    )
+
+
+def _spend(choices: Choices) -> dict[int, Decimal]:
+    spend: dict[int, Decimal] = defaultdict(Decimal)
+    for offer, quantity in choices.values():
+        spend[offer.supplier_id] += quantity * offer.base_price
+    return spend
+
+
+def _evaluate(choices: Choices, index: PriceIndex) -> Sourcing:
+    spend = _spend(choices)
+    top_ups = {}
+    for supplier_id, amount in spend.items():
+        minimum = index.suppliers.get(supplier_id, ("", Decimal(0)))[1]
+        if amount < minimum:
+            top_ups[supplier_id] = minimum - amount
+    return Sourcing(choices, sum(spend.values(), Decimal(0)), top_ups)
+
+
+def optimize(demand: dict[Key, Decimal], pinned: dict[Key, Offer], index: PriceIndex) -> Sourcing:
+    """Cheapest choice of offer per key, honouring suppliers' minimum order values.
+
+    Each key first takes its cheapest offer. Then, smallest order first,
+    every supplier left below its minimum is either dropped or kept. A
+    dropped supplier's lines move to each key's next-cheapest offer. A kept
+    supplier is topped up to the minimum, and that top-up counts as cost.
+    It is dropped when moving its lines costs less than the top-up. Minimum
+    order values make the exact problem a set-cover variant, so this is a
+    greedy heuristic. It never returns anything dearer than the pinned
+    ingredients.
+    """
+
+    def options(key: Key) -> list[Offer]:
+        return index.offers.get(key[1], [pinned[key]]) if key[0] == "group" else [pinned[key]]
+
+    choices = {key: (options(key)[0], quantity) for key, quantity in demand.items()}
+    dropped: set[int] = set()
+    kept: set[int] = set()
+    while True:
+        current = _evaluate(choices, index)
+        short = [supplier_id for supplier_id in current.top_ups if supplier_id not in kept]
+        if not short:
+            break
+        spend = _spend(choices)
+        supplier_id = min(short, key=lambda pk: (spend[pk], pk))
+
+        moves: Choices | None = {}
+        extra = Decimal(0)
+        for key, (offer, quantity) in choices.items():
+            if offer.supplier_id != supplier_id:
+                continue
+            alternative = next(
+                (o for o in options(key) if o.supplier_id != supplier_id and o.supplier_id not in dropped), None
+            )
+            if alternative is None:
+                moves = None
+                break
+            moves[key] = (alternative, quantity)
+            extra += quantity * (alternative.base_price - offer.base_price)
+        if moves is not None and extra < current.top_ups[supplier_id]:
+            dropped.add(supplier_id)
+            choices.update(moves)
+        else:
+            kept.add(supplier_id)
+
+    best = _evaluate(choices, index)
+    as_pinned = _evaluate({key: (pinned[key], quantity) for key, quantity in demand.items()}, index)
+    return best if best.total <= as_pinned.total else as_pinned
+
+
+def _demand(lines: Iterable[tuple[Line, Decimal]]) -> tuple[dict[Key, Decimal], dict[Key, Offer], dict[Key, list[int]]]:
+    """Pool ``(line, multiplier)`` pairs into base-unit demand per key.
+
+    Also returns the pinned offer per key (the cheapest, if several recipe
+    lines share a group) and the recipe ingredients each key covers.
+    """
+    demand: dict[Key, Decimal] = defaultdict(Decimal)
+    pinned: dict[Key, Offer] = {}
+    replaces: dict[Key, list[int]] = defaultdict(list)
+    for line, multiplier in lines:
+        key, offer = _key_and_pinned(line)
+        demand[key] += line.quantity * multiplier * offer.factor
+        if key not in pinned or offer.base_price < pinned[key].base_price:
+            pinned[key] = offer
+        replaces[key].append(line.ingredient_id)
+    return demand, pinned, replaces
+
+
+LINE_FIELDS = (
+    "ingredient_id",
+    "ingredient__name",
+    "ingredient__unit",
+    "quantity",
+    "ingredient__price_per_unit",
+    "ingredient__supplier_id",
+    "ingredient__group_id",
+    "ingredient__group__unit",
+)
+
+
+def product_sourcing(buyer_id: int, batch_size: Decimal, product_ids: list[int] | None = None) -> list[dict]:
+    """Cheapest sourcing of ``batch_size`` units of each product, solved separately.
+
+    Minimum order values apply as if each product's batch were ordered on
+    its own. ``current_cost`` prices the recipe as written, with the same
+    top-ups, so ``savings`` is like for like.
+    """
+    index = get_price_index()
+    products = Product.objects.filter(buyer_id=buyer_id)
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+    rows = products.order_by("id").values_list("id", "name", *(f"product_ingredients__{f}" for f in LINE_FIELDS))
+
+    recipes: dict[int, tuple[str, list[Line]]] = {}
+    for pk, name, *line in rows.iterator(chunk_size=5000):
+        recipe = recipes.setdefault(pk, (name, []))
+        if line[0] is not None:
+            recipe[1].append(Line(*line))
+
+    results = []
+    for pk, (name, lines) in recipes.items():
+        demand, pinned, replaces = _demand((line, batch_size) for line in lines)
+        best = optimize(demand, pinned, index)
+        as_written = {}
+        for line in lines:
+            _, offer = _key_and_pinned(line)
+            as_written[("ingredient", line.ingredient_id)] = (offer, line.quantity * batch_size * offer.factor)
+        current = _evaluate(as_written, index)
+        results.append({
+            "product_id": pk,
+            "name": name,
+            "batch_size": str(batch_size),
+            "current_cost": str(current.total.quantize(MONEY_PLACES)),
+            "optimized_cost": str(best.total.quantize(MONEY_PLACES)),
+            "savings": str((current.total - best.total).quantize(MONEY_PLACES)),
+            "minimum_order_top_up": str(sum(best.top_ups.values(), Decimal(0)).quantize(MONEY_PLACES)),
+            "lines": render_choices(best, replaces, index),
+        })
+    return results
+
+
+def render_choices(sourcing: Sourcing, replaces: dict[Key, list[int]], index: PriceIndex) -> list[dict]:
+    rendered = []
+    for key, (offer, base_quantity) in sourcing.choices.items():
+        quantity = base_quantity / offer.factor
+        rendered.append({
+            "group_id": key[1] if key[0] == "group" else None,
+            "replaces": replaces[key],
+            "ingredient_id": offer.ingredient_id,
+            "name": offer.name,
+            "unit": offer.unit,
+            "supplier_id": offer.supplier_id,
+            "supplier_name": index.suppliers.get(offer.supplier_id, ("", None))[0],
+            "quantity": str(quantity.quantize(QUANTITY_PLACES)),
+            "price_per_unit": str(offer.price_per_unit),
+            "cost": str((quantity * offer.price_per_unit).quantize(UNIT_COST_PLACES)),
+        })
+    return rendered
+
+
+def plan_lines(buyer_id: int, plan: dict[int, Decimal], *fields: str) -> Iterator[tuple]:
+    """``(*fields, quantity)`` for the recipe lines of a plan, summed per distinct ``fields``.
+
+    ``quantity`` is each line's quantity times its product's planned units,
+    summed by the database. That is one query for up to ``PLAN_CHUNK_SIZE``
+    products. Bigger plans take one per chunk, and the same ``fields`` can
+    then come back once per chunk.
+    """
+    product_ids = list(plan)
+    for start in range(0, len(product_ids), PLAN_CHUNK_SIZE):
+        chunk = product_ids[start:start + PLAN_CHUNK_SIZE]
+        units = Case(*(When(product_id=pk, then=Value(plan[pk])) for pk in chunk), output_field=PLANNED_QUANTITY)
+        rows = (
+            ProductIngredient.objects.filter(product_id__in=chunk, product__buyer_id=buyer_id)
+            .values(*fields)
+            .annotate(planned=Sum(F("quantity") * units, output_field=PLANNED_QUANTITY))
+            .order_by()
+            .values_list(*fields, "planned")
+        )
+        yield from rows.iterator(chunk_size=5000)
+
+
+def plan_sourcing(buyer_id: int, plan: dict[int, Decimal]) -> dict[int, Decimal]:
+    """Cheapest sourcing for a whole production plan.
+
+    Demand is pooled across all products before optimizing, so minimum
+    order values apply to the combined order. Returns the quantity of each
+    chosen ingredient, in that ingredient's own unit.
+    """
+    index = get_price_index()
+    fields = [field for field in LINE_FIELDS if field != "quantity"]
+
+    def lines():
+        for ingredient_id, name, unit, price, supplier_id, group_id, group_unit, quantity in plan_lines(
+            buyer_id, plan, *fields
+        ):
+            yield Line(ingredient_id, name, unit, quantity, price, supplier_id, group_id, group_unit), Decimal(1)
+
+    demand, pinned, _ = _demand(lines())
+    best = optimize(demand, pinned, index)
+    return {offer.ingredient_id: base_quantity / offer.factor for offer, base_quantity in best.choices.values()}
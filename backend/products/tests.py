@@ -0,0 +1,185 @@
+from decimal import Decimal
+from unittest import mock
+from django.conf import settings
+from django.test import TestCase, override_settings
+from core.models import Tombstone
+from core.testing import buyer_client, create_buyer, create_product, create_supplier
+from ingredients.models import Ingredient, IngredientGroup
+from suppliers.models import Supplier
+from .costing import get_costs
+from .models import Product, ProductIngredient
+from .sourcing import plan_sourcing, product_sourcing
+from .views import resolve_ingredients
+
+
+class ProductReadQueryTests(TestCase):
+    """List and detail cost the same queries at any product or recipe size."""
+
+    def setUp(self):
+        self.buyer = create_buyer()
+        self.ingredients = list(create_supplier("Mill", ingredients=10).ingredients.all())
+        self.client = buyer_client(self.buyer)
+
+    def test_list_query_count_does_not_grow_with_products(self):
+        create_product(self.buyer, self.ingredients[:1])
+        with self.assertNumQueries(1):
+            small = self.client.get("/api/products/")
+        for number in range(10):
+            create_product(self.buyer, self.ingredients, name=f"Product {number}")
+        with self.assertNumQueries(1):
+            large = self.client.get("/api/products/")
+
+        self.assertEqual(len(small.json()["results"]), 1)
+        self.assertEqual(len(large.json()["results"]), 11)
+        self.assertEqual(large.json()["results"][0]["ingredient_count"], 10)
+
+    def test_detail_query_count_does_not_grow_with_recipe_lines(self):
+        small = create_product(self.buyer, self.ingredients[:1], name="Small")
+        large = create_product(self.buyer, self.ingredients, name="Large")
+        for product, lines in ((small, 1), (large, 10)):
+            # The product and its recipe with ingredients and suppliers.
+            with self.assertNumQueries(2):
+                response = self.client.get(f"/api/products/{product.pk}/")
+            self.assertEqual(len(response.json()["ingredients"]), lines)
+
+    def test_detail_does_not_load_another_buyers_recipe(self):
+        product = create_product(create_buyer("other"), self.ingredients)
+        with mock.patch.object(ProductIngredient, "from_db", wraps=ProductIngredient.from_db) as loaded:
+            response = self.client.get(f"/api/products/{product.pk}/")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(loaded.call_count, 0)
+
+
+class ProductCostCacheTests(TestCase):
+    def test_recipe_change_in_another_worker_invalidates_costs(self):
+        buyer = create_buyer()
+        ingredient = create_supplier("Mill", ingredients=1).ingredients.get()
+        product = create_product(buyer, [ingredient])
+        self.assertEqual(get_costs(buyer.pk)[product.pk]["unit_cost"], Decimal("3.75"))
+
+        # Another worker: its own default cache, the shared catalogue cache.
+        other_worker = {**settings.CACHES, "default": {**settings.CACHES["default"], "LOCATION": "other-worker"}}
+        with override_settings(CACHES=other_worker):
+            product.set_ingredients([(ingredient, Decimal("4"))])
+
+        self.assertEqual(get_costs(buyer.pk)[product.pk]["unit_cost"], Decimal("10"))
+
+
+class ProductTombstoneTests(TestCase):
+    def setUp(self):
+        self.buyer = create_buyer()
+        self.ingredients = list(create_supplier("Mill").ingredients.all())
+        self.product = create_product(self.buyer, self.ingredients)
+
+    def tombstones(self) -> list[tuple]:
+        return sorted(
+            (model, sorted(key.items()), buyer_id)
+            for model, key, buyer_id in Tombstone.objects.values_list("model", "key", "buyer_id")
+        )
+
+    def expected(self, product: bool, ingredients: list) -> list[tuple]:
+        lines = [
+            ("products.productingredient", [("ingredient_id", ingredient.pk), ("product_id", self.product.pk)], self.buyer.pk)
+            for ingredient in ingredients
+        ]
+        return sorted(lines + ([("products.product", [("id", self.product.pk)], self.buyer.pk)] if product else []))
+
+    def test_instance_delete(self):
+        response = buyer_client(self.buyer).delete(f"/api/products/{self.product.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.tombstones(), self.expected(True, self.ingredients))
+
+    def test_queryset_delete(self):
+        Product.objects.filter(buyer=self.buyer).delete()
+        self.assertEqual(self.tombstones(), self.expected(True, self.ingredients))
+
+    def test_recipe_line_queryset_delete(self):
+        ProductIngredient.objects.filter(ingredient=self.ingredients[0]).delete()
+        self.assertEqual(self.tombstones(), self.expected(False, self.ingredients[:1]))
+
+    def test_recipe_edit_writes_tombstones_in_one_query(self):
+        ingredients = list(create_supplier("Dairy", ingredients=20).ingredients.all())
+        client = buyer_client(self.buyer)
+        for removed in (1, 19):
+            product = create_product(self.buyer, ingredients, name=f"Keeps {20 - removed}")
+            kept = [{"ingredient_id": ingredient.pk, "quantity": "1.500"} for ingredient in ingredients[removed:]]
+            # Five reads (product, recipe and ingredients), then one tombstone
+            # insert, the lines' read and delete, the product update and savepoints.
+            with self.assertNumQueries(13):
+                response = client.patch(f"/api/products/{product.pk}/", {"ingredients": kept}, format="json")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                Tombstone.objects.filter(model="products.productingredient", key__product_id=product.pk).count(), removed
+            )
+
+    def test_buyer_delete_leaves_no_tombstones(self):
+        self.buyer.user.delete()
+        self.assertFalse(Product.objects.exists())
+        self.assertFalse(Tombstone.objects.exists())
+
+
+class ResolveIngredientsTests(TestCase):
+    def test_duplicate_ids_are_reported_once_each_in_order(self):
+        rows = [{"ingredient_id": pk, "quantity": Decimal("1")} for pk in (7, 3, 7, 5, 3, 7)]
+        with self.assertNumQueries(0):
+            resolved, error = resolve_ingredients(rows)
+        self.assertIsNone(resolved)
+        self.assertEqual(error.status_code, 400)
+        self.assertEqual(error.data, {"detail": "Duplicate ingredient ids: 3, 7."})
+
+
+class SourcingTests(TestCase):
+    def setUp(self):
+        self.buyer = create_buyer()
+        flour = IngredientGroup.objects.create(name="Flour", unit="kg")
+        self.bakery = Supplier.objects.create(name="Bakery")
+        # 2.00, 1.50 and about 1.76 per kg.
+        self.flour_kg = self.ingredient("Mill", "Flour", "kg", "2.00", flour)
+        self.flour_t = self.ingredient(self.bakery, "Flour", "t", "1500.00", flour)
+        self.flour_lb = self.ingredient("Farm", "Flour", "lb", "0.80", flour)
+        # Nobody else sells yeast, and 10 batches of it fall short of Dairy's minimum.
+        self.yeast = self.ingredient(
+            Supplier.objects.create(name="Dairy", minimum_order_value=Decimal("50.00")), "Yeast", "kg", "5.00", None
+        )
+        self.product = Product.objects.create(buyer=self.buyer, name="Bread")
+        ProductIngredient.objects.bulk_create([
+            ProductIngredient(product=self.product, ingredient=self.flour_kg, quantity=Decimal("2.000")),
+            ProductIngredient(product=self.product, ingredient=self.yeast, quantity=Decimal("0.500")),
+        ])
+
+    def ingredient(self, supplier, name, unit, price, group) -> Ingredient:
+        if isinstance(supplier, str):
+            supplier = Supplier.objects.create(name=supplier)
+        return Ingredient.objects.create(
+            supplier=supplier, name=name, unit=unit, price_per_unit=Decimal(price), group=group
+        )
+
+    def sourcing(self) -> tuple[dict, dict[int, dict]]:
+        [result] = product_sourcing(self.buyer.pk, Decimal(10))
+        return result, {line["ingredient_id"]: line for line in result["lines"]}
+
+    def test_units_are_converted_to_find_the_cheapest_offer(self):
+        _, lines = self.sourcing()
+        # 20 kg of flour bought by the tonne.
+        flour = lines[self.flour_t.pk]
+        self.assertEqual((flour["replaces"], flour["unit"]), ([self.flour_kg.pk], "t"))
+        self.assertEqual((flour["quantity"], flour["cost"]), ("0.020", "30.0000"))
+        self.assertEqual(plan_sourcing(self.buyer.pk, {self.product.pk: Decimal(10)})[self.flour_t.pk], Decimal("0.02"))
+
+    def test_supplier_below_its_minimum_loses_to_the_next_cheapest(self):
+        # Topping the bakery up to 100.00 costs more than buying by the pound.
+        self.bakery.minimum_order_value = Decimal("100.00")
+        self.bakery.save()
+        _, lines = self.sourcing()
+        self.assertNotIn(self.flour_t.pk, lines)
+        self.assertEqual((lines[self.flour_lb.pk]["quantity"], lines[self.flour_lb.pk]["cost"]), ("44.092", "35.2740"))
+
+    def test_line_no_other_supplier_covers_is_topped_up(self):
+        result, lines = self.sourcing()
+        self.assertEqual((lines[self.yeast.pk]["quantity"], lines[self.yeast.pk]["cost"]), ("5.000", "25.0000"))
+        # Flour 30.00 and yeast 25.00, plus 25.00 to reach Dairy's minimum;
+        # as written the flour costs 40.00.
+        self.assertEqual(
+            {field: result[field] for field in ("minimum_order_top_up", "optimized_cost", "current_cost", "savings")},
+            {"minimum_order_top_up": "25.00", "optimized_cost": "80.00", "current_cost": "90.00", "savings": "10.00"},
+        )
@@ -1,7 +1,18 @@
 from django.urls import path
-from .views import ProductListCreateView, ProductDetailView
+from .views import (
+    ProductListCreateView,
+    ProductDetailView,
+    ProductCostListView,
+    ProductCostView,
+    ProductChangesView,
+    ProductSourcingView,
+)
 
 urlpatterns = [
     path("", ProductListCreateView.as_view(), name="product-list-create"),
+    path("changes/", ProductChangesView.as_view(), name="product-changes"),
+    path("costs/", ProductCostListView.as_view(), name="product-cost-list"),
+    path("sourcing/", ProductSourcingView.as_view(), name="product-sourcing"),
     path("<int:pk>/", ProductDetailView.as_view(), name="product-detail"),
+    path("<int:pk>/cost/", ProductCostView.as_view(), name="product-cost"),
 ]
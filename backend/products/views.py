@@ -1,22 +1,69 @@
+from collections import Counter
+from decimal import Decimal
 from rest_framework import status
+from rest_framework.exceptions import NotFound
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django.db import transaction
+from django.db.models import Count
+from core.async_views import AsyncRetrieveAPIView, gather_reads
+from core.idempotency import IdempotentPostMixin
+from core.rendering import FastListMixin
+from core.routers import ReplicaReadMixin
+from core.sync import ChangesView
+from core.utils import seed_prefetch_cache
 from ingredients.models import Ingredient
+from .costing import get_costs, scale_cost
 from .models import Product, ProductIngredient
+from .sourcing import product_sourcing
 from .serializers import (
     ProductSerializer,
     ProductDetailSerializer,
     ProductIngredientWriteSerializer,
+    CostingParamsSerializer,
+    SourcingParamsSerializer,
 )
 
 
-class ProductListCreateView(ListCreateAPIView):
+def resolve_ingredients(
+    validated_data: list[dict],
+) -> tuple[list[tuple[Ingredient, Decimal]] | None, Response | None]:
+    """Turn validated ``ingredients`` payload rows into ``(Ingredient, quantity)`` pairs.
+
+    Resolves every ingredient in one query. Returns an error response instead
+    if any id is unknown or listed more than once.
+    """
+    ingredient_ids = [item["ingredient_id"] for item in validated_data]
+    duplicate_ids = sorted(pk for pk, count in Counter(ingredient_ids).items() if count > 1)
+    if duplicate_ids:
+        return None, Response(
+            {"detail": f"Duplicate ingredient ids: {', '.join(map(str, duplicate_ids))}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    ingredients = Ingredient.objects.select_related("supplier").in_bulk(ingredient_ids)
+    unknown_ids = sorted(set(ingredient_ids) - ingredients.keys())
+    if unknown_ids:
+        return None, Response(
+            {
+                "detail": f"Unknown ingredient ids: {', '.join(map(str, unknown_ids))}.",
+                "unknown_ingredient_ids": unknown_ids,
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return [(ingredients[item["ingredient_id"]], item["quantity"]) for item in validated_data], None
+
+
+class ProductListCreateView(ReplicaReadMixin, IdempotentPostMixin, FastListMixin, ListCreateAPIView):
     serializer_class = ProductSerializer
 
     def get_queryset(self):
-        return Product.objects.filter(buyer=self.request.user.buyer_profile).prefetch_related("product_ingredients")
+        return Product.objects.filter(buyer=self.request.user.buyer_profile).annotate(
+            ingredient_count=Count("product_ingredients")
+        )
 
     def create(self, request: Request, *args, **kwargs) -> Response:
         name = request.data.get("name", "")
@@ -28,56 +75,127 @@ class ProductListCreateView(ListCreateAPIView):
 
         ingredient_serializer = ProductIngredientWriteSerializer(data=ingredients_data, many=True)
         ingredient_serializer.is_valid(raise_exception=True)
+        ingredients, error = resolve_ingredients(ingredient_serializer.validated_data)
+        if error is not None:
+            return error
 
         buyer = request.user.buyer_profile
         with transaction.atomic():
             product = Product.objects.create(buyer=buyer, name=name, description=description)
-            for item in ingredient_serializer.validated_data:
-                ingredient = Ingredient.objects.get(pk=item["ingredient_id"])
-                ProductIngredient.objects.create(
-                    product=product,
-                    ingredient=ingredient,
-                    quantity=item["quantity"],
-                )
-
-        product.refresh_from_db()
+            # A brand-new product has no rows yet; skip reading them back.
+            seed_prefetch_cache(product, "product_ingredients", [])
+            product.set_ingredients(ingredients)
+
         out = ProductDetailSerializer(product)
         return Response(out.data, status=status.HTTP_201_CREATED)
 
 
-class ProductDetailView(RetrieveUpdateDestroyAPIView):
+class ProductDetailView(ReplicaReadMixin, AsyncRetrieveAPIView, RetrieveUpdateDestroyAPIView):
+    """Async GET; updates and deletes keep their sync code (see ``AsyncAPIView``)."""
+
     serializer_class = ProductDetailSerializer
 
     def get_queryset(self):
-        return Product.objects.filter(buyer=self.request.user.buyer_profile).prefetch_related(
-            "product_ingredients__ingredient__supplier"
-        )
+        queryset = Product.objects.filter(buyer=self.request.user.buyer_profile)
+        if self.request.method == "GET":
+            # get() loads the recipe itself.
+            return queryset
+        return queryset.prefetch_related("product_ingredients__ingredient__supplier")
+
+    async def get(self, request: Request, pk: int) -> Response:
+        # The recipe query checks ownership itself, so it runs alongside get_object.
+        lines = ProductIngredient.objects.filter(product_id=pk, product__buyer__user_id=request.user.pk)
+        product, lines = await gather_reads(self.get_object, lambda: list(lines.select_related("ingredient__supplier")))
+        seed_prefetch_cache(product, "product_ingredients", lines)
+        return Response(self.get_serializer(product).data)
 
     def update(self, request: Request, *args, **kwargs) -> Response:
         product = self.get_object()
 
-        if "name" in request.data:
-            product.name = request.data["name"]
-        if "description" in request.data:
-            product.description = request.data["description"]
+        changed_fields = [
+            field
+            for field in ("name", "description")
+            if field in request.data and request.data[field] != getattr(product, field)
+        ]
+        for field in changed_fields:
+            setattr(product, field, request.data[field])
 
+        ingredients = None
         if "ingredients" in request.data:
             ingredient_serializer = ProductIngredientWriteSerializer(data=request.data["ingredients"], many=True)
             ingredient_serializer.is_valid(raise_exception=True)
+            ingredients, error = resolve_ingredients(ingredient_serializer.validated_data)
+            if error is not None:
+                return error
+
+        with transaction.atomic():
+            ingredients_changed = ingredients is not None and product.set_ingredients(ingredients)
+            if changed_fields or ingredients_changed:
+                # updated_at is auto_now; include it so the recipe edit is visible.
+                product.save(update_fields=changed_fields + ["updated_at"])
 
-            with transaction.atomic():
-                product.save()
-                product.product_ingredients.all().delete()
-                for item in ingredient_serializer.validated_data:
-                    ingredient = Ingredient.objects.get(pk=item["ingredient_id"])
-                    ProductIngredient.objects.create(
-                        product=product,
-                        ingredient=ingredient,
-                        quantity=item["quantity"],
-                    )
-        else:
-            product.save()
-
-        product.refresh_from_db()
         out = ProductDetailSerializer(product)
         return Response(out.data)
+
+
+class ProductCostListView(APIView):
+    """Bill-of-materials cost rollup for every product the buyer owns."""
+
+    def get(self, request: Request) -> Response:
+        params = CostingParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        batch_size = params.validated_data["batch_size"]
+
+        costs = get_costs(request.user.buyer_profile.pk)
+        return Response({
+            "batch_size": str(batch_size),
+            "products": [scale_cost(cost, batch_size) for cost in costs.values()],
+        })
+
+
+class ProductCostView(APIView):
+    """Bill-of-materials cost rollup for a single product."""
+
+    def get(self, request: Request, pk: int) -> Response:
+        params = CostingParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        costs = get_costs(request.user.buyer_profile.pk, product_id=pk)
+        if pk not in costs:
+            raise NotFound()
+        return Response(scale_cost(costs[pk], params.validated_data["batch_size"]))
+
+
+class ProductSourcingView(APIView):
+    """Cheapest sourcing of each product's recipe across interchangeable ingredients.
+
+    Every product the buyer owns, or only repeatable ``?product=``, is
+    costed for ``?batch_size=`` units both as written and re-sourced from
+    the cheapest member of each ingredient group, taking suppliers' minimum
+    order values into account.
+    """
+
+    def get(self, request: Request) -> Response:
+        params = SourcingParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        batch_size = data["batch_size"]
+        return Response({
+            "batch_size": str(batch_size),
+            "products": product_sourcing(request.user.buyer_profile.pk, batch_size, data.get("product")),
+        })
+
+
+class ProductChangesView(ChangesView):
+    """Products whose fields or recipe changed, plus product and recipe-line tombstones."""
+
+    serializer_class = ProductDetailSerializer
+    tombstone_models = (Product, ProductIngredient)
+
+    def get_queryset(self):
+        return Product.objects.filter(buyer=self.request.user.buyer_profile).prefetch_related(
+            "product_ingredients__ingredient__supplier"
+        )
+
+    def get_tombstone_buyer(self):
+        return self.request.user.buyer_profile
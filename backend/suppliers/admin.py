@@ -4,5 +4,5 @@ from .models import Supplier
 
 @admin.register(Supplier)
 class SupplierAdmin(admin.ModelAdmin):
-    list_display = ["id", "name", "created_at"]
+    list_display = ["id", "name", "minimum_order_value", "created_at"]
     search_fields = ["name"]
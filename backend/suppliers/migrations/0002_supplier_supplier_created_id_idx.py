@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("suppliers", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="supplier",
+            index=models.Index(fields=["created_at", "id"], name="supplier_created_id_idx"),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    Supplier = apps.get_model("suppliers", "Supplier")
+    Supplier.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("suppliers", "0002_supplier_supplier_created_id_idx"),
+    ]
+
+    # Added nullable first so SQLite can ALTER TABLE in place, then
+    # backfilled from created_at so existing rows don't all look just-changed.
+    operations = [
+        migrations.AddField(
+            model_name="supplier",
+            name="updated_at",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="supplier",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="supplier",
+            index=models.Index(fields=["updated_at", "id"], name="supplier_updated_id_idx"),
+        ),
+    ]
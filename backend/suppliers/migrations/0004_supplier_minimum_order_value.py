@@ -0,0 +1,33 @@
+from importlib import import_module
+
+from django.db import migrations, models
+
+search_index = import_module("ingredients.migrations.0003_search_index")
+triggers = import_module("ingredients.migrations.0004_drop_fts_triggers")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("suppliers", "0003_supplier_updated_at_supplier_supplier_updated_id_idx"),
+        ("ingredients", "0005_ingredient_updated_at"),
+    ]
+
+    # SQLite adds a NOT NULL column by rebuilding the table, which the FTS
+    # triggers don't survive (see ingredients 0004), so they are dropped
+    # around it and recreated.
+    operations = [
+        migrations.RunPython(
+            search_index.run_on_sqlite(triggers.FTS_TRIGGERS_DROP),
+            search_index.run_on_sqlite(triggers.FTS_TRIGGERS_CREATE),
+        ),
+        migrations.AddField(
+            model_name="supplier",
+            name="minimum_order_value",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.RunPython(
+            search_index.run_on_sqlite(triggers.FTS_TRIGGERS_CREATE),
+            search_index.run_on_sqlite(triggers.FTS_TRIGGERS_DROP),
+        ),
+    ]
@@ -4,7 +4,16 @@ from django.db import models
 class Supplier(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
+    # Smallest order total the supplier accepts; 0 means no minimum.
+    minimum_order_value = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="supplier_created_id_idx"),
+            models.Index(fields=["updated_at", "id"], name="supplier_updated_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.name
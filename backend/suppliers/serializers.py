@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from ingredients.importer import PRICE_LIST_FORMATS
 from .models import Supplier
 
 
@@ -7,4 +8,11 @@ class SupplierSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Supplier
-        fields = ["id", "name", "description", "created_at", "ingredient_count"]
+        fields = ["id", "name", "description", "minimum_order_value", "created_at", "ingredient_count"]
+
+
+class PriceListUploadSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    # Named "input" because DRF reserves ?format= for content negotiation.
+    input = serializers.ChoiceField(choices=PRICE_LIST_FORMATS, required=False)
+    dry_run = serializers.BooleanField(default=False)
@@ -0,0 +1,57 @@
+import csv
+import tempfile
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from core.testing import create_supplier
+from ingredients.models import Ingredient
+
+
+class PriceListImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supplier = create_supplier("Mill", ingredients=0)
+        cls.staff = User.objects.create_user(username="staff", password="pw", is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def upload(self, content: bytes, name: str = "prices.csv"):
+        return self.client.post(
+            f"/api/suppliers/{self.supplier.pk}/price-list/",
+            {"file": SimpleUploadedFile(name, content)},
+            format="multipart",
+        )
+
+    def test_byte_order_mark_is_dropped(self):
+        response = self.upload("﻿name,price_per_unit,unit\nOats,1.20,kg\n".encode())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["created"], 1)
+        self.assertTrue(Ingredient.objects.filter(supplier=self.supplier, name="Oats").exists())
+
+    def test_invalid_utf8_is_rejected_with_its_line(self):
+        content = b"name,price_per_unit,unit\nOats,1.20,kg\nCaf\xe9,2.00,kg\n"
+        for name in ("prices.csv", "prices.ndjson"):
+            response = self.upload(content, name)
+            self.assertEqual(response.status_code, 400, name)
+            self.assertEqual(response.json()["line"], 3)
+        self.assertFalse(Ingredient.objects.filter(supplier=self.supplier).exists())
+
+    def test_malformed_csv_is_rejected_with_its_line(self):
+        oversized = "x" * (csv.field_size_limit() + 1)
+        response = self.upload(f"name,price_per_unit,unit\nOats,1.20,kg\n{oversized},2.00,kg\n".encode())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["line"], 3)
+        self.assertFalse(Ingredient.objects.filter(supplier=self.supplier).exists())
+
+    def test_command_reports_the_failing_line(self):
+        with tempfile.NamedTemporaryFile(suffix=".csv") as prices:
+            prices.write(b"name,price_per_unit,unit\nCaf\xe9,2.00,kg\n")
+            prices.flush()
+            with self.assertRaisesMessage(CommandError, "Line 2 is not valid UTF-8."):
+                call_command("import_price_list", self.supplier.pk, prices.name, stdout=StringIO())
+        self.assertFalse(Ingredient.objects.filter(supplier=self.supplier).exists())
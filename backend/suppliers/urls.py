@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import SupplierListView, SupplierDetailView, SupplierIngredientListView
+from .views import SupplierListView, SupplierDetailView, SupplierIngredientListView, SupplierChangesView, SupplierPriceListView
 
 urlpatterns = [
     path("", SupplierListView.as_view(), name="supplier-list"),
+    path("changes/", SupplierChangesView.as_view(), name="supplier-changes"),
     path("<int:pk>/", SupplierDetailView.as_view(), name="supplier-detail"),
     path("<int:pk>/ingredients/", SupplierIngredientListView.as_view(), name="supplier-ingredients"),
+    path("<int:pk>/price-list/", SupplierPriceListView.as_view(), name="supplier-price-list"),
 ]
@@ -1,27 +1,85 @@
 from django.db.models import Count
-from rest_framework.generics import ListAPIView, RetrieveAPIView
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from core.async_views import AsyncListAPIView, AsyncRetrieveAPIView
+from core.cache import AsyncCatalogueCacheMixin
+from core.rendering import FastListMixin
+from core.routers import ReplicaReadMixin
+from core.sync import ChangesView
 from .models import Supplier
-from .serializers import SupplierSerializer
+from .serializers import PriceListUploadSerializer, SupplierSerializer
+from ingredients.importer import READERS, PriceListFileError, decode_lines, format_for_filename, import_price_list
 from ingredients.serializers import IngredientSerializer
 
 
-class SupplierListView(ListAPIView):
+class SupplierListView(ReplicaReadMixin, AsyncCatalogueCacheMixin, FastListMixin, AsyncListAPIView):
     serializer_class = SupplierSerializer
 
     def get_queryset(self):
         return Supplier.objects.annotate(ingredient_count=Count("ingredients"))
 
 
-class SupplierDetailView(RetrieveAPIView):
+class SupplierDetailView(ReplicaReadMixin, AsyncCatalogueCacheMixin, AsyncRetrieveAPIView):
     serializer_class = SupplierSerializer
 
     def get_queryset(self):
         return Supplier.objects.annotate(ingredient_count=Count("ingredients"))
 
 
-class SupplierIngredientListView(ListAPIView):
+class SupplierIngredientListView(ReplicaReadMixin, AsyncCatalogueCacheMixin, FastListMixin, AsyncListAPIView):
     serializer_class = IngredientSerializer
 
     def get_queryset(self):
         from ingredients.models import Ingredient
-        return Ingredient.objects.filter(supplier_id=self.kwargs["pk"])
+        return Ingredient.objects.select_related("supplier").filter(supplier_id=self.kwargs["pk"])
+
+
+class SupplierChangesView(FastListMixin, ChangesView):
+    serializer_class = SupplierSerializer
+    tombstone_models = (Supplier,)
+
+    def get_queryset(self):
+        return Supplier.objects.annotate(ingredient_count=Count("ingredients"))
+
+
+class SupplierPriceListView(APIView):
+    """Import a supplier's price list (staff only).
+
+    Upload the file as multipart ``file``; the format comes from its
+    extension (``.csv``, ``.ndjson``/``.jsonl``) unless ``input`` says
+    otherwise. Returns counts of created, updated and unchanged ingredients
+    plus the first rejected rows. ``dry_run`` reports without writing. A
+    file that isn't UTF-8 or valid CSV is rejected whole, with its line.
+    """
+
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request: Request, pk: int) -> Response:
+        params = PriceListUploadSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        try:
+            supplier = Supplier.objects.get(pk=pk)
+        except Supplier.DoesNotExist:
+            raise NotFound()
+        upload = data["file"]
+        file_format = data.get("input") or format_for_filename(upload.name)
+        if file_format is None:
+            return Response(
+                {"detail": "Can't tell the format from the file name; pass input=csv or input=ndjson."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Large uploads are spooled to disk by Django, so this reads in a stream.
+        lines = decode_lines(upload.file)
+        try:
+            summary = import_price_list(supplier, READERS[file_format](lines), dry_run=data["dry_run"])
+        except PriceListFileError as exc:
+            return Response({"line": exc.line, "detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"supplier_id": supplier.pk, "dry_run": data["dry_run"], **summary.as_dict()})
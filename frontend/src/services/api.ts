@@ -1,4 +1,5 @@
 import axios from "axios";
+import type { Paginated } from "../types";
 
 const api = axios.create({
   baseURL: import.meta.env.VITE_API_BASE_URL ?? "http://localhost:8000",
@@ -12,4 +13,15 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+export async function fetchAllPages<T>(url: string): Promise<T[]> {
+  const results: T[] = [];
+  let next: string | null = url;
+  while (next) {
+    const response: { data: Paginated<T> } = await api.get<Paginated<T>>(next);
+    results.push(...response.data.results);
+    next = response.data.next;
+  }
+  return results;
+}
+
 export default api;
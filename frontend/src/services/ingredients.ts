@@ -1,7 +1,13 @@
-import type { Ingredient } from "../types";
-import api from "./api";
+import type { Ingredient, Paginated } from "../types";
+import api, { fetchAllPages } from "./api";
 
 export async function fetchIngredients(): Promise<Ingredient[]> {
-  const response = await api.get<Ingredient[]>("/api/ingredients/");
-  return response.data;
+  return fetchAllPages<Ingredient>("/api/ingredients/");
+}
+
+export async function searchIngredients(search: string): Promise<Ingredient[]> {
+  const response = await api.get<Paginated<Ingredient>>("/api/ingredients/", {
+    params: { search, page_size: 200 },
+  });
+  return response.data.results;
 }
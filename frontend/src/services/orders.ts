@@ -1,9 +1,8 @@
 import type { Order, OrderDetail } from "../types";
-import api from "./api";
+import api, { fetchAllPages } from "./api";
 
 export async function fetchOrders(): Promise<Order[]> {
-  const response = await api.get<Order[]>("/api/orders/");
-  return response.data;
+  return fetchAllPages<Order>("/api/orders/");
 }
 
 export async function fetchOrder(id: number): Promise<OrderDetail> {
@@ -17,8 +16,13 @@ export async function transitionOrder(id: number, status: string): Promise<Order
 }
 
 export async function createOrder(
-  items: { ingredient_id: number; quantity: number }[]
+  items: { ingredient_id: number; quantity: number }[],
+  idempotencyKey: string = crypto.randomUUID()
 ): Promise<OrderDetail> {
-  const response = await api.post<OrderDetail>("/api/orders/", { items });
+  const response = await api.post<OrderDetail>(
+    "/api/orders/",
+    { items },
+    { headers: { "Idempotency-Key": idempotencyKey } }
+  );
   return response.data;
 }
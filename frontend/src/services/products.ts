@@ -1,9 +1,8 @@
 import type { Product, ProductDetail } from "../types";
-import api from "./api";
+import api, { fetchAllPages } from "./api";
 
 export async function fetchProducts(): Promise<Product[]> {
-  const response = await api.get<Product[]>("/api/products/");
-  return response.data;
+  return fetchAllPages<Product>("/api/products/");
 }
 
 export async function fetchProduct(id: number): Promise<ProductDetail> {
@@ -14,13 +13,14 @@ export async function fetchProduct(id: number): Promise<ProductDetail> {
 export async function createProduct(
   name: string,
   description: string,
-  ingredients: { ingredient_id: number; quantity: string }[]
+  ingredients: { ingredient_id: number; quantity: string }[],
+  idempotencyKey: string = crypto.randomUUID()
 ): Promise<ProductDetail> {
-  const response = await api.post<ProductDetail>("/api/products/", {
-    name,
-    description,
-    ingredients,
-  });
+  const response = await api.post<ProductDetail>(
+    "/api/products/",
+    { name, description, ingredients },
+    { headers: { "Idempotency-Key": idempotencyKey } }
+  );
   return response.data;
 }
 
@@ -1,9 +1,8 @@
 import type { Supplier, Ingredient } from "../types";
-import api from "./api";
+import api, { fetchAllPages } from "./api";
 
 export async function fetchSuppliers(): Promise<Supplier[]> {
-  const response = await api.get<Supplier[]>("/api/suppliers/");
-  return response.data;
+  return fetchAllPages<Supplier>("/api/suppliers/");
 }
 
 export async function fetchSupplier(id: number): Promise<Supplier> {
@@ -12,6 +11,5 @@ export async function fetchSupplier(id: number): Promise<Supplier> {
 }
 
 export async function fetchSupplierIngredients(id: number): Promise<Ingredient[]> {
-  const response = await api.get<Ingredient[]>(`/api/suppliers/${id}/ingredients/`);
-  return response.data;
+  return fetchAllPages<Ingredient>(`/api/suppliers/${id}/ingredients/`);
 }
@@ -1,7 +1,14 @@
+export interface Paginated<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
 export interface Supplier {
   id: number;
   name: string;
   description: string;
+  minimum_order_value: string;
   created_at: string;
   ingredient_count: number;
 }
@@ -14,6 +21,7 @@ export interface Ingredient {
   description: string;
   unit: string;
   price_per_unit: string;
+  group_id: number | null;
 }
 
 export interface BuyerProfile {